@@ -0,0 +1,144 @@
+"""
+Anytime move decisions, a safe move is known right away and the analysis deepens
+(one more move of lookahead per iteration) until the turn's deadline.
+"""
+
+import time
+
+from typing import Dict, Iterator, List, Tuple
+
+import log
+
+from models import Board, Point
+
+# The timeout of a move request when the game doesn't specify one (milliseconds).
+DEFAULT_TIMEOUT_MS = 500
+
+# The time kept for the response to travel back to the game engine (milliseconds).
+DEFAULT_NETWORK_MARGIN_MS = 150
+
+# The number of search nodes between checks of the deadline.
+DEADLINE_CHECK_NODES = 256
+
+
+class DeadlineExceeded(Exception):
+    pass
+
+
+class Deadline:
+    """
+    The time by which a turn's move has to be decided.
+    """
+
+    __slots__ = "start", "end"
+
+    def __init__(self, budget: float, start: float = None):
+        """
+        :param budget: The number of seconds available from the `start`.
+        :param start: The `time.perf_counter` when the turn started, now by default.
+        """
+        self.start = time.perf_counter() if start is None else start
+        self.end = self.start + budget
+
+    @staticmethod
+    def from_request(
+        data: dict, margin_ms: int = DEFAULT_NETWORK_MARGIN_MS, start: float = None
+    ) -> "Deadline":
+        """
+        :return: The deadline of a move request, its timeout less the network margin.
+        """
+        timeout_ms = data["game"].get("timeout") or DEFAULT_TIMEOUT_MS
+        return Deadline(max(timeout_ms - margin_ms, 0) / 1000, start)
+
+    def remaining(self) -> float:
+        return self.end - time.perf_counter()
+
+    def expired(self) -> bool:
+        return time.perf_counter() >= self.end
+
+    def __repr__(self):
+        return f"Deadline(remaining={self.remaining():0.3f})"
+
+
+def fallback_move(board: Board) -> Point:
+    """
+    :return: The valid move with the most valid moves after it (a few bit operations),
+        or any move if we have none.
+    """
+    bits = board.bitboard
+    occupied = board.occupancy.occupied(2)
+
+    best = None
+    best_options = -1
+    for move in board.valid_snake_moves(board.me):
+        options = bits.neighbors(bits.bit(move)) & ~occupied
+        options = bin(options).count("1")
+        if options > best_options:
+            best = move
+            best_options = options
+
+    return best or board.me.head.neighbors[0]
+
+
+def deepen(
+    board: Board, moves: List[Point], deadline: Deadline, max_depth: int = None
+) -> Iterator[Tuple[int, Dict[Point, bool]]]:
+    """
+    Looks one more move ahead per iteration, for which of the `moves` we can still be
+    alive that many moves later (avoiding every snake body until it moves away).
+
+    :param board: The board (with obstacles) to search.
+    :param moves: The moves of our snake to check.
+    :param deadline: When to stop the search, the iteration in progress is abandoned.
+    :param max_depth: The deepest lookahead, by default our size (a path as long as we are
+        means we have the room to follow our tail).
+    :return: The depth and whether we survive each move, for every completed iteration.
+    """
+    bits = board.bitboard
+    occupancy = board.occupancy
+
+    if not max_depth:
+        max_depth = board.me.size
+
+    nodes = 0
+
+    def survives(position: Point, path: int, moves_made: int, depth: int) -> bool:
+        nonlocal nodes
+        nodes += 1
+        if nodes % DEADLINE_CHECK_NODES == 0 and deadline.expired():
+            raise DeadlineExceeded()
+
+        if moves_made == depth:
+            return True
+
+        # Our path stays part of our body, the lookahead is not longer than us.
+        legal = bits.neighbors(bits.bit(position)) & ~(
+            path | occupancy.occupied(moves_made + 1)
+        )
+        for move in position.neighbors:
+            move_bit = bits.bit(move)
+            if legal & move_bit and survives(
+                move, path | move_bit, moves_made + 1, depth
+            ):
+                return True
+
+        return False
+
+    for depth in range(1, max_depth + 1):
+        if deadline.expired():
+            log.verbose("Deadline reached before depth {} after {} nodes", depth, nodes)
+            return
+
+        try:
+            surviving = {
+                move: survives(move, bits.bit(move), 1, depth) for move in moves
+            }
+        except DeadlineExceeded:
+            log.verbose("Deadline reached at depth {} after {} nodes", depth, nodes)
+            return
+
+        yield depth, surviving
+
+        # There's nothing more to learn once none of the moves get that far.
+        if not any(surviving.values()):
+            return
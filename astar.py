@@ -5,14 +5,19 @@ https://www.simplifiedpython.net/a-star-algorithm-python-tutorial/
 It's adapted for the Board, Snake, Point model of BattleSnake.
 """
 
-import copy
+import heapq
 import time
+import tracemalloc
+
+from array import array
 
 # PriorityQueue is a data structure. It organize items based on priority iset.
 from queue import PriorityQueue
 from typing import List
 
-from models import Board, Snake, Point, Move
+import log
+
+from models import Board, Snake, Point, Move, Occupancy
 
 
 class State(object):
@@ -77,7 +82,7 @@ class State(object):
 
 
 class StateSnake(State):
-    __slots__ = "board", "snake"
+    __slots__ = "board", "snake", "blocked", "occupancy"
 
     def __init__(
         self,
@@ -87,6 +92,8 @@ class StateSnake(State):
         snake: Snake,
         start: Point = None,
         goal: Point = None,
+        blocked: int = 0,
+        occupancy: Occupancy = None,
     ):
         super(StateSnake, self).__init__(
             position=position, parent=parent, start=start, goal=goal
@@ -94,6 +101,10 @@ class StateSnake(State):
         self.dist = self.distance()
         self.board = board
         self.snake = snake
+        # Board mask of the obstacles that aren't part of the board snakes.
+        self.blocked = blocked
+        # When set, the board snake bodies move away as the path gets longer.
+        self.occupancy = occupancy
 
     def distance(self):
         # first check to see if we have reached to our goal, and if we have then simply return 0
@@ -110,7 +121,14 @@ class StateSnake(State):
         # print("Current state: ", self)
         if not self._children:
             # By default we only consider valid moves to get us to our desintation
-            valid_moves = self.board.valid_snake_moves(self.snake)
+            occupied = None
+            if self.occupancy:
+                # The path includes the start, so it's the number of the next move.
+                occupied = self.occupancy.occupied(len(self.path))
+
+            valid_moves = self.board.valid_snake_moves(
+                self.snake, self.blocked, occupied
+            )
             for move in valid_moves:
                 self._create_child_for_move(move)
 
@@ -125,9 +143,7 @@ class StateSnake(State):
 
     def _create_child_for_move(self, move):
         # create a child and store the value of the child and pass self to store the parent of the child
-        new_snake = self.snake.move_toward(
-            move, grow=(True if move in self.board.food else False)
-        )
+        new_snake = self.snake.move_toward(move, grow=self.board.is_food(move))
         # print("New Snake: ", new_snake)
         child = StateSnake(
             position=move,
@@ -136,6 +152,8 @@ class StateSnake(State):
             goal=self.goal,
             board=self.board,
             snake=new_snake,
+            blocked=self.blocked,
+            occupancy=self.occupancy,
         )
         # finally add this child to our children list
         self._children.append(child)
@@ -154,6 +172,7 @@ class AStarSnakePathSolver:
         alternate_limit: int = 0,
         move_limit: int = None,
         return_closest: bool = False,
+        time_aware: bool = False,
     ):
         """
         Used to find a path from the snake's current position to a given other
@@ -169,9 +188,12 @@ class AStarSnakePathSolver:
             if the most direct path can't be done in less than the limit, the solver will quit.
         :param return_closest: Whether to return the closest path to the destination if the
             search limit is reached or no more moves are possible.
+        :param time_aware: Whether the board snake bodies become passable once they would have moved
+            away (see `Occupancy`), otherwise the other snakes never move.
         """
         self.path = []  # store final solution from start state to goal state
         self.visited = []  # it keeps track all the children that are visited
+        self.start_state = None
         self.priorityQueue = PriorityQueue()
         self.start = snake.head  # store start state
         self.goal = goal  # store goal state
@@ -189,27 +211,45 @@ class AStarSnakePathSolver:
         # in its count of moves.
         self.move_limit = move_limit + 1
 
-        if move_snake:
-            self.snake = snake
+        self.snake = snake
+
+        # When the snake doesn't move, its starting body stays an obstacle
+        # while the states track the position of the moving snake.
+        self.blocked = 0 if move_snake else board.bitboard.mask(snake.body)
 
-        else:
-            # We create a copy of the snake, and giv it an ID
-            # that no other snake will have, therefore board movement
-            # will still track the position of the current snake.
-            self.snake = copy.deepcopy(snake)
-            snake.id = None
+        # Unless every body moves, including ours.
+        self.occupancy = None
+        if time_aware:
+            self.occupancy = board.occupancy
+            self.blocked = 0
+
+    def stats(self) -> dict:
+        """
+        :return: The number of states expanded, and created (see `measure_search` for their
+            size).
+        """
+        peak_nodes = 0
+        states = [self.start_state] if self.start_state else []
+        while states:
+            state = states.pop()
+            peak_nodes += 1
+            states.extend(state._children)
+
+        return {"expanded": len(self.visited), "peak_nodes": peak_nodes}
 
     def solve(self):
         start = time.perf_counter()
         try:
             # it doesn't have any parent state to start.
-            start_state = StateSnake(
+            start_state = self.start_state = StateSnake(
                 position=self.start,
                 parent=None,
                 start=self.start,
                 goal=self.goal,
                 board=self.board,
                 snake=self.snake,
+                blocked=self.blocked,
+                occupancy=self.occupancy,
             )
 
             move_count = 0
@@ -293,8 +333,11 @@ class AStarSnakePathSolver:
                             break
 
             if not self.path:
-                print(
-                    f"Goal of {self.goal} is not possible after {move_count} moves! (max {self.move_limit})"
+                log.trace(
+                    "Goal of {} is not possible after {} moves! (max {})",
+                    self.goal,
+                    move_count,
+                    self.move_limit,
                 )
                 if self.return_closest:
                     return last_path
@@ -302,12 +345,295 @@ class AStarSnakePathSolver:
             return self.path
         finally:
             end = time.perf_counter()
-            print(
-                f"Took {end - start:0.3f} seconds to find path from {self.start} to {self.goal} in "
-                + f"{len(self.path)} steps: {self.path}"
+            log.trace(
+                "Took {:0.3f} seconds to find path from {} to {} in {} steps: {}",
+                end - start,
+                self.start,
+                self.goal,
+                len(self.path),
+                self.path,
+            )
+
+
+class NodeStore(object):
+    __slots__ = "parents", "cells", "g", "grown", "health"
+    """
+    Array backed storage of the A* nodes, where a node is only an index in the arrays:
+        - The parent node index (-1 for the starting node).
+        - The board cell index (see `Grid`).
+        - The g-cost (i.e. number of moves made).
+        - How much the snake has grown, and its health.
+
+    The snake body of a node is never copied, it's the chain of parent cells followed by
+    the first `size + grown - g` segments of the starting body, shared by every node.
+    """
+
+    def __init__(self):
+        self.parents = array("i")
+        self.cells = array("i")
+        self.g = array("H")
+        self.grown = array("H")
+        self.health = array("h")
+
+    def add(self, parent: int, cell: int, g: int, grown: int, health: int) -> int:
+        self.parents.append(parent)
+        self.cells.append(cell)
+        self.g.append(g)
+        self.grown.append(grown)
+        self.health.append(health)
+        return len(self.cells) - 1
+
+    def cell_path(self, node: int) -> List[int]:
+        """
+        :return: The board cell indexes from the starting node to the `node`.
+        """
+        path = []
+        while node >= 0:
+            path.append(self.cells[node])
+            node = self.parents[node]
+        path.reverse()
+        return path
+
+    def __len__(self):
+        return len(self.cells)
+
+
+class HeapAStarSnakePathSolver:
+    def __init__(
+        self,
+        snake: Snake,
+        goal: Point,
+        board: Board,
+        move_snake: bool = True,
+        alternate_limit: int = 0,
+        move_limit: int = None,
+        return_closest: bool = False,
+        max_expansions: int = None,
+        time_aware: bool = False,
+    ):
+        """
+        Same as `AStarSnakePathSolver`, but states are ordered by the g+h score (moves made plus
+        the Manhattan distance to the goal) on a `heapq`, and every position is expanded at most once.
+        :param snake: The snake whose path we will find.
+        :param goal: The objective point on the board to find.
+        :param board: The board (with obstacles) to use in the path.
+        :param move_snake: Whether the snake's movement (and freeing space) should be considered (i.e. True),
+            or whether it's position should be static (i.e. False)
+        :param alternate_limit: Only kept for compatibility with `AStarSnakePathSolver`, since the g+h ordering
+            already considers every alternative path before a longer one.
+        :param move_limit: The maximum number of moves of a path, longer paths are abandoned.
+        :param return_closest: Whether to return the closest path to the destination if the
+            search limit is reached or no more moves are possible.
+        :param max_expansions: The maximum number of states to expand before abandoning the search,
+            by default every free position of the board may be expanded.
+        :param time_aware: Whether the board snake bodies become passable once they would have moved
+            away (see `Occupancy`), otherwise the other snakes never move.
+        """
+        self.path = []
+        self.visited = set()
+        self.nodes = NodeStore()
+        self.start = snake.head
+        self.goal = goal
+        self.board = board
+        self.snake = snake
+        self.move_snake = move_snake
+        self.alternate_limit = alternate_limit if alternate_limit >= 0 else 0
+        self.return_closest = return_closest
+        self.expanded = 0
+
+        free_cells = (board.size.x * board.size.y) - sum(
+            [snake.size for snake in board.snakes]
+        )
+
+        if not move_limit or move_limit < 1:
+            move_limit = free_cells
+        self.move_limit = move_limit
+
+        if not max_expansions or max_expansions < 1:
+            max_expansions = max(free_cells, 1)
+        self.max_expansions = max_expansions
+
+        bits = board.bitboard
+
+        # The board snakes that are not the moving snake never move.
+        own_board_body = board.board_body_mask(snake)
+        self._blocked = bits.occupied & ~own_board_body
+
+        # Unless they do, then they're only obstacles until their free time.
+        self._occupancy = board.occupancy if time_aware else None
+        self._own_board_body = own_board_body
+
+        # The masks of the first segments of the starting body, i.e. `_body_masks[n]`
+        # is the body of a node where only `n` starting segments are left.
+        self._body_masks = [0]
+        for segment in snake.body:
+            self._body_masks.append(self._body_masks[-1] | bits.bit(segment))
+
+        if not move_snake and not time_aware:
+            # When the snake doesn't move, its starting body stays an obstacle.
+            self._blocked |= self._body_masks[-1]
+
+    def _heuristic(self, position: Point) -> int:
+        return abs(position.x - self.goal.x) + abs(position.y - self.goal.y)
+
+    def _body_mask(self, node: int) -> int:
+        """
+        :return: The mask of the starting body segments that are still part of the node's snake.
+        """
+        nodes = self.nodes
+        size = self.snake.size + nodes.grown[node]
+        remaining = min(size - nodes.g[node], self.snake.size)
+        if remaining <= 0:
+            return 0
+
+        body = self._body_masks[remaining]
+
+        # Same rules as `Snake.possible_moves` for moving into our own tail.
+        if size > 3 and nodes.health[node] < 100:
+            body &= ~self.board.bitboard.bit(self.snake.body[remaining - 1])
+
+        return body
+
+    def _obstacles(self, moves: int) -> int:
+        """
+        :return: The mask of the other snake cells that can't be entered as the `moves`th move.
+        """
+        if self._occupancy is None:
+            return self._blocked
+        return self._occupancy.occupied(moves) & ~self._own_board_body
+
+    def _path(self, node: int) -> List[Point]:
+        cells = self.board.grid.cells
+        return [cells[cell] for cell in self.nodes.cell_path(node)]
+
+    def stats(self) -> dict:
+        """
+        :return: The number of nodes expanded, and created (see `measure_search` for their
+            size).
+        """
+        return {"expanded": self.expanded, "peak_nodes": len(self.nodes)}
+
+    def solve(self):
+        start = time.perf_counter()
+        try:
+            bits = self.board.bitboard
+            grid = self.board.grid
+            nodes = self.nodes
+
+            start_node = nodes.add(-1, grid.index(self.start), 0, 0, self.snake.health)
+            closest = start_node
+            closest_h = self._heuristic(self.start)
+
+            # Entries are (g + h, h, node), the node index is the insertion order
+            # which keeps the ordering stable.
+            open_heap = [(closest_h, closest_h, start_node)]
+
+            while open_heap and self.expanded < self.max_expansions:
+                _, h, node = heapq.heappop(open_heap)
+                position = grid.cells[nodes.cells[node]]
+
+                if position in self.visited:
+                    continue
+                self.visited.add(position)
+                self.expanded += 1
+
+                g = nodes.g[node]
+                if h < closest_h or (h == closest_h and g > nodes.g[closest]):
+                    closest = node
+                    closest_h = h
+
+                if g >= self.move_limit:
+                    continue
+
+                neighbors = Move.all_move_points(position)
+
+                # If we're aiming to get to a point in another snake, on the border,
+                # or in ourselves (i.e. not really a "valid" snake move") we check
+                # here to see if the goal is adjacent to the current point.
+                if self.goal in neighbors:
+                    goal_node = nodes.add(node, grid.index(self.goal), g + 1, 0, 0)
+                    self.path = self._path(goal_node)
+                    return self.path
+
+                legal = bits.neighbors(bits.bit(position)) & ~(
+                    self._obstacles(g + 1) | self._body_mask(node)
+                )
+
+                for move in neighbors:
+                    if not legal & bits.bit(move) or move in self.visited:
+                        continue
+
+                    if self.board.is_food(move):
+                        grown = nodes.grown[node] + 1
+                        health = 100
+                    else:
+                        grown = nodes.grown[node]
+                        health = nodes.health[node] - 1
+
+                    child = nodes.add(node, grid.index(move), g + 1, grown, health)
+                    child_h = self._heuristic(move)
+                    heapq.heappush(open_heap, (g + 1 + child_h, child_h, child))
+
+            log.trace(
+                "Goal of {} is not possible after {} expansions! "
+                + "(max {} expansions / {} moves)",
+                self.goal,
+                self.expanded,
+                self.max_expansions,
+                self.move_limit,
+            )
+            if self.return_closest:
+                return self._path(closest)
+
+            return self.path
+        finally:
+            end = time.perf_counter()
+            log.trace(
+                "Took {:0.3f} seconds to find path from {} to {} in {} steps: {}",
+                end - start,
+                self.start,
+                self.goal,
+                len(self.path),
+                self.path,
             )
 
 
+def measure_search(solver) -> dict:
+    """
+    Solves the path of a solver with its memory allocations traced, so every solver's memory
+    is measured the same way (the Python objects, arrays, queues and sets alike).
+
+    :param solver: An `AStarSnakePathSolver` or `HeapAStarSnakePathSolver` not solved yet.
+    :return: The `stats` of the solver, with the most bytes allocated by the search at once
+        ("peak_bytes") and their share per node created ("bytes_per_node").
+    """
+    if tracemalloc.is_tracing():
+        raise RuntimeError("The memory allocations are already traced.")
+
+    tracemalloc.start()
+    try:
+        solver.solve()
+        peak_bytes = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    stats = solver.stats()
+    peak_nodes = stats["peak_nodes"]
+    stats["peak_bytes"] = peak_bytes
+    stats["bytes_per_node"] = int(peak_bytes / peak_nodes) if peak_nodes else 0
+    return stats
+
+
+# The solvers that can be selected for `find_path`
+SOLVER_LEGACY = "legacy"
+SOLVER_HEAP = "heap"
+
+_SOLVERS = {SOLVER_LEGACY: AStarSnakePathSolver, SOLVER_HEAP: HeapAStarSnakePathSolver}
+
+# The solver used by `find_path` when none is specified.
+DEFAULT_SOLVER = SOLVER_LEGACY
+
+
 def find_path(
     snake: Snake,
     goal: Point,
@@ -316,8 +642,21 @@ def find_path(
     alternate_limit: int = 0,
     move_snake: bool = False,
     return_closest: bool = False,
+    solver: str = None,
+    max_expansions: int = None,
+    time_aware: bool = False,
 ):
-    path_solver = AStarSnakePathSolver(
+    solver = solver or DEFAULT_SOLVER
+    if solver not in _SOLVERS:
+        raise ValueError(f"Unknown path solver: {solver}")
+
+    solver_options = {}
+    if max_expansions:
+        if solver == SOLVER_LEGACY:
+            raise ValueError(f"The {solver} path solver has no expansion limit.")
+        solver_options["max_expansions"] = max_expansions
+
+    path_solver = _SOLVERS[solver](
         snake=snake,
         goal=goal,
         board=board,
@@ -325,5 +664,7 @@ def find_path(
         alternate_limit=alternate_limit,
         move_limit=max_moves,
         return_closest=return_closest,
+        time_aware=time_aware,
+        **solver_options,
     )
     return path_solver.solve()
@@ -0,0 +1,396 @@
+"""
+Best-reply search (BRS) of our moves in games with many snakes.
+
+Searching the moves of every snake at once explodes with 3 or more snakes, so instead
+every one of our moves is answered by the single strongest reply of any opponent (the
+other opponents don't move), then it's our move again. Opponents too far from our head
+to matter within the search don't move at all.
+"""
+
+import time
+
+from typing import List
+
+import log
+
+from anytime import DEADLINE_CHECK_NODES, Deadline, DeadlineExceeded
+from duel import LENGTH_WEIGHT, WIN, split_areas
+from models import BitBoard, Board, Grid, Point
+from zobrist import TranspositionTable, ZobristKeys
+
+# The deepest search (in our moves), unless the deadline comes first.
+DEFAULT_MAX_DEPTH = 32
+
+# Opponents with a head farther than this (in moves) from ours are left out of the search.
+DEFAULT_RADIUS = 6
+
+# The most best moves remembered (by state key), when no table is given.
+BEST_MOVES_SIZE = 1 << 16
+
+# The move of a snake without any move left on the board.
+_NO_MOVE = -1
+
+ME = 0
+
+
+class BrsState:
+    """
+    The snakes of a game (ours first), as the flat board indexes of their bodies (head first).
+    A dead snake has an empty body.
+    """
+
+    __slots__ = "bodies", "healths", "food", "key"
+
+    def __init__(self, bodies: tuple, healths: tuple, food: int, key: int):
+        self.bodies = bodies
+        self.healths = healths
+        # The `BitBoard` mask of the food
+        self.food = food
+        # The Zobrist key of the state
+        self.key = key
+
+    @staticmethod
+    def of(board: Board) -> "BrsState":
+        grid = board.grid
+        snakes = [board.me] + board.others
+        bodies = tuple(
+            tuple(grid.index(point) for point in snake.body) for snake in snakes
+        )
+        healths = tuple(snake.health for snake in snakes)
+        keys = ZobristKeys.of(board.size.x, board.size.y)
+        return BrsState(
+            bodies,
+            healths,
+            board.bitboard.food,
+            keys.state_key(bodies, healths, (grid.index(point) for point in board.food)),
+        )
+
+
+class BestReplySearch:
+    """
+    Iterative deepening alpha-beta search of our best move, where every opponent layer
+    only considers the one move (of any nearby opponent) that is worst for us.
+    """
+
+    def __init__(
+        self,
+        board: Board,
+        deadline: Deadline,
+        max_depth: int = None,
+        radius: int = DEFAULT_RADIUS,
+        best_moves: TranspositionTable = None,
+    ):
+        """
+        :param board: The board of a game with at least one opponent.
+        :param deadline: When to stop searching.
+        :param max_depth: The deepest search, `DEFAULT_MAX_DEPTH` by default.
+        :param radius: The farthest (in moves from our head) an opponent's head can be
+            for the opponent to move in the search.
+        :param best_moves: Our best move by state key, to try first (e.g. kept from the
+            search of the previous turn), a new table by default.
+        """
+        if not board.others:
+            raise ValueError("A best-reply search needs at least one opponent.")
+
+        self.board = board
+        self.deadline = deadline
+        self.max_depth = max_depth or DEFAULT_MAX_DEPTH
+        self.grid = Grid.of(board.size.x, board.size.y)
+        self.bits = BitBoard(board.size.x, board.size.y)
+        self.keys = ZobristKeys.of(board.size.x, board.size.y)
+        self.root = BrsState.of(board)
+        # State key => our best move there in the deepest search so far, to try it first.
+        self.best_moves = (
+            TranspositionTable(BEST_MOVES_SIZE) if best_moves is None else best_moves
+        )
+        self.inherited = len(self.best_moves)
+
+        # The opponents (index in the state) that are close enough to move.
+        head = board.me.head
+        self.opponents = [
+            index
+            for index, snake in enumerate(board.others, start=1)
+            if abs(head.x - snake.head.x) + abs(head.y - snake.head.y) <= radius
+        ]
+
+        self.depth = 0
+        self.nodes = 0
+        self.scores = {}
+        # (depth, seconds, nodes) of every completed search
+        self.timings = []
+        # (snake, cell) => number of cut-offs caused by moving there, to try those moves first.
+        self._history = {}
+
+    def stats(self) -> dict:
+        elapsed = sum(seconds for _, seconds, _ in self.timings)
+        return {
+            "depth": self.depth,
+            "nodes": self.nodes,
+            "opponents": len(self.opponents),
+            "inherited": self.inherited,
+            "best_moves": self.best_moves.stats(),
+            "nodes_per_second": int(self.nodes / elapsed) if elapsed else 0,
+            "timings": list(self.timings),
+        }
+
+    def search(self, moves: List[Point] = None) -> Point:
+        """
+        :param moves: Our moves in the order to search them first, by default our valid moves.
+        :return: The best move of the deepest completed search, None if none was completed.
+        """
+        grid = self.grid
+
+        if moves is None:
+            moves = list(self.board.valid_snake_moves(self.board.me))
+        order = [grid.index(move) for move in moves if move.in_bounds(self.board.size)]
+        if not order:
+            return None
+
+        best = None
+        try:
+            for depth in range(1, self.max_depth + 1):
+                if self.deadline.expired():
+                    break
+
+                start = time.perf_counter()
+                nodes = self.nodes
+
+                scores = {}
+                alpha = -WIN * 2
+                for move in order:
+                    # Just under the best score so far, a move as good gets its exact score.
+                    scores[move] = self._my_move_value(
+                        self.root, move, depth, alpha - 1, WIN * 2, 0
+                    )
+                    alpha = max(alpha, scores[move])
+
+                # The best moves first for the next iteration (the sort keeps the ties in order).
+                order.sort(key=lambda cell: scores[cell], reverse=True)
+                best = grid.cells[order[0]]
+                self.depth = depth
+                self.scores = {grid.cells[cell]: scores[cell] for cell in order}
+
+                seconds = time.perf_counter() - start
+                self.timings.append((depth, seconds, self.nodes - nodes))
+                log.verbose(
+                    "BRS depth {}: {} of {} in {:0.3f} seconds "
+                    + "({} nodes, {} opponents)",
+                    depth,
+                    best,
+                    self.scores,
+                    seconds,
+                    self.nodes - nodes,
+                    len(self.opponents),
+                )
+
+                # Won or lost no matter what, looking deeper won't change it.
+                if abs(scores[order[0]]) > WIN - self.max_depth * 2:
+                    break
+
+        except DeadlineExceeded:
+            log.verbose("BRS deadline reached at depth {}", self.depth + 1)
+
+        return best
+
+    def _count_node(self):
+        self.nodes += 1
+        if self.nodes % DEADLINE_CHECK_NODES == 0 and self.deadline.expired():
+            raise DeadlineExceeded()
+
+    def _moves(self, state: BrsState, snake: int) -> List[int]:
+        """
+        :return: The board cells the snake can move to without hitting a body (after its own
+            tail moves), ordered by the cut-offs they caused, or a losing move if none.
+        """
+        occupied = 0
+        for other, body in enumerate(state.bodies):
+            # Moving into another head is a head-to-head, that's left to `_move`.
+            for cell in body[:-1] if other == snake else body[1:]:
+                occupied |= 1 << cell
+
+        links = self.grid.links[state.bodies[snake][0]]
+        moves = [cell for cell in links if not occupied & (1 << cell)]
+        if not moves:
+            return [links[0] if links else _NO_MOVE]
+
+        history = self._history
+        moves.sort(key=lambda cell: history.get((snake, cell), 0), reverse=True)
+        return moves
+
+    def _move(self, state: BrsState, snake: int, move: int) -> BrsState:
+        """
+        Moves one snake (the others don't move), with the BattleSnake rules.
+        :return: The next state, where the snakes that died have an empty body.
+        """
+        bodies = list(state.bodies)
+        healths = list(state.healths)
+        food = state.food
+        key = state.key
+
+        health = healths[snake]
+        ate = move != _NO_MOVE and food & (1 << move)
+        if move != _NO_MOVE:
+            key = self.keys.move(
+                key, snake, bodies[snake], move, health, 100 if ate else health - 1, ate
+            )
+
+        body = (move,) + bodies[snake][:-1]
+        if ate:
+            # The new tail is stacked, so it stays for one more move.
+            body += (body[-1],)
+            healths[snake] = 100
+            food &= ~(1 << move)
+        else:
+            healths[snake] -= 1
+        bodies[snake] = body
+
+        if move == _NO_MOVE or healths[snake] <= 0 or move in body[1:]:
+            bodies[snake] = ()
+        else:
+            for other, other_body in enumerate(bodies):
+                if other == snake or not other_body:
+                    continue
+
+                if move == other_body[0]:
+                    # Head-to-head, the longest survives.
+                    if len(body) <= len(other_body):
+                        bodies[snake] = ()
+                    if len(other_body) <= len(body):
+                        bodies[other] = ()
+                    break
+
+                if move in other_body:
+                    bodies[snake] = ()
+                    break
+
+        # The snakes that died leave the state.
+        for other, other_body in enumerate(bodies):
+            if other_body or not state.bodies[other]:
+                continue
+            if other != snake:
+                key = self.keys.remove(key, other, state.bodies[other], healths[other])
+            elif move != _NO_MOVE:
+                key = self.keys.remove(key, snake, body, healths[snake])
+            else:
+                key = self.keys.remove(key, snake, state.bodies[snake], health)
+
+        return BrsState(tuple(bodies), tuple(healths), food, key)
+
+    def _outcome(self, state: BrsState, ply: int):
+        """
+        :return: The score when we're dead or the last snake alive, otherwise None.
+        """
+        if not state.bodies[ME]:
+            return -(WIN - ply)
+        if not any(state.bodies[1:]):
+            return WIN - ply
+        return None
+
+    def _my_move_value(
+        self,
+        state: BrsState,
+        my_move: int,
+        depth: int,
+        alpha: int,
+        beta: int,
+        ply: int,
+    ) -> int:
+        """
+        :return: The score of our move, for the best reply of all the opponents.
+        """
+        self._count_node()
+
+        state = self._move(state, ME, my_move)
+        outcome = self._outcome(state, ply)
+        if outcome is not None:
+            return outcome
+
+        replies = [
+            (opponent, move)
+            for opponent in self.opponents
+            if state.bodies[opponent]
+            for move in self._moves(state, opponent)
+        ]
+        if not replies:
+            if depth <= 1:
+                return self._evaluate(state)
+            return self._max_value(state, depth - 1, alpha, beta, ply + 1)
+
+        history = self._history
+        replies.sort(key=lambda reply: history.get(reply, 0), reverse=True)
+
+        value = WIN * 2
+        for opponent, move in replies:
+            child = self._move(state, opponent, move)
+            score = self._outcome(child, ply)
+            if score is None:
+                if depth <= 1:
+                    score = self._evaluate(child)
+                else:
+                    score = self._max_value(child, depth - 1, alpha, beta, ply + 1)
+
+            if score < value:
+                value = score
+            if value < beta:
+                beta = value
+            if alpha >= beta:
+                key = (opponent, move)
+                history[key] = history.get(key, 0) + depth
+                break
+
+        return value
+
+    def _max_value(
+        self, state: BrsState, depth: int, alpha: int, beta: int, ply: int
+    ) -> int:
+        """
+        :return: The score of our best move.
+        """
+        self._count_node()
+
+        moves = self._moves(state, ME)
+        best_move = self.best_moves.get(state.key)
+        if best_move in moves and best_move != moves[0]:
+            moves.remove(best_move)
+            moves.insert(0, best_move)
+
+        value = -WIN * 2
+        for my_move in moves:
+            score = self._my_move_value(state, my_move, depth, alpha, beta, ply)
+            if score > value:
+                value = score
+                best_move = my_move
+            if value > alpha:
+                alpha = value
+            if alpha >= beta:
+                key = (ME, my_move)
+                self._history[key] = self._history.get(key, 0) + depth
+                break
+
+        self.best_moves.put(state.key, best_move, depth)
+        return value
+
+    def _evaluate(self, state: BrsState) -> int:
+        """
+        :return: How good the state is for us, the cells we get to before any opponent
+            (a Voronoi split of the board) and our length compared to the longest opponent.
+        """
+        bits = self.bits
+        my_body = state.bodies[ME]
+
+        free = bits.full
+        their_heads = 0
+        their_size = 0
+        for body in state.bodies:
+            for cell in body:
+                free &= ~(1 << cell)
+            if body and body is not my_body:
+                their_heads |= 1 << body[0]
+                their_size = max(their_size, len(body))
+
+        my_size = len(my_body)
+        my_area, _ = split_areas(
+            bits, free, 1 << my_body[0], their_heads, my_size - their_size
+        )
+
+        return my_area + (my_size - their_size) * LENGTH_WEIGHT
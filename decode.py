@@ -0,0 +1,68 @@
+"""
+A fast decoding of the requests, straight into the points of the board.
+
+The generic decoding (e.g. CherryPy's `json_in`) builds a dict for every body segment and
+food, then `Board.parse` turns each of them into a Point. Here the JSON decoder returns the
+interned Point of every `{"x": .., "y": ..}` object instead (no dict for them), which the
+board uses as they are. The raw request is kept to be logged, instead of encoding it again.
+"""
+
+import json
+
+from typing import Union
+
+from models import Point
+
+
+class Request(dict):
+    """
+    A decoded request, which remembers its JSON text.
+    """
+
+    __slots__ = ("raw",)
+
+
+def _decode_object(pairs: list):
+    if len(pairs) == 2:
+        (first_key, first), (second_key, second) = pairs
+        if first_key == "x" and second_key == "y":
+            key = (first, second)
+        elif first_key == "y" and second_key == "x":
+            key = (second, first)
+        else:
+            return dict(pairs)
+        point = _interned.get(key)
+        return point if point is not None else Point(*key)
+    return dict(pairs)
+
+
+_interned = Point._interned
+_decoder = json.JSONDecoder(object_pairs_hook=_decode_object)
+
+
+def decode_request(body: Union[bytes, str]) -> Request:
+    """
+    :param body: The JSON text of a request.
+    :return: The request, where every point (of the bodies, heads and food) is a Point.
+    """
+    if isinstance(body, bytes):
+        body = body.decode("utf-8")
+
+    request = Request(_decoder.decode(body))
+    request.raw = body
+    return request
+
+
+def request_text(data: dict) -> str:
+    """
+    :return: The JSON text of a request, as received when it was decoded here.
+    """
+    if isinstance(data, Request):
+        return data.raw
+    return json.dumps(data, default=_encode_point)
+
+
+def _encode_point(point):
+    if isinstance(point, Point):
+        return {"x": point.x, "y": point.y}
+    raise TypeError(f"{point!r} is not JSON serializable")
@@ -0,0 +1,177 @@
+"""
+Breadth-first search distance fields, computed once per snake head per turn and shared
+by every heuristic that needs a shortest path (instead of one A* search per target).
+"""
+
+import weakref
+
+from collections import deque
+from typing import List
+
+from models import Board, Occupancy, Point, Snake
+
+_UNREACHED = -1
+
+# Board => {(snake ID, time_aware, others_move) => DistanceField}
+_fields = weakref.WeakKeyDictionary()
+
+
+class DistanceField:
+    """
+    The number of moves from a snake's head to every cell of a board, with the parent
+    of every cell on one of its shortest paths.
+    """
+
+    __slots__ = "board", "snake", "time_aware", "others_move", "distances", "parents"
+
+    def __init__(
+        self,
+        board: Board,
+        snake: Snake,
+        time_aware: bool = False,
+        others_move: bool = False,
+    ):
+        """
+        :param board: The board (with obstacles) to search.
+        :param snake: The snake whose head is the origin of the field.
+        :param time_aware: Whether the snake's own body segments become passable once they
+            would have moved away (i.e. its tail moves), otherwise its body is a permanent obstacle.
+        :param others_move: Same as `time_aware`, but for the bodies of the other snakes.
+        """
+        self.board = board
+        self.snake = snake
+        self.time_aware = time_aware
+        self.others_move = others_move
+
+        grid = board.grid
+        free_times = _occupancy(board, snake, time_aware, others_move).free_times
+
+        distances = [_UNREACHED] * len(grid.cells)
+        parents = [_UNREACHED] * len(grid.cells)
+        links = grid.links
+
+        head = grid.index(snake.head)
+        distances[head] = 0
+        queue = deque([head])
+
+        while queue:
+            cell = queue.popleft()
+            arrival = distances[cell] + 1
+            for neighbor in links[cell]:
+                if (
+                    distances[neighbor] == _UNREACHED
+                    and free_times[neighbor] <= arrival
+                ):
+                    distances[neighbor] = arrival
+                    parents[neighbor] = cell
+                    queue.append(neighbor)
+
+        self.distances = distances
+        self.parents = parents
+
+    def _reach(self, target: Point) -> tuple:
+        """
+        :return: The number of moves to reach the target and the index of the last cell
+            before the target (the target itself can be an obstacle, like a snake head).
+        """
+        grid = self.board.grid
+        if not target.in_bounds(self.board.size):
+            return None, None
+
+        index = grid.index(target)
+        if self.distances[index] != _UNREACHED:
+            return self.distances[index], self.parents[index]
+
+        # Of the reachable neighbors, prefer the closest to the snake, i.e. the
+        # side of the target that is facing the snake.
+        euclidean = grid.euclidean
+        head = grid.index(self.snake.head) * len(grid.cells)
+        best = None
+        best_key = None
+        for neighbor in grid.links[index]:
+            distance = self.distances[neighbor]
+            if distance != _UNREACHED:
+                key = (distance, euclidean[head + neighbor])
+                if best is None or key < best_key:
+                    best = neighbor
+                    best_key = key
+
+        if best is None:
+            return None, None
+
+        return self.distances[best] + 1, best
+
+    def distance(self, target: Point) -> int:
+        """
+        :return: The number of moves to get to the `target`, or None if it can't be reached.
+        """
+        return self._reach(target)[0]
+
+    def path(self, target: Point, max_moves: int = None) -> List[Point]:
+        """
+        :param target: The point to reach, which may be an obstacle next to a reachable cell.
+        :param max_moves: The maximum number of moves of the path.
+        :return: The points from the snake's head to the `target` (inclusive), empty
+            if the target can't be reached (in less than `max_moves`).
+        """
+        distance, last = self._reach(target)
+        if distance is None or (max_moves is not None and distance > max_moves):
+            return []
+
+        if distance == 0:
+            return [target]
+
+        cells = self.board.grid.cells
+        path = [target]
+        cell = last
+        while cell != _UNREACHED:
+            path.append(cells[cell])
+            cell = self.parents[cell]
+        path.reverse()
+
+        return path
+
+
+def _occupancy(
+    board: Board, snake: Snake, time_aware: bool, others_move: bool
+) -> Occupancy:
+    """
+    :return: The Occupancy of the board with the `snake` (which may be a future snake)
+        instead of the board snake with the same ID.
+    """
+    if (
+        time_aware
+        and others_move
+        and any(other is snake for other in board.snakes)
+    ):
+        return board.occupancy
+
+    snakes = [other for other in board.snakes if other != snake]
+    snakes.append(snake)
+
+    moving = [snake.id] if time_aware else []
+    if others_move:
+        moving.extend(other.id for other in snakes if other != snake)
+
+    return Occupancy(board.bitboard, snakes, moving)
+
+
+def distance_field(
+    board: Board, snake: Snake, time_aware: bool = False, others_move: bool = False
+) -> DistanceField:
+    """
+    :return: The DistanceField of the snake on the board, computed on the first request
+        for that board (i.e. once per turn).
+    """
+    board_fields = _fields.get(board)
+    if board_fields is None:
+        board_fields = _fields[board] = {}
+
+    key = (snake.id, time_aware, others_move)
+    field = board_fields.get(key)
+    if field is None or field.snake is not snake:
+        field = board_fields[key] = DistanceField(
+            board, snake, time_aware, others_move
+        )
+
+    return field
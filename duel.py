@@ -0,0 +1,390 @@
+"""
+Alpha-beta search of the moves of a 1v1 game (a duel), on a small simulator of the board.
+
+Both snakes move at the same time, which the search treats as paranoid: we move first and
+the opponent answers knowing our move, then both moves are applied together.
+"""
+
+import time
+
+from typing import List
+
+import log
+
+from anytime import DEADLINE_CHECK_NODES, Deadline, DeadlineExceeded
+from models import BitBoard, Board, Grid, Point
+from zobrist import TranspositionTable, ZobristKeys
+
+# The score of winning the game (less the number of moves to win, so sooner is better).
+WIN = 1000000
+
+# The weight of one more body segment than the opponent, against one more cell of territory.
+LENGTH_WEIGHT = 10
+
+# The deepest search (in moves of both snakes), unless the deadline comes first.
+DEFAULT_MAX_DEPTH = 64
+
+# The most best moves remembered (by state key) during a search.
+BEST_MOVES_SIZE = 1 << 16
+
+# The move of a snake without any move left on the board.
+_NO_MOVE = -1
+
+ME = 0
+OPPONENT = 1
+
+
+class DuelState:
+    """
+    The snakes of a duel, as the flat board indexes of their bodies (head first).
+    """
+
+    __slots__ = "bodies", "healths", "food", "key"
+
+    def __init__(self, bodies: tuple, healths: tuple, food: int, key: int):
+        self.bodies = bodies
+        self.healths = healths
+        # The `BitBoard` mask of the food
+        self.food = food
+        # The Zobrist key of the state
+        self.key = key
+
+    @staticmethod
+    def of(board: Board) -> "DuelState":
+        grid = board.grid
+        snakes = (board.me, board.others[0])
+        bodies = tuple(
+            tuple(grid.index(point) for point in snake.body) for snake in snakes
+        )
+        healths = tuple(snake.health for snake in snakes)
+        keys = ZobristKeys.of(board.size.x, board.size.y)
+        return DuelState(
+            bodies,
+            healths,
+            board.bitboard.food,
+            keys.state_key(bodies, healths, (grid.index(point) for point in board.food)),
+        )
+
+
+class DuelSearch:
+    """
+    Iterative deepening alpha-beta search of our best move against a single opponent,
+    which keeps the best move of the deepest search completed before the deadline.
+    """
+
+    def __init__(
+        self,
+        board: Board,
+        deadline: Deadline,
+        max_depth: int = None,
+        best_moves: TranspositionTable = None,
+    ):
+        """
+        :param board: The board of a game with exactly one opponent.
+        :param deadline: When to stop searching.
+        :param max_depth: The deepest search, `DEFAULT_MAX_DEPTH` by default.
+        :param best_moves: Our best move by state key, to try first (e.g. kept from the
+            search of the previous turn), a new table by default.
+        """
+        if len(board.others) != 1:
+            raise ValueError(
+                f"A duel is against one opponent, not {len(board.others)}."
+            )
+
+        self.board = board
+        self.deadline = deadline
+        self.max_depth = max_depth or DEFAULT_MAX_DEPTH
+        self.grid = Grid.of(board.size.x, board.size.y)
+        self.bits = BitBoard(board.size.x, board.size.y)
+        self.keys = ZobristKeys.of(board.size.x, board.size.y)
+        self.root = DuelState.of(board)
+        # State key => our best move there in the deepest search so far, to try it first.
+        self.best_moves = (
+            TranspositionTable(BEST_MOVES_SIZE) if best_moves is None else best_moves
+        )
+        self.inherited = len(self.best_moves)
+
+        self.depth = 0
+        self.nodes = 0
+        self.elapsed = 0
+        self.scores = {}
+        # (snake, cell) => number of cut-offs caused by moving there, to try those moves first.
+        self._history = {}
+
+    def stats(self) -> dict:
+        return {
+            "depth": self.depth,
+            "nodes": self.nodes,
+            "nodes_per_second": int(self.nodes / self.elapsed) if self.elapsed else 0,
+            "inherited": self.inherited,
+            "best_moves": self.best_moves.stats(),
+        }
+
+    def search(self, moves: List[Point] = None) -> Point:
+        """
+        :param moves: Our moves in the order to search them first, by default our valid moves.
+        :return: The best move of the deepest completed search, None if none was completed.
+        """
+        grid = self.grid
+        start = time.perf_counter()
+
+        if moves is None:
+            moves = list(self.board.valid_snake_moves(self.board.me))
+        order = [grid.index(move) for move in moves if move.in_bounds(self.board.size)]
+        if not order:
+            return None
+
+        best = None
+        try:
+            for depth in range(1, self.max_depth + 1):
+                if self.deadline.expired():
+                    break
+
+                scores = {}
+                alpha = -WIN * 2
+                for move in order:
+                    # Just under the best score so far, a move as good gets its exact score.
+                    score = self._min_value(
+                        self.root, move, depth, alpha - 1, WIN * 2, 0
+                    )
+                    scores[move] = score
+                    alpha = max(alpha, score)
+
+                # The best moves first for the next iteration (the sort keeps the ties in order).
+                order.sort(key=lambda cell: scores[cell], reverse=True)
+                best = grid.cells[order[0]]
+                self.depth = depth
+                self.scores = {grid.cells[cell]: scores[cell] for cell in order}
+
+                self.elapsed = time.perf_counter() - start
+                if log.enabled(log.VERBOSE):
+                    stats = self.stats()
+                    log.verbose(
+                        "Duel depth {}: {} of {} ({} nodes, {} nodes/s)",
+                        depth,
+                        best,
+                        self.scores,
+                        stats["nodes"],
+                        stats["nodes_per_second"],
+                    )
+
+                # Won or lost no matter what, looking deeper won't change it.
+                if abs(scores[order[0]]) > WIN - self.max_depth * 2:
+                    break
+
+        except DeadlineExceeded:
+            log.verbose("Duel deadline reached at depth {}", self.depth + 1)
+
+        self.elapsed = time.perf_counter() - start
+        return best
+
+    def _count_node(self):
+        self.nodes += 1
+        if self.nodes % DEADLINE_CHECK_NODES == 0 and self.deadline.expired():
+            raise DeadlineExceeded()
+
+    def _moves(self, state: DuelState, snake: int) -> List[int]:
+        """
+        :return: The board cells the snake can move to without hitting a body (as they will be
+            after the tails move), ordered by the cut-offs they caused, or a losing move if none.
+        """
+        occupied = 0
+        for body in state.bodies:
+            # The tail moves away, a stacked tail (i.e. the snake just ate) is also
+            # the segment before it so it stays.
+            for cell in body[:-1]:
+                occupied |= 1 << cell
+
+        head = state.bodies[snake][0]
+        moves = [cell for cell in self.grid.links[head] if not occupied & (1 << cell)]
+        if not moves:
+            return [self.grid.links[head][0] if self.grid.links[head] else _NO_MOVE]
+
+        history = self._history
+        moves.sort(key=lambda cell: history.get((snake, cell), 0), reverse=True)
+        return moves
+
+    def _min_value(
+        self,
+        state: DuelState,
+        my_move: int,
+        depth: int,
+        alpha: int,
+        beta: int,
+        ply: int,
+    ) -> int:
+        """
+        :return: The score of our move, for the opponent's best answer.
+        """
+        self._count_node()
+
+        value = WIN * 2
+        for their_move in self._moves(state, OPPONENT):
+            child, outcome = self._step(state, my_move, their_move)
+            if outcome is not None:
+                score = outcome * (WIN - ply)
+            elif depth <= 1:
+                score = self._evaluate(child)
+            else:
+                score = self._max_value(child, depth - 1, alpha, beta, ply + 1)
+
+            if score < value:
+                value = score
+            if value < beta:
+                beta = value
+            if alpha >= beta:
+                key = (OPPONENT, their_move)
+                self._history[key] = self._history.get(key, 0) + depth
+                break
+
+        return value
+
+    def _max_value(
+        self, state: DuelState, depth: int, alpha: int, beta: int, ply: int
+    ) -> int:
+        """
+        :return: The score of our best move.
+        """
+        self._count_node()
+
+        moves = self._moves(state, ME)
+        best_move = self.best_moves.get(state.key)
+        if best_move in moves and best_move != moves[0]:
+            moves.remove(best_move)
+            moves.insert(0, best_move)
+
+        value = -WIN * 2
+        for my_move in moves:
+            score = self._min_value(state, my_move, depth, alpha, beta, ply)
+            if score > value:
+                value = score
+                best_move = my_move
+            if value > alpha:
+                alpha = value
+            if alpha >= beta:
+                key = (ME, my_move)
+                self._history[key] = self._history.get(key, 0) + depth
+                break
+
+        self.best_moves.put(state.key, best_move, depth)
+        return value
+
+    def _step(self, state: DuelState, my_move: int, their_move: int) -> tuple:
+        """
+        Applies both moves at once, with the BattleSnake rules.
+        :return: The next state, and the outcome when the game is over (1 if we win,
+            -1 if we lose and 0 for a draw) or None otherwise.
+        """
+        food = state.food
+        key = state.key
+        bodies = []
+        healths = []
+        moves = (my_move, their_move)
+        for snake, move in enumerate(moves):
+            body = state.bodies[snake]
+            health = state.healths[snake]
+            ate = move != _NO_MOVE and food & (1 << move)
+            if move != _NO_MOVE:
+                key = self.keys.move(
+                    key, snake, body, move, health, 100 if ate else health - 1, ate
+                )
+
+            body = (move,) + body[:-1]
+            if ate:
+                # The new tail is stacked, so it stays for one more move.
+                bodies.append(body + (body[-1],))
+                healths.append(100)
+            else:
+                bodies.append(body)
+                healths.append(health - 1)
+
+        for body in bodies:
+            if body[0] != _NO_MOVE:
+                food &= ~(1 << body[0])
+
+        alive = [True, True]
+        for snake, body in enumerate(bodies):
+            head = body[0]
+            if head == _NO_MOVE or healths[snake] <= 0:
+                alive[snake] = False
+                continue
+            for other in bodies:
+                # A head is only deadly to another head (see below).
+                if head in other[1:]:
+                    alive[snake] = False
+                    break
+
+        # Head-to-head, the longest survives.
+        if bodies[ME][0] == bodies[OPPONENT][0]:
+            my_size = len(bodies[ME])
+            their_size = len(bodies[OPPONENT])
+            if my_size <= their_size:
+                alive[ME] = False
+            if their_size <= my_size:
+                alive[OPPONENT] = False
+
+        if alive[ME] and alive[OPPONENT]:
+            return DuelState(tuple(bodies), tuple(healths), food, key), None
+
+        if alive[ME]:
+            return None, 1
+        if alive[OPPONENT]:
+            return None, -1
+        return None, 0
+
+    def _evaluate(self, state: DuelState) -> int:
+        """
+        :return: How good the state is for us, the cells we get to first (a Voronoi split of the
+            board) and our length, compared to the opponent.
+        """
+        bits = self.bits
+        my_body, their_body = state.bodies
+
+        free = bits.full
+        for body in state.bodies:
+            for cell in body:
+                free &= ~(1 << cell)
+
+        my_size = len(my_body)
+        their_size = len(their_body)
+        my_area, their_area = split_areas(
+            bits, free, 1 << my_body[0], 1 << their_body[0], my_size - their_size
+        )
+
+        return (my_area - their_area) + (my_size - their_size) * LENGTH_WEIGHT
+
+
+def split_areas(
+    bits: BitBoard, free: int, my_heads: int, their_heads: int, size_difference: int
+) -> tuple:
+    """
+    Splits the free cells of a board between us and them, by who gets there first.
+    :param bits: The `BitBoard` of the board.
+    :param free: The mask of the cells that can be claimed.
+    :param my_heads: The mask of our head(s).
+    :param their_heads: The mask of their head(s).
+    :param size_difference: Our length less theirs, the longest snake wins the cells both
+        get to at the same time (or nobody when they are the same length).
+    :return: The number of cells we get, and the number of cells they get.
+    """
+    my_frontier = my_heads
+    their_frontier = their_heads
+    my_area = their_area = 0
+    while my_frontier or their_frontier:
+        my_frontier = bits.neighbors(my_frontier) & free
+        their_frontier = bits.neighbors(their_frontier) & free
+
+        both = my_frontier & their_frontier
+        if size_difference > 0:
+            their_frontier &= ~both
+        elif size_difference < 0:
+            my_frontier &= ~both
+        else:
+            my_frontier &= ~both
+            their_frontier &= ~both
+
+        free &= ~(my_frontier | their_frontier | both)
+        my_area += bin(my_frontier).count("1")
+        their_area += bin(their_frontier).count("1")
+
+    return my_area, their_area
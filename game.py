@@ -3,28 +3,125 @@ This is a simple Battlesnake server written in Python.
 For instructions see https://github.com/BattlesnakeOfficial/starter-snake-python/README.md
 """
 
+import heapq
 import itertools
-import json
 import random
+import time
 
-from pprint import pprint
-from typing import List
+from pprint import pformat
+from typing import Callable, List, Optional, Tuple
 
-from astar import find_path
-from models import Point, Move, Snake, Board, HeatMap
+import log
 
-# From trial and error, checking more than 12 moves takes more than 1 second to compute
-ASTAR_MOVE_LIMIT = 12
+from anytime import (
+    DEFAULT_NETWORK_MARGIN_MS,
+    Deadline,
+    DeadlineExceeded,
+    deepen,
+    fallback_move,
+)
+from astar import find_path
+from brs import BestReplySearch
+from decode import request_text
+from distance import distance_field
+from duel import DuelSearch
+from mcts import MonteCarloSearch
+from parallel import decode_board, map_moves
+from ponder import DEFAULT_PONDER_CPU_MS, DEFAULT_PONDER_MAX_GAMES, Ponderer
+from reachable import reachable_region
+from reuse import PathMemory, TurnMemory
+from territory import Territory, territory
+from models import Point, Move, Snake, Board, Grid, HeatMap
+
+
+# The ways of deciding a move:
+# - "heuristic": Every heuristic adds its heat to the moves, no matter how long it takes.
+# - "anytime": A safe move is known right away, then the heuristics (when they fit in the
+#   turn's deadline) and a deepening lookahead improve it until the deadline.
+# - "duel": Same as "anytime", but against a single opponent the lookahead is an alpha-beta
+#   search of both snakes' moves.
+# - "brs": Same as "duel", and against more opponents the lookahead is a best-reply search.
+# - "mcts": Same as "anytime", but the lookahead is a Monte Carlo tree search (in parallel
+#   processes) of the moves of every snake.
+MOVE_MODE_HEURISTIC = "heuristic"
+MOVE_MODE_ANYTIME = "anytime"
+MOVE_MODE_DUEL = "duel"
+MOVE_MODE_BRS = "brs"
+MOVE_MODE_MCTS = "mcts"
+
+MOVE_MODES = [
+    MOVE_MODE_HEURISTIC,
+    MOVE_MODE_ANYTIME,
+    MOVE_MODE_DUEL,
+    MOVE_MODE_BRS,
+    MOVE_MODE_MCTS,
+]
+
+# The move modes decided by the deadline of the move request
+DEADLINE_MOVE_MODES = [MOVE_MODE_ANYTIME, MOVE_MODE_DUEL, MOVE_MODE_BRS, MOVE_MODE_MCTS]
 
 
 class Game:
     def __init__(
-        self, data,
+        self,
+        data,
+        move_mode: str = MOVE_MODE_HEURISTIC,
+        network_margin_ms: int = DEFAULT_NETWORK_MARGIN_MS,
+        mcts_processes: int = None,
+        validate_updates: bool = False,
+        ponder: bool = False,
+        ponder_cpu_ms: int = DEFAULT_PONDER_CPU_MS,
+        ponder_max_games: int = DEFAULT_PONDER_MAX_GAMES,
+        move_processes: int = 1,
+        played_games: Callable[[], int] = None,
     ):
+        """
+        :param data: The game's start (or first move) request.
+        :param move_mode: One of the `MOVE_MODES` to decide every move.
+        :param network_margin_ms: The part of the request timeout kept for the response
+            to get back to the game engine, in the `DEADLINE_MOVE_MODES`.
+        :param mcts_processes: The number of processes of the "mcts" move mode, by default
+            one per CPU core.
+        :param validate_updates: Whether to check every board updated from the previous turn
+            against the board parsed in full (slower, to debug the updates).
+        :param ponder: Whether to analyze the likely next boards between move requests.
+        :param ponder_cpu_ms: The CPU time of the pondering between two move requests.
+        :param ponder_max_games: The most games played at once to keep pondering.
+        :param move_processes: The number of processes evaluating our candidate moves at
+            once (see `parallel`). With 1 they are evaluated in this process.
+        :param played_games: Counts the games played at once (e.g. by the server), for the
+            `ponder_max_games`, by default the games pondering.
+        """
+        if move_mode not in MOVE_MODES:
+            raise ValueError(f"Unknown move mode: {move_mode}")
+
+        self.move_mode = move_mode
+        self.network_margin_ms = network_margin_ms
+        self.mcts_processes = mcts_processes
+        self.validate_updates = validate_updates
+        self.move_processes = move_processes
+        # The board of the previous move, and its turn
+        self._board = None
+        self._board_turn = None
+        # What the previous turn computed
+        self._memory = TurnMemory()
+        # The longest time the heuristics took so far (in seconds)
+        self._heuristic_time = 0
         self._num_opponents = len(data["board"]["snakes"]) - 1
         self._my_id = data["you"]["id"]
         self.game_id = data["game"]["id"]
         self.turn = int(data["turn"])
+        self._ponderer = (
+            Ponderer(
+                self.game_id,
+                self.ponder_move,
+                ponder_cpu_ms,
+                ponder_max_games,
+                played_games,
+            )
+            if ponder
+            else None
+        )
         self.shout_words = [
             "Work it",
             "Make it",
@@ -50,25 +147,233 @@ class Game:
 
     def start(self, data):
         board = Board.parse(data)
-        print(
-            "Playing a game with:\n"
-            + "\n".join(" - {}".format(s.name) for s in board.snakes)
+        log.info(
+            "Playing a game with:\n{}",
+            "\n".join(" - {}".format(s.name) for s in board.snakes),
         )
 
-    def move(self, data):
-        board = Board.parse(data)
+    def move(self, data, deadline: Deadline = None):
+        """
+        :param data: The move request.
+        :param deadline: When the move must be decided by (in the `DEADLINE_MOVE_MODES`),
+            by default the request timeout less the network margin from now.
+        :return: The move response.
+        """
+        if self._ponderer:
+            # Nothing else may use the game's state meanwhile.
+            self._ponderer.stop()
+
+        board = self.update_board(data)
 
         possible_moves = list(board.valid_snake_moves(board.me))
 
         # print(f"{board}", "\nScore: {}".format(self.score(board)))
-        print(json.dumps(data))
+        if log.enabled(log.TRACE):
+            log.trace(request_text(data))
 
         # Start of snake choosing best move
-        print(f"Possible Moves: {possible_moves}")
-        print(f"Me: {board.me}")
-        print(f"Others ({len(board.others)}): {board.others}")
-        print(f"Food ({len(board.food)}): {board.food}")
+        if log.enabled(log.VERBOSE):
+            others = board.others
+            log.verbose("Possible Moves: {}", possible_moves)
+            log.verbose("Me: {}", board.me)
+            log.verbose("Others ({}): {}", len(others), others)
+            log.verbose("Food ({}): {}", len(board.food), board.food)
+
+        pondered = self._ponderer.lookup(board) if self._ponderer else None
+        if pondered and pondered[0] in possible_moves:
+            move_point, memory = pondered
+            self._memory.adopt(memory)
+            log.info("Pondered move: {} ({})", move_point, self._ponderer.stats())
+        elif self.move_mode in DEADLINE_MOVE_MODES:
+            if deadline is None:
+                deadline = Deadline.from_request(data, self.network_margin_ms)
+            move_point = self.anytime_move(board, possible_moves, deadline)
+        else:
+            self.add_heat(board, possible_moves)
+            move_point = self.preferred_moves(board, possible_moves, 1)[0]
+
+        log.verbose("Choosing the highest ranked: {}", move_point)
+
+        move_name = board.me.get_move_name(move_point)
+
+        next_shout = self.shout()
+        log.info(
+            "MOVE {}: {} ({}) shouted: {}", self.turn, move_name, move_point, next_shout
+        )
+
+        if self._ponderer and board.me:
+            self._ponderer.start(data, board, move_point)
+
+        return {"move": move_name, "shout": next_shout}
+
+    def ponder_move(
+        self, board: Board, deadline: Deadline
+    ) -> Optional[Tuple[Point, TurnMemory]]:
+        """
+        Decides the move of a likely board of the next turn, the same way as `move` (in a
+        single process) but without changing what this turn computed.
+
+        :return: The move decided for the board, and what was computed for it, None when
+            the heuristics didn't finish by the deadline.
+        """
+        possible_moves = list(board.valid_snake_moves(board.me))
+        memory = self._memory.speculate()
+        if self.move_mode in DEADLINE_MOVE_MODES:
+            move_point = self.anytime_move(
+                board,
+                possible_moves,
+                deadline,
+                memory,
+                mcts_processes=1,
+                move_processes=1,
+            )
+        else:
+            try:
+                self.add_heat(board, possible_moves, memory, 1, deadline)
+            except DeadlineExceeded:
+                return None
+            move_point = self.preferred_moves(board, possible_moves, 1)[0]
+
+        return move_point, memory
+
+    def update_board(self, data) -> Board:
+        """
+        :return: The board of the move request, updated from the previous turn's board
+            when there is one (otherwise parsed in full).
+        """
+        turn = int(data["turn"])
+        previous = self._board
+        if previous is None or self._board_turn != turn - 1:
+            board = Board.parse(data)
+            self._memory.clear()
+        else:
+            board, delta = previous.advance(data)
+            log.verbose("Board update: {}", delta)
+
+            if self.validate_updates:
+                differences = board.differences(Board.parse(data))
+                if differences:
+                    raise ValueError(
+                        f"The board updated for turn {turn} is not the parsed board: "
+                        + ", ".join(differences)
+                    )
+
+        # The occupancy is patched along for the next turn.
+        board.occupancy
+        self._board = board
+        self._board_turn = turn
+        self._memory.next_turn()
+        return board
+
+    def anytime_move(
+        self,
+        board: Board,
+        possible_moves: List[Point],
+        deadline: Deadline,
+        memory: TurnMemory = None,
+        mcts_processes: int = None,
+        move_processes: int = None,
+    ) -> Point:
+        """
+        :param memory: What the previous turn computed, the game's by default.
+        :param mcts_processes: The number of processes of the "mcts" move mode, the game's
+            by default.
+        :param move_processes: The number of processes evaluating the candidate moves, the
+            game's by default.
+        :return: The best move found by the `deadline`, starting from a safe move, then
+            the heuristics (if they took less than the remaining time so far) and finally
+            moves we can survive for the most moves.
+        """
+        memory = memory or self._memory
+        move_point = fallback_move(board)
+        log.verbose("Fallback move: {} ({})", move_point, deadline)
+
+        if not possible_moves:
+            return move_point
+
+        preferred_moves = [move_point] + [
+            move for move in possible_moves if move != move_point
+        ]
+        if self._heuristic_time < deadline.remaining():
+            start = time.perf_counter()
+            try:
+                self.add_heat(board, possible_moves, memory, move_processes, deadline)
+                preferred_moves = self.preferred_moves(board, possible_moves)
+                move_point = preferred_moves[0]
+            except DeadlineExceeded:
+                log.verbose("Abandoned the heuristics at the deadline")
+            self._heuristic_time = max(
+                self._heuristic_time, time.perf_counter() - start
+            )
+        else:
+            log.verbose(
+                "Skipping heuristics, they take {:0.3f} seconds", self._heuristic_time
+            )
 
+        search = None
+        if self.move_mode in (MOVE_MODE_DUEL, MOVE_MODE_BRS) and len(board.others) == 1:
+            search = DuelSearch(board, deadline, best_moves=memory.best_moves)
+        elif self.move_mode == MOVE_MODE_BRS and len(board.others) > 1:
+            search = BestReplySearch(board, deadline, best_moves=memory.best_moves)
+        elif self.move_mode == MOVE_MODE_MCTS:
+            search = MonteCarloSearch(
+                board,
+                deadline,
+                mcts_processes or self.mcts_processes,
+                prior=memory.mcts_tree,
+            )
+
+        if search:
+            search_move = search.search(preferred_moves)
+            stats = search.stats()
+            memory.inherited["search"] = stats["inherited"]
+            log.verbose("Search: {}", stats)
+            if isinstance(search, MonteCarloSearch):
+                memory.mcts_tree = search.subtree(search_move) if search_move else None
+            if search_move:
+                return search_move
+
+        for depth, surviving in deepen(board, preferred_moves, deadline):
+            surviving_moves = [move for move in preferred_moves if surviving[move]]
+            if surviving_moves:
+                move_point = surviving_moves[0]
+            log.verbose(
+                "Depth {}: {} of surviving {}", depth, move_point, surviving_moves
+            )
+
+        return move_point
+
+    def add_heat(
+        self,
+        board: Board,
+        possible_moves: List[Point],
+        memory: TurnMemory = None,
+        move_processes: int = None,
+        deadline: Deadline = None,
+    ):
+        """
+        Adds the heat of every heuristic to the board's HeatMap.
+
+        :param memory: What the previous turn computed, the game's by default.
+        :param move_processes: The number of processes evaluating the candidate moves, the
+            game's by default.
+        :param deadline: When to abandon the heuristics (checked between candidate moves
+            and heuristics), raising DeadlineExceeded with only part of the heat added. By
+            default they all run.
+        """
+        memory = memory or self._memory
+        move_processes = move_processes or self.move_processes
+
+        # Move => its `dead_end` and `territory_area`, when the candidate moves are
+        # evaluated at once.
+        evaluated = {}
+        areas = None
+        if move_processes > 1 and len(possible_moves) > 1:
+            results = map_moves(_evaluate_move, board, possible_moves, move_processes)
+            evaluated = {
+                move: result[0] for move, result in zip(possible_moves, results)
+            }
+            areas = {move: result[1] for move, result in zip(possible_moves, results)}
         if not board.others:
             # TODO: favor being in middle of map.
             starve_threshold = max(
@@ -88,31 +393,36 @@ class Game:
             for next_point in possible_moves:
                 # print(f"Check move: {next_point}")
 
+                _check_deadline(deadline)
                 if next_point in board.food:
                     add_heat_when_starving(
                         next_point, board, starving_health=starve_threshold
                     )
 
                 add_dead_end_heat(
-                    next_point, board.me, board,
+                    next_point, board.me, board, evaluated=evaluated.get(next_point)
                 )
 
         else:
             add_default_board_heat(board)
 
+            _check_deadline(deadline)
             add_forward_heat(board, possible_moves)
 
             move_counts = []
 
             for next_point in possible_moves:
-                print(f"Check move: {next_point}")
+                log.trace("Check move: {}", next_point)
+                _check_deadline(deadline)
 
                 if next_point in board.food:
                     add_heat_when_starving(next_point, board)
 
                 # my_future = board.me.move_toward(next_point, next_point in board.food)
 
-                max_future_move_cnt = add_dead_end_heat(next_point, board.me, board)
+                max_future_move_cnt = add_dead_end_heat(
+                    next_point, board.me, board, evaluated=evaluated.get(next_point)
+                )
 
                 move_counts.append((next_point, max_future_move_cnt))
 
@@ -120,8 +430,13 @@ class Game:
                 add_move_count_heat(move_counts, board)
 
             if possible_moves:
+                _check_deadline(deadline)
                 add_heat_for_self_distance(possible_moves, board)
 
+                add_territory_heat(possible_moves, board, areas)
+
+                _check_deadline(deadline)
+
                 # Check to see if we're closer to weaker snakes, unless there's only one.
                 roughly_third_board = int((board.size.x * board.size.y) / 3) + 1
                 weaker_snake_range = (
@@ -134,6 +449,7 @@ class Game:
                     board=board,
                     max_moves=weaker_snake_range,
                     alternate_limit=3,
+                    paths=memory.paths,
                 )
 
                 # Consider stronger snakes that are less than half the board (in moves) away
@@ -143,8 +459,13 @@ class Game:
                     max_moves=9,
                     alternate_limit=1,
                     move_snakes=True,
+                    paths=memory.paths,
                 )
+                memory.inherited["paths"] = memory.paths.inherited
+                if log.enabled(log.VERBOSE):
+                    log.verbose("Paths: {}", memory.paths.stats())
 
+                _check_deadline(deadline)
                 add_future_kill_heat(
                     possible_moves, board, stronger_snakes, weakest_snakes
                 )
@@ -154,10 +475,12 @@ class Game:
                 if stronger_snakes or not weakest_snakes:
                     add_most_dangerous_move_heat(board, stronger_snakes)
 
+                    _check_deadline(deadline)
                     add_chase_tail_defense(
                         board, sorted_stronger_snakes=stronger_snakes
                     )
 
+                    _check_deadline(deadline)
                     food_paths = find_paths_to_food(
                         board, max_moves=7, alternate_limit=0
                     )
@@ -168,54 +491,68 @@ class Game:
                 # print("Heat Map: ")
                 # pprint(board.heat.map)
 
+    def preferred_moves(
+        self, board: Board, possible_moves: List[Point], count: int = None
+    ) -> List[Point]:
+        """
+        :param count: The number of moves to return, all by default.
+        :return: The moves with the best "goodness heat" first (in the order of the
+            `possible_moves` when as good).
+        """
         if not possible_moves:
             possible_moves = [random.choice(Move.all_move_points(board.me.head))]
-            print(f"Ahhhh! : {possible_moves}")
+            log.info("Ahhhh! : {}", possible_moves)
 
-        # Sort the best moves first (according to "goodness heat")
-        preferred_moves = sorted(
-            possible_moves, key=lambda point: board.heat.goodness(point), reverse=True,
+        # The best moves first (according to "goodness heat")
+        preferred_moves = heapq.nlargest(
+            count or len(possible_moves), possible_moves, key=board.heat.goodness
         )
 
-        print(f"Preferred Moves:")
-        for move in preferred_moves:
-            if move in board.heat.map:
-                print(
-                    "  {0} ({1}): {2} => {3}".format(
+        if log.enabled(log.VERBOSE):
+            log.verbose("Preferred Moves:")
+            for move in heapq.nlargest(
+                len(possible_moves), possible_moves, key=board.heat.goodness
+            ):
+                if move in board.heat.map:
+                    log.verbose(
+                        "  {0} ({1}): {2} => {3}",
                         move,
                         board.me.get_move_name(move),
                         board.heat.goodness(move),
                         board.heat.map[move],
                     )
-                )
-            else:
-                print(
-                    "  {0} ({1}): {2}".format(
-                        move, board.me.get_move_name(move), board.heat.goodness(move),
+                else:
+                    log.verbose(
+                        "  {0} ({1}): {2}",
+                        move,
+                        board.me.get_move_name(move),
+                        board.heat.goodness(move),
                     )
-                )
 
-        move_point = preferred_moves[0]
-        print(f"Choosing the highest ranked: {move_point}")
-
-        move_name = board.me.get_move_name(move_point)
-
-        next_shout = self.shout()
-        print(f"MOVE {self.turn}: {move_name} ({move_point}) shouted: {next_shout}")
-        return {"move": move_name, "shout": next_shout}
+        return preferred_moves
 
     def end(self, data):
+        self.close()
+
         if any(s["id"] == self.my_id for s in data["board"]["snakes"]):
-            print("{:!^50}".format("WINNER"))
+            log.info("{:!^50}", "WINNER")
         else:
-            print("{:.^50}".format("Loser"))
-        print("ending state:")
-        pprint(data)
-        final_board = Board.parse(data)
-        print(final_board, "\nScore: {}".format(self.score(final_board)))
+            log.info("{:.^50}", "Loser")
+        if log.enabled(log.VERBOSE):
+            log.verbose("ending state:\n{}", pformat(data))
+            final_board = Board.parse(data)
+            log.verbose("{} \nScore: {}", final_board, self.score(final_board))
 
         return "ok"
 
+    def close(self):
+        """
+        Stops what the game keeps doing between its turns (e.g. the pondering), once it
+        ended or it's dropped.
+        """
+        if self._ponderer:
+            self._ponderer.close()
+
     def score(self, board: Board):
         score = 0
         # dead snake = bad
@@ -234,20 +571,15 @@ class Game:
 
 
 def find_paths_to_food(board: Board, max_moves: int = 7, alternate_limit: int = 3):
+    """
+    :param alternate_limit: Not used, the paths come from the turn's `DistanceField` which are
+        always the shortest paths.
+    """
+    field = distance_field(board, board.me)
     return [
-        (snake, path)
-        for snake, path in [
-            (
-                food,
-                find_path(
-                    board.me,
-                    food,
-                    board,
-                    max_moves=max_moves,
-                    alternate_limit=alternate_limit,
-                ),
-            )
-            for food in board.food
+        (food, path)
+        for food, path in [
+            (food, field.path(food, max_moves=max_moves)) for food in board.food
         ]
         if path
     ]
@@ -259,27 +591,31 @@ def find_paths_from_snakes(
     max_moves: int = 7,
     alternate_limit: int = 0,
     move_snakes: bool = False,
+    paths: PathMemory = None,
 ):
-    print(f"Find path in < {max_moves} from each {snakes} to {board.me}")
-
-    paths_to_snake = [
-        (snake, path)
-        for snake, path in [
-            (
-                snake,
-                find_path(
-                    snake,
-                    board.me.head,
-                    board,
-                    max_moves=max_moves,
-                    alternate_limit=alternate_limit,
-                    move_snake=move_snakes,
-                ),
+    """
+    :param alternate_limit: Not used, the paths come from the turn's `DistanceField` which are
+        always the shortest paths.
+    :param move_snakes: Whether snake bodies free up as the snakes move (i.e. a time aware `DistanceField`).
+    :param paths: The paths of the previous turn, to reuse the ones that are still shortest.
+    """
+    log.verbose("Find path in < {} from each {} to {}", max_moves, snakes, board.me)
+
+    paths_to_snake = []
+    for snake in snakes:
+        path = None
+        if paths:
+            path = paths.inherit(
+                board, snake, board.me.head, time_aware=move_snakes, max_moves=max_moves
             )
-            for snake in snakes
-        ]
-        if path
-    ]
+        if path is None:
+            path = distance_field(board, snake, time_aware=move_snakes).path(
+                board.me.head, max_moves=max_moves
+            )
+            if paths and path:
+                paths.remember(snake, move_snakes, path)
+        if path:
+            paths_to_snake.append((snake, path))
 
     return sorted(paths_to_snake, key=lambda x: len(x[1]))
 
@@ -301,18 +637,25 @@ def add_forward_heat(board: Board, possible_moves: List[Point]):
         board.heat.add(direction_point, HeatMap.HEAT_FORWARD)
 
 
-def sort_by_distance(origin: Point, sortable: List[Point]) -> List[Point]:
-    return sorted(sortable, key=lambda point: origin.distance(point))
+def sort_by_distance(
+    origin: Point, sortable: List[Point], grid: Grid = None
+) -> List[Point]:
+    """
+    :param grid: The geometry of the board, to read the distances from.
+    """
+    distance = grid.distance if grid else Point.distance
+    return sorted(sortable, key=lambda point: distance(origin, point))
 
 
 def sort_move_points_by_distance(
-    move_options: List[Point], destination_options: List[Point]
+    move_options: List[Point], destination_options: List[Point], grid: Grid = None
 ):
     """
     Sorts the `move_options` according to how far they are from the closest
     `destination_options` (closest to farthest) and sorts the destinations by distance from the origin.
     :param move_options:
     :param destination_options:
+    :param grid: The geometry of the board, to read the distances from.
     :return: A sorted list of `move_options` to the closest destination.
     """
 
@@ -320,23 +663,25 @@ def sort_move_points_by_distance(
     if not destination_options:
         return move_options
 
+    distance = grid.distance if grid else Point.distance
     move_dist = {}
     for move in move_options:
         move_dist[move] = sum(
-            [move.distance(dest) for dest in destination_options]
+            [distance(move, dest) for dest in destination_options]
         ) / len(destination_options)
 
     return sorted(move_options, key=lambda sort_move: move_dist[sort_move])
 
 
 def sort_move_points_by_distance_enriched(
-    move_options: List[Point], destination_options: List[Point]
+    move_options: List[Point], destination_options: List[Point], grid: Grid = None
 ):
     """
     Sorts the `move_options` according to how far they are from the closest
     `destination_options` (closest to farthest) and sorts the destinations by distance from the origin.
     :param move_options:
     :param destination_options:
+    :param grid: The geometry of the board, to read the distances from.
     :return: A sorted list of tuples for "move" and it's average distance
         to the destinations.
     """
@@ -345,8 +690,10 @@ def sort_move_points_by_distance_enriched(
     if not destination_options:
         return [(move, 0) for move in move_options]
 
+    distance = grid.distance if grid else Point.distance
+
     def point_distance(point: Point):
-        return sum([point.distance(dest) for dest in destination_options]) / len(
+        return sum([distance(point, dest) for dest in destination_options]) / len(
             destination_options
         )
 
@@ -356,57 +703,93 @@ def sort_move_points_by_distance_enriched(
     )
 
 
-def sort_by_head_distance(reference: Point, sortable: List[Snake]) -> List[Snake]:
-    return sorted(sortable, key=lambda snake: reference.distance(snake.head))
+def sort_by_head_distance(
+    reference: Point, sortable: List[Snake], grid: Grid = None
+) -> List[Snake]:
+    """
+    :param grid: The geometry of the board, to read the distances from.
+    """
+    distance = grid.distance if grid else Point.distance
+    return sorted(sortable, key=lambda snake: distance(reference, snake.head))
 
 
 def sort_by_size(sortable: List[Snake]) -> List[Snake]:
     return sorted(sortable, key=lambda snake: snake.size)
 
 
-def add_dead_end_heat(
-    move: Point, snake: Snake, board: Board, add_heat: bool = True,
-) -> int:
-
-    moves_to_end = find_path(
-        snake=snake.move_toward(move),
-        goal=snake.tail,
-        board=board,
-        max_moves=min(snake.size + 2, board.size.x + board.size.y, ASTAR_MOVE_LIMIT),
-        move_snake=False,
-        return_closest=True,
-    )
+def dead_end(move: Point, snake: Snake, board: Board) -> Tuple[bool, int]:
+    """
+    :return: Whether the move leads to a dead-end, and the size of the region reachable
+        after it (up to a bit more than the snake's size).
+    """
+    bits = board.bitboard
 
-    # print("Moves to tail: ", moves_to_end)
+    region = reachable_region(board, snake, move, limit=snake.size + 2)
 
-    could_be_blocked = False
-    moving_snake = snake
-    for pos, path_move in enumerate(moves_to_end):
-        moving_snake = moving_snake.move_toward(path_move)
-        # print("Moving snake: ", moving_snake)
+    # The space left if the other snakes move in our way (after our first couple of moves).
+    other_moves = 0
+    for other in board.snakes:
+        if other != snake:
+            other_moves |= board.valid_moves_mask(other)
+    other_moves &= ~bits.neighbors(bits.bit(move)) & ~bits.bit(move)
 
-        if pos > 1 and board.heat.has_heat(path_move, HeatMap.HEAT_SNAKEFUTURE_MARKER):
-            # print("Could be blocked at: ", path_move)
-            could_be_blocked = True
-            break
+    blocked_region = region
+    if other_moves & region.mask:
+        blocked_region = reachable_region(
+            board, snake, move, limit=snake.size + 2, blocked=other_moves
+        )
 
-        elif len(list(board.valid_snake_moves(moving_snake))) > 1:
-            # print("Multiple options at: ", path_move, " Moves: ", list(board.valid_snake_moves(moving_snake)))
-            break
+    # print("Regions: ", region, blocked_region)
 
-    if (
-        # If there are no moves at all, it's a dead-end
-        not moves_to_end
-        # If we can't reach our size, there's a good chance we can't fit.
-        # TODO:  There's a chance we might eat food, this should be accounted for.
-        or (len(moves_to_end) <= snake.size and moves_to_end[-1] != snake.tail)
+    is_dead_end = (
+        # If we can't fit in the space, and we can't follow our tail out of it, or
+        # wait for the space to open up (we can't count on being next to where it opens,
+        # so give it half the space), it's a dead-end.
+        (
+            region.size < snake.size
+            and not region.has_tail
+            and region.escape_time > region.size // 2
+        )
         # If there's a chance we'll get blocked off by another snake (stronger or weaker)
         # after this move, then we would be blocked in.
-        or (len(moves_to_end) > 3 and could_be_blocked)
-    ) and add_heat:
+        or (blocked_region.size < snake.size and not blocked_region.has_tail)
+    )
+
+    return is_dead_end, region.size
+
+
+def add_dead_end_heat(
+    move: Point,
+    snake: Snake,
+    board: Board,
+    add_heat: bool = True,
+    evaluated: Tuple[bool, int] = None,
+) -> int:
+    """
+    :param evaluated: The `dead_end` of the move, when already evaluated.
+    :return: The size of the region reachable after the move.
+    """
+    is_dead_end, region_size = evaluated or dead_end(move, snake, board)
+    if is_dead_end and add_heat:
         board.heat.add(move, HeatMap.HEAT_DEADEND)
 
-    return len(moves_to_end)
+    return region_size
+
+
+def _check_deadline(deadline: Optional[Deadline]):
+    if deadline is not None and deadline.expired():
+        raise DeadlineExceeded()
+
+
+def _evaluate_move(encoded_board: tuple, move_index: int) -> tuple:
+    """
+    The `dead_end` and the `territory_area` (when there are other snakes) of one of our
+    candidate moves, in a process of the `parallel` pool.
+    """
+    board = decode_board(encoded_board)
+    move = board.grid.cells[move_index]
+    area = territory_area(move, board) if board.others else None
+    return dead_end(move, board.me, board), area
 
 
 def is_closest_strongest_snake(
@@ -431,8 +814,8 @@ def is_closest_strongest_snake(
         max_competition = len(other_snakes)
 
     if not check_snake_path:
-        check_snake_path = find_path(
-            check_snake, target, max_moves=max_opponent_moves, board=board
+        check_snake_path = distance_field(board, check_snake).path(
+            target, max_moves=max_opponent_moves
         )
 
     if not check_snake_path:
@@ -443,12 +826,7 @@ def is_closest_strongest_snake(
         [
             (snake, path)
             for snake, path in [
-                (
-                    snake,
-                    find_path(
-                        snake=snake, goal=target, board=board, max_moves=min_buffer,
-                    ),
-                )
+                (snake, distance_field(board, snake).path(target, max_moves=min_buffer))
                 for snake in other_snakes
             ]
             if path
@@ -512,9 +890,9 @@ def is_closest_strongest_snake(
 
 
 def add_most_dangerous_move_heat(board: Board, sorted_stronger_snakes: List[tuple]):
-    print("Stronger snakes to check for threat: ", sorted_stronger_snakes)
+    log.verbose("Stronger snakes to check for threat:  {}", sorted_stronger_snakes)
     possible_moves = list(board.valid_snake_moves(board.me))
-    print("Possible dangerous moves: ", possible_moves)
+    log.verbose("Possible dangerous moves:  {}", possible_moves)
 
     # If there are no snakes close enough to use, just exit.
     if not sorted_stronger_snakes or not possible_moves:
@@ -530,9 +908,7 @@ def add_most_dangerous_move_heat(board: Board, sorted_stronger_snakes: List[tupl
 
         # print("Adding danger for: ", snake, " with path ", path)
 
-        top_dangerous_move = sorted(
-            possible_moves, key=lambda x: x.distance(snake.head)
-        )[0]
+        top_dangerous_move = sort_by_distance(snake.head, possible_moves, board.grid)[0]
 
         if board.on_edge(board.me.head):
             if top_dangerous_move in path:
@@ -566,13 +942,14 @@ def add_heat_for_self_distance(possible_moves: List[Point], board: Board):
     When we're already on the edge, there is no bonus for this.
     """
     if board.me.size > 2:
+        distance = board.grid.distance
         # if not board.on_edge(board.me.head):
         farthest_from_self = sorted(
             possible_moves,
             # TODO: Giving space for yourself is often good to make sure you have options
             #  Calculating it generically needs work.
             key=lambda point: min(
-                point.distance(body_point) for body_point in board.me.body
+                distance(point, body_point) for body_point in board.me.body
             ),
             # key=lambda point: sum(
             #     point.distance(body_point) for body_point in board.me.body
@@ -582,18 +959,48 @@ def add_heat_for_self_distance(possible_moves: List[Point], board: Board):
         board.heat.add(farthest_from_self[-1], HeatMap.HEAT_FARTHEST_FROM_SELF)
 
 
+def add_territory_heat(possible_moves: List[Point], board: Board, areas: dict = None):
+    """
+    Favor the move that gives us the largest territory, i.e. the most cells we would get to
+    before any other snake.
+
+    :param areas: Move => its `territory_area`, when already evaluated.
+    """
+    move_areas = []
+    for move in possible_moves:
+        area = areas[move] if areas else territory_area(move, board)
+        move_areas.append((move, area))
+
+    move_areas.sort(key=lambda move_area: move_area[1], reverse=True)
+    log.verbose("Territory: {}", move_areas)
+
+    # Only when there's a single best move
+    if len(move_areas) == 1 or move_areas[0][1] > move_areas[1][1]:
+        board.heat.add(move_areas[0][0], HeatMap.HEAT_MOST_TERRITORY)
+
+
+def territory_area(move: Point, board: Board) -> int:
+    """
+    :return: The number of cells we would get to before any other snake after the move.
+    """
+    my_future = board.me.move_toward(move, move in board.food)
+    return Territory(board, [my_future] + board.others).area(my_future)
+
+
 def add_future_kill_heat(
     possible_moves: List[Point],
     board: Board,
     sorted_stronger_snakes: List[tuple],
     sorted_weakest_snakes: List[tuple],
 ):
-    print("Checking weaker snakes for kill: ", sorted_weakest_snakes)
-    print(
-        "Consider stronger snakes to kill or abort attack on weaker: ",
+    log.verbose("Checking weaker snakes for kill:  {}", sorted_weakest_snakes)
+    log.verbose(
+        "Consider stronger snakes to kill or abort attack on weaker:  {}",
         sorted_stronger_snakes,
     )
 
+    grid = board.grid
+
     # Identify some blocking moves against a stronger snake, but only if we have more than
     # one option.
     if board.others and len(possible_moves) > 1:
@@ -624,7 +1031,7 @@ def add_future_kill_heat(
             and Move.are_opposite(move, next_possible_moves[0], next_possible_moves[1])
         ]
 
-        print("Candidate blocking moves: ", candidate_blocks)
+        log.verbose("Candidate blocking moves:  {}", candidate_blocks)
 
         if candidate_blocks:
             all_snakes_sorted = sorted(
@@ -647,20 +1054,22 @@ def add_future_kill_heat(
                 ):
                     break
 
-                block_move = sorted(
-                    candidate_blocks, key=lambda x: x.distance(snake.head)
-                )[0]
+                block_move = sort_by_distance(snake.head, candidate_blocks, grid)[0]
 
                 # This final check makes sure we're not blocking in an opposite
                 # direction from where the other snake is coming from.
-                if board.me.head.distance(snake.head) > block_move.distance(snake.head):
-                    print(f"Open space block move kill at {block_move} of {snake}")
+                if grid.distance(board.me.head, snake.head) > grid.distance(
+                    block_move, snake.head
+                ):
+                    log.verbose(
+                        "Open space block move kill at {} of {}", block_move, snake
+                    )
                     board.heat.add(block_move, HeatMap.HEAT_SNAKEFUTURE_KILL_BLOCK)
 
     if sorted_weakest_snakes:
         # If we're the strongest outright
         if len(board.weaker_snakes(board.me)) == len(board.others):
-            print("We are the strongest snake, being more agressive...")
+            log.verbose("We are the strongest snake, being more agressive...")
             for weak_rank, (snake, path) in enumerate(sorted_weakest_snakes):
                 weak_kill_move = path[-2]
 
@@ -770,25 +1179,15 @@ def add_default_board_heat(board: Board):
                 board.heat.add(food, HeatMap.HEAT_FOOD_CLUSTER)
 
     bottom_left_corner = Point(0, 0)
+    grid = board.grid
 
     # The corners are dangerous
-    board.heat.add(bottom_left_corner, HeatMap.HEAT_BOARD_CORNER)
-    board.heat.add(
-        Point(bottom_left_corner.x, board.size.y - 1), HeatMap.HEAT_BOARD_CORNER
-    )
-    board.heat.add(
-        Point(board.size.x - 1, bottom_left_corner.y), HeatMap.HEAT_BOARD_CORNER
-    )
-    board.heat.add(Point(board.size.x - 1, board.size.y - 1), HeatMap.HEAT_BOARD_CORNER)
+    for corner in board.bitboard.points(grid.corners):
+        board.heat.add(corner, HeatMap.HEAT_BOARD_CORNER)
 
     # The edges are somewhat dangerous
-    for vertical in range(bottom_left_corner.y, board.size.y):
-        board.heat.add(Point(board.size.x - 1, vertical), HeatMap.HEAT_BOARD_EDGE)
-        board.heat.add(Point(bottom_left_corner.x, vertical), HeatMap.HEAT_BOARD_EDGE)
-
-    for horizontal in range(bottom_left_corner.x, board.size.x):
-        board.heat.add(Point(horizontal, board.size.y - 1), HeatMap.HEAT_BOARD_EDGE)
-        board.heat.add(Point(horizontal, bottom_left_corner.y), HeatMap.HEAT_BOARD_EDGE)
+    for edge in board.bitboard.points(grid.edge(1)):
+        board.heat.add(edge, HeatMap.HEAT_BOARD_EDGE)
 
     # The out of bounds is death are somewhat dangerous (this is probably overkill..)
     for vertical in range(bottom_left_corner.y - 1, board.size.y + 1):
@@ -839,7 +1238,7 @@ def add_chase_tail_defense(
         elif (
             len(board.others) == 1
             and board.me.size < board.others[0].size
-            and 2 <= board.me.head.distance(board.others[0].head) <= 5
+            and 2 <= board.grid.distance(board.me.head, board.others[0].head) <= 5
         ):
             board.heat.add(tail_move, HeatMap.HEAT_CHASE_TAIL_URGENT)
 
@@ -867,7 +1266,7 @@ def add_extra_food_heat(food_paths: tuple, board: Board, sorted_stronger_snakes:
         )
     )
 
-    print("Check food: ", closest_food)
+    log.verbose("Check food:  {}", closest_food)
 
     food_chosen = 0
     for pos, (food, path) in enumerate(closest_food):
@@ -885,26 +1284,44 @@ def add_extra_food_heat(food_paths: tuple, board: Board, sorted_stronger_snakes:
         if sorted_stronger_snakes and move_towards_food not in stronger_paths:
             add_heat_when_starving(move_towards_food, board)
 
-        # Make sure we're the closest, strongest, snake (max 1 competitor)
-        is_closest = is_closest_strongest_snake(
-            target=food,
-            check_snake=board.me,
-            board=board,
-            max_competition=1,
-            check_snake_path=path,
-            max_opponent_moves=5,
-        )
+        # A snake at least as strong as us that gets there first wins the food.
+        food_owner = territory(board).owner_of(food)
+        if (
+            food_owner is not None
+            and food_owner is not board.me
+            and food_owner.size >= board.me.size
+        ):
+            is_closest = False
+        else:
+            # Make sure we're the closest, strongest, snake (max 1 competitor)
+            is_closest = is_closest_strongest_snake(
+                target=food,
+                check_snake=board.me,
+                board=board,
+                max_competition=1,
+                check_snake_path=path,
+                max_opponent_moves=5,
+            )
 
-        print(f"Is {board.me.head} closest ({is_closest}) to {food} of: {board.others}")
+        if log.enabled(log.VERBOSE):
+            log.verbose(
+                "Is {} closest ({}) to {} of: {}",
+                board.me.head,
+                is_closest,
+                food,
+                board.others,
+            )
         if is_closest:
             food_chosen += 1
-            print(f"Adding good heat for food: {move_towards_food}")
+            log.verbose("Adding good heat for food: {}", move_towards_food)
             board.heat.add(move_towards_food, HeatMap.HEAT_FUTURE_FOOD)
 
             if sorted_stronger_snakes and move_towards_food not in stronger_paths:
                 board.heat.add(move_towards_food, HeatMap.HEAT_FOOD_WHEN_WEAK)
 
         # If we're not the strongest and closest, treat that point as dangerous
-        # Negates the default goodness of food.
-        else:
+        # Negates the default goodness of food, unless that move also leads
+        # to a closer food that we already chose (the closer food is worth the
+        # move, whoever gets the farther one).
+        elif not board.heat.has_heat(move_towards_food, HeatMap.HEAT_FUTURE_FOOD):
             board.heat.add(move_towards_food, HeatMap.HEAT_FUTURE_FOOD_FIGHT)
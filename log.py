@@ -0,0 +1,130 @@
+"""
+Leveled logging, written out by a background thread.
+
+A message is only formatted (with `str.format` and its arguments) when its level is
+enabled, then it's queued for the writer thread to print: the turn doesn't wait for the
+output. At the "quiet" level, a log call costs a comparison of two integers.
+
+    log.verbose("Possible Moves: {}", possible_moves)
+
+Guard what is expensive to compute even before formatting with `enabled`.
+"""
+
+import atexit
+import queue
+import sys
+import threading
+
+from typing import Union
+
+# The levels, each one also logs the messages of the levels before it:
+# - "quiet": Only the errors.
+# - "info": A line or two per turn (e.g. the move and how long it took).
+# - "verbose": What the heuristics and searches found on every turn.
+# - "trace": Everything, e.g. every request and every path search.
+QUIET = 0
+INFO = 1
+VERBOSE = 2
+TRACE = 3
+
+LEVELS = {"quiet": QUIET, "info": INFO, "verbose": VERBOSE, "trace": TRACE}
+
+DEFAULT_LEVEL = INFO
+
+_level = DEFAULT_LEVEL
+# The messages left to write, or the events to set once written up to there.
+_queue = queue.SimpleQueue()
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def set_level(level: Union[int, str]):
+    """
+    :param level: One of the levels, or its name in `LEVELS`.
+    """
+    global _level
+    if isinstance(level, str):
+        if level not in LEVELS:
+            raise ValueError(f"Unknown log level: {level}")
+        level = LEVELS[level]
+    _level = level
+
+
+def get_level() -> int:
+    return _level
+
+
+def enabled(level: int) -> bool:
+    return level <= _level
+
+
+def error(message, *args):
+    _write(message, args)
+
+
+def info(message, *args):
+    if _level >= INFO:
+        _write(message, args)
+
+
+def verbose(message, *args):
+    if _level >= VERBOSE:
+        _write(message, args)
+
+
+def trace(message, *args):
+    if _level >= TRACE:
+        _write(message, args)
+
+
+def flush(timeout: float = None) -> bool:
+    """
+    Waits for the messages logged so far to be written.
+
+    :return: Whether they were written within the `timeout`.
+    """
+    if _writer is None:
+        return True
+    written = threading.Event()
+    _queue.put(written)
+    return written.wait(timeout)
+
+
+def _write(message, args: tuple):
+    # Formatted now, the arguments may change once the turn goes on.
+    if args:
+        message = message.format(*args)
+    elif not isinstance(message, str):
+        message = str(message)
+
+    if _writer is None:
+        _start_writer()
+    _queue.put(message)
+
+
+def _start_writer():
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            thread = threading.Thread(target=_write_messages, name="log", daemon=True)
+            thread.start()
+            _writer = thread
+
+
+def _write_messages():
+    while True:
+        message = _queue.get()
+        if isinstance(message, threading.Event):
+            sys.stdout.flush()
+            message.set()
+            continue
+
+        try:
+            # The current output (it may be replaced, e.g. by tests).
+            sys.stdout.write(message + "\n")
+        except Exception:
+            # A closed output doesn't stop the writer (nor the waits for it).
+            pass
+
+
+atexit.register(flush, 1)
@@ -0,0 +1,491 @@
+"""
+Monte Carlo tree search (MCTS) of our moves, with random (or heavy) playouts of every snake.
+
+The tree only branches on our moves (UCT selection), the opponent moves are sampled at every
+step. The search is root parallel: every process of a pool grows its own tree until the
+deadline, then the visits of our first moves are added up.
+"""
+
+import math
+import multiprocessing
+import os
+import random
+import threading
+import time
+
+from typing import List
+
+import log
+
+from anytime import Deadline
+from models import Board, Grid, Point
+
+# Completely random moves (that don't hit a body) in the playouts.
+ROLLOUT_RANDOM = "random"
+
+# Moves towards more space, away from the heads of longer snakes in the playouts.
+ROLLOUT_HEAVY = "heavy"
+
+ROLLOUTS = [ROLLOUT_RANDOM, ROLLOUT_HEAVY]
+
+# The exploration constant of the UCT selection.
+EXPLORATION = math.sqrt(2)
+
+# The number of moves of a playout, after which we count as alive.
+DEFAULT_ROLLOUT_DEPTH = 20
+
+# The levels of the trees (below the root) sent back from the pool processes, and kept
+# for the next turn.
+KEEP_DEPTH = 3
+
+# The time kept to send the trees back from the pool processes (seconds).
+POOL_MARGIN = 0.02
+
+# The move of a snake without any move left on the board.
+_NO_MOVE = -1
+
+ME = 0
+
+# The pool processes are started from a server process, not forked from this one (which
+# runs threads, e.g. the log writer and the pondering).
+_CONTEXT = multiprocessing.get_context(
+    "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+)
+
+_pool = None
+_pool_processes = 0
+_pool_lock = threading.Lock()
+
+
+class MctsNode:
+    """
+    Our move in the tree, with the total reward of the playouts that went through it.
+    """
+
+    __slots__ = "children", "visits", "reward"
+
+    def __init__(self):
+        # Board cell of our move => MctsNode
+        self.children = {}
+        self.visits = 0
+        self.reward = 0.0
+
+    def copy(self, depth: int) -> "MctsNode":
+        """
+        :return: A copy of the tree, down to `depth` levels below this node.
+        """
+        node = MctsNode()
+        node.visits = self.visits
+        node.reward = self.reward
+        if depth > 0:
+            node.children = {
+                move: child.copy(depth - 1) for move, child in self.children.items()
+            }
+        return node
+
+    def merge(self, other: "MctsNode", weight: int = 1):
+        """
+        Adds the visits and rewards of the `other` tree (`weight` times) to this tree.
+        """
+        self.visits += other.visits * weight
+        self.reward += other.reward * weight
+        for move, other_child in other.children.items():
+            child = self.children.get(move)
+            if child is None:
+                child = self.children[move] = MctsNode()
+            child.merge(other_child, weight)
+
+    def size(self) -> int:
+        return 1 + sum(child.size() for child in self.children.values())
+
+    def select(self, moves: List[int]) -> int:
+        """
+        :return: The first of the `moves` that was never tried, otherwise the best (UCT) move.
+        """
+        for move in moves:
+            if move not in self.children:
+                return move
+
+        log_visits = math.log(self.visits)
+        return max(
+            moves,
+            key=lambda move: self.children[move].reward / self.children[move].visits
+            + EXPLORATION * math.sqrt(log_visits / self.children[move].visits),
+        )
+
+
+class Simulator:
+    """
+    The BattleSnake rules for every snake moving at once, on the flat board indexes of their
+    bodies (head first, ours first). A dead snake has an empty body.
+    """
+
+    def __init__(self, width: int, height: int, rollout: str = ROLLOUT_RANDOM):
+        self.links = Grid.of(width, height).links
+        self.rollout = rollout
+
+    @staticmethod
+    def occupied(bodies: list) -> set:
+        """
+        :return: The cells of the bodies that are still there after every snake moves once.
+        """
+        occupied = set()
+        for body in bodies:
+            # The tail moves away, a stacked tail (i.e. the snake just ate) is also
+            # the segment before it so it stays.
+            occupied.update(body[:-1])
+        return occupied
+
+    def moves(self, bodies: list, snake: int, occupied: set) -> List[int]:
+        """
+        :param occupied: The `occupied` cells of the bodies.
+        :return: The cells the snake can move to without hitting a body, or a losing move
+            if none.
+        """
+        links = self.links[bodies[snake][0]]
+        moves = [cell for cell in links if cell not in occupied]
+        if not moves:
+            return [links[0] if links else _NO_MOVE]
+        return moves
+
+    def choose(self, bodies: list, snake: int, occupied: set) -> int:
+        """
+        :param occupied: The `occupied` cells of the bodies.
+        :return: The playout move of the snake.
+        """
+        moves = self.moves(bodies, snake, occupied)
+        if self.rollout == ROLLOUT_RANDOM or len(moves) == 1:
+            return random.choice(moves)
+
+        danger = set()
+        size = len(bodies[snake])
+        for other, body in enumerate(bodies):
+            if other != snake and len(body) >= size:
+                danger.update(self.links[body[0]])
+
+        links = self.links
+        weights = [
+            (1 + sum(1 for link in links[cell] if link not in occupied))
+            * (0.1 if cell in danger else 1)
+            for cell in moves
+        ]
+        return random.choices(moves, weights=weights)[0]
+
+    def step(self, bodies: list, healths: list, food: set, moves: list):
+        """
+        Moves every (living) snake at once, updates the arguments.
+        """
+        eaten = set()
+        for snake, body in enumerate(bodies):
+            if not body:
+                continue
+
+            move = moves[snake]
+            body = [move] + body[:-1]
+            if move in food:
+                # The new tail is stacked, so it stays for one more move.
+                body.append(body[-1])
+                healths[snake] = 100
+                eaten.add(move)
+            else:
+                healths[snake] -= 1
+            bodies[snake] = body
+        food -= eaten
+
+        occupied = set()
+        heads = {}
+        for snake, body in enumerate(bodies):
+            if body:
+                occupied.update(body[1:])
+                heads.setdefault(body[0], []).append(snake)
+
+        dead = []
+        for snake, body in enumerate(bodies):
+            if not body:
+                continue
+            head = body[0]
+            if head == _NO_MOVE or healths[snake] <= 0 or head in occupied:
+                dead.append(snake)
+                continue
+
+            # Head-to-head, only the longest survives.
+            for other in heads[head]:
+                if other != snake and len(bodies[other]) >= len(body):
+                    dead.append(snake)
+                    break
+
+        for snake in dead:
+            bodies[snake] = []
+
+    def playout(
+        self,
+        node: MctsNode,
+        bodies: list,
+        healths: list,
+        food: set,
+        depth: int,
+        root_moves: List[int] = None,
+    ) -> float:
+        """
+        Plays the game from the state, where our moves follow the tree from the `node`
+        (growing it by one node) and then the playout moves.
+        :param root_moves: Our first moves to choose from, by default the simulator's.
+        :return: The reward of the playout for us, 0 if we die, 1 if we are the last snake
+            and in between the more opponents died.
+        """
+        path = [node]
+        in_tree = True
+        opponents = len(bodies) - 1
+        my_moves = root_moves
+
+        for _ in range(depth):
+            if not bodies[ME]:
+                break
+            if opponents and not any(bodies[1:]):
+                break
+
+            occupied = self.occupied(bodies)
+            if in_tree:
+                my_move = node.select(my_moves or self.moves(bodies, ME, occupied))
+                my_moves = None
+                if my_move not in node.children:
+                    node.children[my_move] = MctsNode()
+                    in_tree = False
+                node = node.children[my_move]
+                path.append(node)
+            else:
+                my_move = self.choose(bodies, ME, occupied)
+
+            moves = [my_move] + [
+                self.choose(bodies, snake, occupied) if bodies[snake] else _NO_MOVE
+                for snake in range(1, len(bodies))
+            ]
+            self.step(bodies, healths, food, moves)
+
+        if not bodies[ME]:
+            reward = 0.0
+        elif not opponents:
+            reward = 1.0
+        else:
+            dead = sum(1 for body in bodies[1:] if not body)
+            reward = 0.5 + 0.5 * dead / opponents
+
+        for visited in path:
+            visited.visits += 1
+            visited.reward += reward
+
+        return reward
+
+
+def _search_tree(job: tuple, deadline: Deadline = None) -> dict:
+    """
+    Grows a tree until the end time (in a pool process), even when the job waited to start.
+    :param deadline: Also stops the search when expired (e.g. cancelled), in this process.
+    :return: The top of the tree, and the number of playouts
+    """
+    (
+        width,
+        height,
+        bodies,
+        healths,
+        food,
+        root_moves,
+        end_time,
+        rollout,
+        depth,
+        seed,
+        prior,
+    ) = job
+    random.seed(seed)
+    # The end is a `time.time()`, the same in every process.
+    end = time.perf_counter() + max(end_time - time.time(), 0)
+
+    simulator = Simulator(width, height, rollout)
+    root = prior.copy(KEEP_DEPTH) if prior else MctsNode()
+    playouts = 0
+    while True:
+        simulator.playout(
+            root,
+            [list(body) for body in bodies],
+            list(healths),
+            set(food),
+            depth,
+            root_moves,
+        )
+        playouts += 1
+
+        if time.perf_counter() >= end or (deadline and deadline.expired()):
+            break
+
+    return {"tree": root.copy(KEEP_DEPTH), "playouts": playouts}
+
+
+def get_pool(processes: int = None):
+    """
+    :return: The process pool of the searches, created on first use and kept for every turn.
+    """
+    global _pool, _pool_processes
+
+    processes = processes or os.cpu_count() or 1
+    with _pool_lock:
+        if _pool is None or _pool_processes != processes:
+            _close_pool()
+            _pool = _CONTEXT.Pool(processes)
+            _pool_processes = processes
+        return _pool
+
+
+def warm_up(processes: int = None):
+    """
+    Starts every process of the pool (and imports the search in them), waiting for them to
+    be ready, so that the first search doesn't.
+    """
+    processes = processes or os.cpu_count() or 1
+    get_pool(processes).map(_ready, range(processes), chunksize=1)
+
+
+def close_pool():
+    with _pool_lock:
+        _close_pool()
+
+
+def _close_pool():
+    global _pool, _pool_processes
+
+    if _pool is not None:
+        _pool.terminate()
+        _pool.join()
+    _pool = None
+    _pool_processes = 0
+
+
+def _ready(_) -> int:
+    return os.getpid()
+
+
+class MonteCarloSearch:
+    """
+    Root parallel Monte Carlo tree search of our best move.
+    """
+
+    def __init__(
+        self,
+        board: Board,
+        deadline: Deadline,
+        processes: int = None,
+        rollout: str = ROLLOUT_HEAVY,
+        rollout_depth: int = DEFAULT_ROLLOUT_DEPTH,
+        prior: MctsNode = None,
+    ):
+        """
+        :param board: The board of the turn.
+        :param deadline: When to stop searching.
+        :param processes: The number of trees grown in parallel processes, by default one per
+            CPU core. With 1 the tree is grown in this process.
+        :param rollout: One of the `ROLLOUTS`, how the snakes move in the playouts.
+        :param rollout_depth: The number of moves of a playout.
+        :param prior: The tree to grow, e.g. the subtree of the move we played in the previous
+            turn's search (the opponent moves are sampled, so it's still our moves' tree).
+        """
+        if rollout not in ROLLOUTS:
+            raise ValueError(f"Unknown rollout: {rollout}")
+
+        self.board = board
+        self.deadline = deadline
+        self.processes = processes or os.cpu_count() or 1
+        self.rollout = rollout
+        self.rollout_depth = rollout_depth
+        self.prior = prior
+        self.inherited = prior.visits if prior else 0
+        self.playouts = 0
+        # Our move => (visits, total reward) of all the trees
+        self.results = {}
+        # The top of all the trees merged
+        self.tree = None
+
+    def stats(self) -> dict:
+        return {
+            "processes": self.processes,
+            "playouts": self.playouts,
+            "inherited": self.inherited,
+        }
+
+    def subtree(self, move: Point) -> MctsNode:
+        """
+        :return: The tree below our move (to grow in the next turn), None if not searched.
+        """
+        if self.tree is None:
+            return None
+        return self.tree.children.get(self.board.grid.index(move))
+
+    def search(self, moves: List[Point] = None) -> Point:
+        """
+        :param moves: Our moves to consider (in order of preference for the ties), by default
+            our valid moves.
+        :return: Our most visited move, None if there aren't any moves.
+        """
+        board = self.board
+        grid = board.grid
+
+        if moves is None:
+            moves = list(board.valid_snake_moves(board.me))
+        root_moves = [grid.index(move) for move in moves if move.in_bounds(board.size)]
+        if not root_moves:
+            return None
+
+        snakes = [board.me] + board.others
+        bodies = [tuple(grid.index(point) for point in snake.body) for snake in snakes]
+        healths = [snake.health for snake in snakes]
+        food = {grid.index(point) for point in board.food}
+
+        # The end of the search from now, whenever the jobs start.
+        end_time = time.time() + self.deadline.remaining()
+        if self.processes > 1:
+            end_time -= POOL_MARGIN
+
+        jobs = [
+            (
+                board.size.x,
+                board.size.y,
+                bodies,
+                healths,
+                food,
+                root_moves,
+                end_time,
+                self.rollout,
+                self.rollout_depth,
+                random.random(),
+                self.prior,
+            )
+            for _ in range(self.processes)
+        ]
+
+        if self.processes > 1:
+            trees = get_pool(self.processes).map(_search_tree, jobs)
+        else:
+            trees = [_search_tree(jobs[0], self.deadline)]
+
+        # Merge every tree, where the prior they all started from counts once.
+        self.tree = MctsNode()
+        for tree in trees:
+            self.playouts += tree["playouts"]
+            self.tree.merge(tree["tree"])
+        if self.prior and len(trees) > 1:
+            self.tree.merge(self.prior.copy(KEEP_DEPTH), 1 - len(trees))
+
+        results = {}
+        for move in root_moves:
+            child = self.tree.children.get(move)
+            results[move] = (child.visits, child.reward) if child else (0, 0.0)
+
+        self.results = {grid.cells[move]: result for move, result in results.items()}
+        best = max(root_moves, key=lambda move: results[move][0])
+
+        log.verbose(
+            "MCTS: {} of {} ({} playouts in {} processes)",
+            grid.cells[best],
+            self.results,
+            self.playouts,
+            self.processes,
+        )
+        return grid.cells[best]
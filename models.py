@@ -1,28 +1,67 @@
 import math
 
 from enum import Enum
-from typing import List, Set
+from typing import List, Set, Tuple
+
+import numpy
+
+# The points from -1 to this size - 2 (in x and y) are interned, each with its own bit:
+# the cells of every board up to 30x30 and their neighbors. The other points (e.g. of a
+# malformed request) are built every time, without a bit.
+INTERNED_SIZE = 32
 
 
 class Point:
-    __slots__ = "x", "y"
+    __slots__ = "x", "y", "_hash", "_neighbors", "_bit"
     """
     Represents a point on a BattleSnake game board.
     The point may be on the board or not, depending on the board size.
+
+    Points are immutable and interned (i.e. flyweights), `Point(1,1) is Point(1,1)`,
+    so hashing, equality and neighbor lookups don't need to build anything new.
+
+    Every interned Point also has its own bit (from its coordinates, whatever the board
+    size), to build sets of points as `int` masks, see `Body`.
     """
 
-    def __init__(self, x, y):
+    _interned = {}
+
+    def __new__(cls, x, y):
         """
         Keyword arguments:
         x -- horizontal position
         y -- vertical position
         """
-        self.x = int(x)
-        self.y = int(y)
+        x = int(x)
+        y = int(y)
+        key = (x, y)
+
+        point = cls._interned.get(key)
+        if point is None:
+            point = object.__new__(cls)
+            object.__setattr__(point, "x", x)
+            object.__setattr__(point, "y", y)
+            object.__setattr__(point, "_hash", hash(key))
+            object.__setattr__(point, "_neighbors", None)
+            if -1 <= x < INTERNED_SIZE - 1 and -1 <= y < INTERNED_SIZE - 1:
+                bit = 1 << ((y + 1) * INTERNED_SIZE + x + 1)
+                object.__setattr__(point, "_bit", bit)
+                point = cls._interned.setdefault(key, point)
+            else:
+                object.__setattr__(point, "_bit", 0)
+
+        return point
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{self!r} is immutable.")
+
+    def __reduce__(self):
+        # Unpickled (and copied) points are interned again.
+        return Point, (self.x, self.y)
 
     def __eq__(self, p):
         # Point(1,1) == Point(1,1)
-        return self.x == p.x and self.y == p.y
+        return self is p or (self.x == p.x and self.y == p.y)
 
     def __str__(self):
         return f"({self.x},{self.y})"
@@ -31,10 +70,28 @@ class Point:
         return f"Point({self.x},{self.y})"
 
     def __add__(self, p):
-        return Point(x=self.x + p.x, y=self.y + p.y)
+        return Point(self.x + p.x, self.y + p.y)
 
     def __hash__(self):
-        return hash(self.__repr__())
+        return self._hash
+
+    @property
+    def neighbors(self) -> tuple:
+        """
+        :return: The adjacent Points in the order of `Move` (up, down, left, right).
+        """
+        neighbors = self._neighbors
+        if neighbors is None:
+            x = self.x
+            y = self.y
+            neighbors = (
+                Point(x, y + 1),
+                Point(x, y - 1),
+                Point(x - 1, y),
+                Point(x + 1, y),
+            )
+            object.__setattr__(self, "_neighbors", neighbors)
+        return neighbors
 
     def in_bounds(self, board_size):
         """
@@ -50,6 +107,166 @@ class Point:
         return math.hypot(self.x - other.x, self.y - other.y)
 
 
+class Grid:
+    __slots__ = (
+        "width",
+        "height",
+        "cells",
+        "links",
+        "corners",
+        "_edges",
+        "_euclidean",
+        "_manhattan",
+    )
+    """
+    The pre-allocated geometry of one board size, shared by every board (and game)
+    of that size: the interned Points, the neighbors of every cell, the edge and
+    corner masks and the distances between every two cells.
+
+    On board cells are stored at the flat index `y * width + x`, the same index
+    used by the `BitBoard`. The distances are flat lists of `cells * cells`, the
+    distance from `a` to `b` is at `a * cells + b` (of their indexes).
+    """
+
+    _grids = {}
+
+    def __init__(self, width: int, height: int):
+        self.width = width
+        self.height = height
+        self.cells = [Point(x, y) for y in range(height) for x in range(width)]
+
+        # Link the neighbors up front (including the out of bounds ring around the board).
+        for cell in self.cells:
+            for neighbor in cell.neighbors:
+                # Reading the property caches the neighbor's own neighbors.
+                neighbor.neighbors
+
+        # The indexes of the on board neighbors of every cell (in the `Move` order).
+        self.links = [
+            tuple(
+                neighbor.y * width + neighbor.x
+                for neighbor in cell.neighbors
+                if 0 <= neighbor.x < width and 0 <= neighbor.y < height
+            )
+            for cell in self.cells
+        ]
+
+        self.corners = 0
+        for x, y in ((0, 0), (0, height - 1), (width - 1, 0), (width - 1, height - 1)):
+            self.corners |= 1 << (y * width + x)
+
+        # Depth => mask, and the distances, built on first use.
+        self._edges = {}
+        self._euclidean = None
+        self._manhattan = None
+
+    @staticmethod
+    def of(width: int, height: int) -> "Grid":
+        """
+        :return: The shared Grid for the board size, created on first use.
+        """
+        key = (width, height)
+        grid = Grid._grids.get(key)
+        if grid is None:
+            grid = Grid._grids.setdefault(key, Grid(width, height))
+        return grid
+
+    def index(self, point: Point) -> int:
+        return point.y * self.width + point.x
+
+    def point(self, x, y) -> Point:
+        """
+        :return: The interned Point at `x` and `y`, which doesn't need to be on the board.
+        """
+        x = int(x)
+        y = int(y)
+        if 0 <= x < self.width and 0 <= y < self.height:
+            return self.cells[y * self.width + x]
+        return Point(x, y)
+
+    def edge(self, depth: int = 1) -> int:
+        """
+        :return: The mask of all cells within `depth` cells of the board border.
+        """
+        edge = self._edges.get(depth)
+        if edge is None:
+            width = self.width
+            height = self.height
+            edge = 0
+            for y in range(height):
+                for x in range(width):
+                    if min(x, y, width - 1 - x, height - 1 - y) < depth:
+                        edge |= 1 << (y * width + x)
+            self._edges[depth] = edge
+        return edge
+
+    @property
+    def euclidean(self) -> List[float]:
+        """
+        :return: The straight line distance between every two cells, see `Grid`.
+        """
+        if self._euclidean is None:
+            self._euclidean = self._distances(math.hypot)
+        return self._euclidean
+
+    @property
+    def manhattan(self) -> List[int]:
+        """
+        :return: The number of moves between every two cells (ignoring what is in the
+            way), see `Grid`.
+        """
+        if self._manhattan is None:
+            self._manhattan = self._distances(lambda dx, dy: dx + dy)
+        return self._manhattan
+
+    def distance(self, a: Point, b: Point) -> float:
+        """
+        :return: The same as `a.distance(b)`, read from the table when both are on
+            the board.
+        """
+        width = self.width
+        height = self.height
+        if (
+            0 <= a.x < width
+            and 0 <= a.y < height
+            and 0 <= b.x < width
+            and 0 <= b.y < height
+        ):
+            return self.euclidean[
+                (a.y * width + a.x) * len(self.cells) + b.y * width + b.x
+            ]
+        return a.distance(b)
+
+    def _distances(self, function) -> list:
+        """
+        :param function: The distance of the offsets `dx` and `dy` (both >= 0).
+        :return: The flat table of the distance between every two cells.
+        """
+        # Every pair of cells shares one of the (few) distances of its offsets.
+        values = [
+            function(dx, dy) for dy in range(self.height) for dx in range(self.width)
+        ]
+        xs = numpy.tile(numpy.arange(self.width), self.height)
+        ys = numpy.repeat(numpy.arange(self.height), self.width)
+        offsets = (
+            numpy.abs(ys[:, None] - ys[None, :]) * self.width
+            + numpy.abs(xs[:, None] - xs[None, :])
+        )
+        return [values[offset] for offset in offsets.ravel().tolist()]
+
+
+def _request_points(grid: Grid, points: list) -> List[Point]:
+    """
+    :param points: The points of a request, `{"x": .., "y": ..}` or already Points when
+        decoded by `decode` (each point checked, a request may mix them).
+    :return: The interned Points.
+    """
+    return [
+        point if point.__class__ is Point else grid.point(point["x"], point["y"])
+        for point in points
+    ]
+
+
 class HeatType(Enum):
     # The values represent escalation of goodness, but then danger.
     # Their value order represents priority of which should be treated as more important (i.e. life over death)
@@ -60,11 +277,26 @@ class HeatType(Enum):
     DEATH = 4
 
 
+# The counters of the heat of a cell (see `HeatMap.add`).
+_TOTAL = 0
+_POSSIBLE_DEATHS = 1
+_DANGERS = 2
+_GOODS = 3
+_DEATHS = 4
+
+_DEATH_CODE = HeatType.DEATH.value
+_POSSIBLE_DEATH_CODE = HeatType.POSSIBLE_DEATH.value
+_DANGER_CODE = HeatType.DANGER.value
+_GOOD_CODE = HeatType.GOOD.value
+
+
 class Heat(object):
     def __init__(self, name: str, type: HeatType = HeatType.DANGER, value: int = 1):
         self.name = name
         self.value = value
         self.type = type
+        # The type as a small integer, to score without comparing enums.
+        self.code = type.value
 
     def __repr__(self):
         return f"Heat(name='{self.name}', value={self.value}, type={self.type})"
@@ -97,6 +329,10 @@ class HeatMap(object):
     HEAT_MOST_FUTURE_2ND = Heat("2nd_most_future", type=HeatType.GOOD, value=1,)
     HEAT_LEAST_FUTURE = Heat("least_future", type=HeatType.DANGER, value=3,)
 
+    # Only counts as one more GOOD heat (the last tie breaker), favor the move
+    # that leaves us the most of the board when everything else is equal.
+    HEAT_MOST_TERRITORY = Heat("most_territory", type=HeatType.GOOD, value=0)
+
     HEAT_FOOD = Heat("food", type=HeatType.GOOD, value=HEAT_MOST_FUTURE_2ND.value + 3)
 
     HEAT_FOOD_EDGE = Heat("food-edge", type=HeatType.DANGER, value=1)
@@ -182,16 +418,50 @@ class HeatMap(object):
 
     def __init__(self):
         self.map = {}
+        # Point => its counters (`_TOTAL`, `_POSSIBLE_DEATHS`, ...), updated by `add`
+        self._counters = {}
+        # Point => its goodness, updated by `add`
+        self._goodness = {}
 
     def get(self, point: Point) -> Set[Heat]:
         return self.map[point] if point in self.map else set()
 
     def add(self, point: Point, heat: Heat):
-        if point in self.map:
-            self.map[point].add(heat)
+        heats = self.map.get(point)
+        if heats is None:
+            self.map[point] = {heat}
+            counters = self._counters[point] = [0, 0, 0, 0, 0]
+        elif heat in heats:
+            return
+        else:
+            heats.add(heat)
+            counters = self._counters[point]
+
+        # The same score as `total_goodness` and the tie breakers of `goodness`, kept along.
+        code = heat.code
+        if code == _DEATH_CODE:
+            counters[_DEATHS] += 1
+        elif code == _POSSIBLE_DEATH_CODE:
+            counters[_TOTAL] -= heat.value
+            counters[_POSSIBLE_DEATHS] += 1
+        elif code == _DANGER_CODE:
+            counters[_TOTAL] -= heat.value
+            counters[_DANGERS] += 1
+        else:
+            counters[_TOTAL] += heat.value
+            if code == _GOOD_CODE:
+                counters[_GOODS] += 1
 
+        if counters[_DEATHS]:
+            self._goodness[point] = HeatMap.DEATH_HEAT
         else:
-            self.map[point] = {heat}
+            self._goodness[point] = max(
+                HeatMap.DEATH_HEAT,
+                counters[_TOTAL] * 1000
+                - counters[_POSSIBLE_DEATHS] * 100
+                - counters[_DANGERS] * 10
+                + counters[_GOODS],
+            )
 
     def has_heat(self, point: Point, heat: Heat) -> bool:
         return point in self.map and heat in self.map[point]
@@ -211,28 +481,14 @@ class HeatMap(object):
         return safety
 
     def goodness(self, point: Point) -> int:
-        if point not in self.map:
-            # If point is not recorded, assume basic-empty safety
-            return HeatMap.HEAT_EMPTY.value
-
-        point_heat = self.map[point]
-
-        if HeatType.DEATH in set(heat.type for heat in point_heat):
-            return HeatMap.DEATH_HEAT
-
-        return max(
-            HeatMap.DEATH_HEAT,
-            # Primarily based on overall goodness
-            HeatMap.total_goodness(point_heat) * 1000
-            # sum(1 for heat in self.get(point) if heat.type in [HeatType.GOOD]) * 1000
-            # Overall number of DANGER items 1st tie breaker by REDUCING goodness
-            + sum(1 for heat in self.get(point) if heat.type == HeatType.POSSIBLE_DEATH)
-            * -100
-            # Overall number of DANGER items 2st tie breaker by REDUCING goodness
-            + sum(1 for heat in self.get(point) if heat.type == HeatType.DANGER) * -10
-            # Lastly the overall number of good is the last tie breaker by INCREASING goodness
-            + sum(1 for heat in self.get(point) if heat.type == HeatType.GOOD) * 1,
-        )
+        """
+        :return: Death when the point has a death heat. Otherwise primarily based on the
+            overall goodness (`total_goodness`), then the number of possible deaths then of
+            dangers (both reducing the goodness) and lastly the number of good heats
+            (increasing it). Scored as the heat is added.
+        """
+        # If point is not recorded, assume basic-empty safety
+        return self._goodness.get(point, HeatMap.HEAT_EMPTY.value)
 
     def __repr__(self):
         return f"HeatMap(map={self.map})"
@@ -250,23 +506,23 @@ class Move(Enum):
     right = Point(1, 0)
 
     @staticmethod
-    def all_move_values() -> list:
+    def all_move_values() -> tuple:
         """
         Points referencing the relative difference of all moves, that would be applied to
         another point to calculate the new Point after that move.
         :return: Points to add to another Point for all possible moves.
         """
-        return [move.value for move in Move.__members__.values()]
+        return _MOVE_VALUES
 
     @staticmethod
-    def all_move_points(position: Point) -> list:
+    def all_move_points(position: Point) -> tuple:
         """
         :param position: The Point of the starting position.
-        :return: A list of all possible move Points from the given starting Point.
+        :return: All possible move Points from the given starting Point (in the `Move` order).
         """
         if not position:
             raise ValueError("Must specify a Point argument.")
-        return [position + move_value for move_value in Move.all_move_values()]
+        return position.neighbors
 
     @staticmethod
     def get_move(from_point: Point, to_point: Point):
@@ -302,8 +558,149 @@ class Move(Enum):
         return compare_moves in [[Move.up, Move.down], [Move.left, Move.right]]
 
 
+# Both follow the same order as `Point.neighbors`.
+_MOVE_VALUES = tuple(move.value for move in Move)
+_MOVE_INDEX = dict((value, index) for index, value in enumerate(_MOVE_VALUES))
+
+
+class Body:
+    __slots__ = (
+        "head",
+        "tail",
+        "size",
+        "_back",
+        "_start",
+        "_front",
+        "_mask",
+        "_collided",
+        "_list",
+    )
+    """
+    The segments of a snake, never changed once built: moving returns a new Body that
+    shares the segments of this one, so the many snakes simulated from one snake
+    (e.g. every state of a path search) don't copy its body.
+
+    The segments are a tuple from the tail (`_back`, starting at `_start`) followed by
+    the newer segments linked from the head (`_front`, `(point, next)` pairs). Moving
+    links the new head and moves `_start` past the tail, the tuple is only rebuilt
+    (from the links) once every segment of it left.
+
+    The points of the body are a mask of their `Point` bits, unless the snake ran into
+    itself (then a point can be in the body twice) or has a point without a bit, then
+    the points are looked up in the list.
+    """
+
+    def __init__(self, points: List[Point]):
+        """
+        :param points: The segments, from the head to the tail.
+        """
+        mask = 0
+        collided = False
+        previous = None
+        for point in points:
+            # Only the stacked tail (after eating) is there more than once.
+            if not point._bit or (mask & point._bit and point is not previous):
+                collided = True
+            mask |= point._bit
+            previous = point
+
+        self.head = points[0]
+        self.tail = points[-1]
+        self.size = len(points)
+        self._back = tuple(reversed(points))
+        self._start = 0
+        self._front = None
+        self._mask = mask
+        self._collided = collided
+        self._list = None
+
+    def __reduce__(self):
+        # Pickled as its list of segments, not their links.
+        return Body, (self.list(),)
+
+    def __contains__(self, point: Point):
+        if self._collided:
+            return point in self.list()
+        return bool(self._mask & point._bit)
+
+    def __iter__(self):
+        front = self._front
+        while front is not None:
+            yield front[0]
+            front = front[1]
+
+        back = self._back
+        for index in range(len(back) - 1, self._start - 1, -1):
+            yield back[index]
+
+    def __len__(self):
+        return self.size
+
+    def list(self) -> List[Point]:
+        """
+        :return: The segments from the head to the tail (shared, not to be changed).
+        """
+        if self._list is None:
+            self._list = list(self)
+        return self._list
+
+    def move(self, point: Point, grow: bool = False) -> "Body":
+        """
+        :param point: The new head.
+        :param grow: Whether the tail stays, otherwise it moves.
+        :return: The body after the move.
+        """
+        back = self._back
+        start = self._start
+        front = self._front
+        mask = self._mask
+        collided = self._collided
+        tail = self.tail
+        size = self.size + 1
+
+        if not grow:
+            size -= 1
+            start += 1
+            if start == len(back):
+                # Every segment of the tuple left, the linked ones replace it.
+                segments = []
+                while front is not None:
+                    segments.append(front[0])
+                    front = front[1]
+                segments.reverse()
+                back = tuple(segments)
+                start = 0
+
+            # The stacked tail stays until its last segment moves.
+            old_tail = tail
+            tail = back[start] if back else point
+            if tail is not old_tail:
+                mask &= ~old_tail._bit
+
+        if not point._bit or mask & point._bit:
+            collided = True
+        mask |= point._bit
+
+        body = Body.__new__(Body)
+        body.head = point
+        body.tail = tail
+        body.size = size
+        if back:
+            body._back = back
+            body._start = start
+            body._front = (point, front)
+        else:
+            body._back = (point,)
+            body._start = 0
+            body._front = None
+        body._mask = mask
+        body._collided = collided
+        body._list = None
+        return body
+
+
 class Snake:
-    __slots__ = "id", "name", "health", "body", "head", "tail", "size"
+    __slots__ = "id", "name", "health", "head", "tail", "size", "segments"
     """
     Encapsulates a snake in the BattleSnake game:
         - The moves it can make.
@@ -313,14 +710,19 @@ class Snake:
     """
 
     def __init__(self, id: str, name: str, health: int, body: List[Point]):
+        """
+        :param body: The segments from the head to the tail, or the `Body` of a snake
+            moved from another one.
+        """
         self.id = id
         self.name = name
         self.health = health
         # We assume the Points will be used in an immutable way.
-        self.body = body[:]
-        self.head = self.body[0]
-        self.tail = self.body[-1]
-        self.size = len(body)
+        segments = body if body.__class__ is Body else Body(body)
+        self.segments = segments
+        self.head = segments.head
+        self.tail = segments.tail
+        self.size = segments.size
 
     def __copy__(self):
         return self.__init__(self.id, self.name, self.health, self.body)
@@ -334,7 +736,7 @@ class Snake:
         return self.id == other_snake.id
 
     def __contains__(self, p):
-        return p in self.body
+        return p in self.segments
 
     def __len__(self):
         return len(self.body)
@@ -345,6 +747,13 @@ class Snake:
     def __hash__(self):
         return hash(self.id)
 
+    @property
+    def body(self) -> List[Point]:
+        """
+        :return: The segments from the head to the tail (not to be changed).
+        """
+        return self.segments.list()
+
     def possible_moves(self):
         moves = []
 
@@ -380,23 +789,17 @@ class Snake:
         :param grow: Whether this movement should grow the snake.
         :return: A new snake.
         """
-        if move_direction not in Move.all_move_values():
+        move_index = _MOVE_INDEX.get(move_direction)
+        if move_index is None:
             # We fail hard here because otherwise passing the wrong arg would not result in a valid snake.
             raise ValueError(f"Invalid Move point direction: {move_direction}")
 
-        if grow:
-            body_base = self.body[:]
-            new_health = 100
-        else:
-            body_base = self.body[:-1]
-            new_health = self.health - 1
-
         # According to the docs, every move costs one health point
         return Snake(
             id=self.id,
             name=self.name,
-            health=new_health,
-            body=[self.head + move_direction] + body_base,
+            health=100 if grow else self.health - 1,
+            body=self.segments.move(self.head.neighbors[move_index], grow),
         )
 
     def get_direction(self):
@@ -404,7 +807,7 @@ class Snake:
         Get's the "direction" in terms of Move where the snake is currently heading.
         :return: The move direction the snake is heading, unless it's length is 1 which will be None.
         """
-        if len(self.body) == 1:
+        if self.size == 1:
             return None
         return Move.get_move(self.body[1], self.body[0]).value
 
@@ -423,6 +826,228 @@ class Snake:
         return Move.get_move(self.head, new_point)
 
 
+class BitBoard:
+    """
+    A bitmask view of a game board, where every cell is a bit of a Python `int`
+    at the index `y * width + x`.
+
+    Collisions and move generation become a handful of shift/mask operations,
+    instead of walking the body list of every snake for every candidate move.
+    """
+
+    __slots__ = (
+        "width",
+        "height",
+        "full",
+        "_not_left",
+        "_not_right",
+        "_grid",
+        "food",
+        "heads",
+        "occupied",
+        "bodies",
+    )
+
+    def __init__(self, width: int, height: int):
+        """
+        Keyword arguments:
+        width -- number of cells horizontally
+        height -- number of cells vertically
+        """
+        self.width = width
+        self.height = height
+        self.full = (1 << (width * height)) - 1
+
+        left_column = 0
+        for y in range(height):
+            left_column |= 1 << (y * width)
+
+        # Masks used to stop horizontal shifts from wrapping onto the next row.
+        self._not_left = self.full & ~left_column
+        self._not_right = self.full & ~(left_column << (width - 1))
+        self._grid = Grid.of(width, height)
+
+        self.food = 0
+        self.heads = 0
+        self.occupied = 0
+        # Snake ID => body mask
+        self.bodies = {}
+
+    def index(self, point: Point) -> int:
+        return point.y * self.width + point.x
+
+    def bit(self, point: Point) -> int:
+        """
+        :return: The mask of the point, or 0 if the point is not on the board.
+        """
+        if 0 <= point.x < self.width and 0 <= point.y < self.height:
+            return 1 << (point.y * self.width + point.x)
+        return 0
+
+    def mask(self, points) -> int:
+        mask = 0
+        for point in points:
+            mask |= self.bit(point)
+        return mask
+
+    def copy(self) -> "BitBoard":
+        """
+        :return: A BitBoard of the same cells, that can be changed without changing this one.
+        """
+        bits = BitBoard.__new__(BitBoard)
+        for attribute in BitBoard.__slots__:
+            setattr(bits, attribute, getattr(self, attribute))
+        bits.bodies = dict(self.bodies)
+        return bits
+
+    def add_food(self, point: Point):
+        self.food |= self.bit(point)
+
+    def add_snake(self, snake_id: str, body: List[Point]):
+        body_mask = self.mask(body)
+        self.bodies[snake_id] = body_mask
+        self.heads |= self.bit(body[0])
+        self.occupied |= body_mask
+
+    def shift(self, mask: int, move) -> int:
+        """
+        :param mask: The cells to move.
+        :param move: The `Move` to apply to every cell of the mask.
+        :return: The mask of the cells after the move, clipped to the board.
+        """
+        if move is Move.up:
+            return (mask << self.width) & self.full
+        elif move is Move.down:
+            return mask >> self.width
+        elif move is Move.left:
+            return (mask & self._not_left) >> 1
+        elif move is Move.right:
+            return (mask & self._not_right) << 1
+
+        raise ValueError(f"Invalid move: {move}")
+
+    def neighbors(self, mask: int) -> int:
+        """
+        :return: Every cell one move away from any cell in the `mask`.
+        """
+        return (
+            ((mask << self.width) & self.full)
+            | (mask >> self.width)
+            | ((mask & self._not_left) >> 1)
+            | ((mask & self._not_right) << 1)
+        )
+
+    def edge(self, depth: int = 1) -> int:
+        """
+        :return: The mask of all cells within `depth` cells of the board border.
+        """
+        return self._grid.edge(depth)
+
+    def points(self, mask: int) -> List[Point]:
+        cells = self._grid.cells
+        points = []
+        while mask:
+            low_bit = mask & -mask
+            index = low_bit.bit_length() - 1
+            points.append(cells[index])
+            mask ^= low_bit
+        return points
+
+
+# Free time of a cell that never frees up.
+BLOCKED = 1 << 30
+
+
+class Occupancy:
+    """
+    The number of moves after which every cell of a board can be entered, as the snake
+    bodies move away (the tail first), or 0 for the cells that are already free.
+
+    A snake that just ate has its tail stacked twice, so the tail stays one more move.
+    """
+
+    __slots__ = "bits", "free_times", "_occupied"
+
+    def __init__(self, bits: BitBoard, snakes, moving=None):
+        """
+        :param bits: The `BitBoard` of the board.
+        :param snakes: The snakes on the board.
+        :param moving: The IDs of the snakes whose bodies move away, every snake by default.
+            The other bodies are obstacles for good.
+        """
+        self.bits = bits
+        self.free_times = [0] * (bits.width * bits.height)
+        # Moves => mask of the cells that are not free yet
+        self._occupied = {}
+
+        for snake in snakes:
+            moves = moving is None or snake.id in moving
+            size = snake.size
+            for segment, point in enumerate(snake.body):
+                # The tail is the first to move away, after one move.
+                free_time = size - segment if moves else BLOCKED
+                index = bits.index(point)
+                if self.free_times[index] < free_time:
+                    self.free_times[index] = free_time
+
+    @staticmethod
+    def of_free_times(bits: BitBoard, free_times: List[int]) -> "Occupancy":
+        """
+        :return: The Occupancy with those free times (e.g. patched from the previous turn's).
+        """
+        occupancy = Occupancy(bits, [])
+        occupancy.free_times = free_times
+        return occupancy
+
+    def free_time(self, point: Point) -> int:
+        return self.free_times[self.bits.index(point)]
+
+    def is_free(self, point: Point, moves: int) -> bool:
+        """
+        :return: Whether the point can be entered as the `moves`th move (from now).
+        """
+        return self.free_times[self.bits.index(point)] <= moves
+
+    def occupied(self, moves: int) -> int:
+        """
+        :return: The `BitBoard` mask of the cells that can't be entered as the `moves`th move.
+        """
+        if moves not in self._occupied:
+            mask = 0
+            for index, free_time in enumerate(self.free_times):
+                if free_time > moves:
+                    mask |= 1 << index
+            self._occupied[moves] = mask
+        return self._occupied[moves]
+
+
+class BoardDelta:
+    """
+    What changed on a board from one turn to the next.
+    """
+
+    __slots__ = "heads", "tails", "eaten", "spawned", "eliminated", "reparsed"
+
+    def __init__(self):
+        # Snake ID => the new head
+        self.heads = {}
+        # Snake ID => the cells left by the tail
+        self.tails = {}
+        self.eaten = []
+        self.spawned = []
+        self.eliminated = []
+        # The IDs of the snakes that didn't make a single move since the previous turn
+        # (e.g. a new snake), parsed in full.
+        self.reparsed = []
+
+    def __repr__(self):
+        return (
+            f"BoardDelta(heads={self.heads}, tails={self.tails}, eaten={self.eaten}, "
+            + f"spawned={self.spawned}, eliminated={self.eliminated}, "
+            + f"reparsed={self.reparsed})"
+        )
+
+
 class Board:
     def __init__(
         self,
@@ -440,6 +1065,15 @@ class Board:
         self._snakes = snakes
         self._food = food
         self._heat = heat
+        self._grid = Grid.of(size.x, size.y)
+        self._bits = BitBoard(size.x, size.y)
+        self._occupancy = None
+
+        for snake_id, snake in snakes.items():
+            self._bits.add_snake(snake_id, snake.body)
+
+        for point in food:
+            self._bits.add_food(point)
 
     @staticmethod
     def parse(data: dict):
@@ -448,16 +1082,17 @@ class Board:
         game_id = data["game"]["id"]
         my_id = data["you"]["id"]
         snakes = {}
+        board_size = Point(x=data["board"]["width"], y=data["board"]["height"])
+        grid = Grid.of(board_size.x, board_size.y)
+
         for snake in data["board"]["snakes"]:
-            body = [Point(**point) for point in snake["body"]]
+            body = _request_points(grid, snake["body"])
             snake_id = snake["id"]
             snakes[snake_id] = Snake(
                 id=snake_id, name=snake["name"], health=snake["health"], body=body
             )
 
-        foods = [Point(**point) for point in data["board"]["food"]]
-
-        board_size = Point(x=data["board"]["width"], y=data["board"]["height"])
+        foods = _request_points(grid, data["board"]["food"])
 
         return Board(
             game_id=game_id,
@@ -468,27 +1103,238 @@ class Board:
             heat=heat_map,
         )
 
-    def valid_snake_moves(self, snake: Snake):
+    def advance(self, data: dict) -> Tuple["Board", BoardDelta]:
+        """
+        The board of the next turn, from this board and the changes in the move request
+        (instead of parsing it in full).
+
+        The snakes that made one move reuse their previous body (a new head, the tail
+        removed), the `BitBoard` and `Occupancy` are patched where the snakes moved and the
+        food changed. Everything that depends on the snake heads (e.g. the distance fields)
+        is computed again for the new board, when requested.
+
+        :param data: The move request of the next turn.
+        :return: The new board, and what changed.
+        """
+        grid = self._grid
+        bits = self._bits.copy()
+        delta = BoardDelta()
+        free_times = self._occupancy.free_times[:] if self._occupancy else None
+
+        snakes = {}
+        cleared = []
+        for snake_data in data["board"]["snakes"]:
+            snake_id = snake_data["id"]
+            points = _request_points(grid, snake_data["body"])
+            head = points[0]
+            previous = self._snakes.get(snake_id)
+
+            body = None
+            if previous is not None and previous.size > 1 and len(points) > 1:
+                old_body = previous.body
+                if len(points) == previous.size:
+                    body = [head] + old_body[:-1]
+                elif len(points) == previous.size + 1:
+                    # It ate, the new tail is stacked.
+                    body = [head] + old_body[:-1] + [old_body[-2]]
+
+                # Only when it moved from its previous head.
+                if body and not (points[1] == previous.head and points[-1] == body[-1]):
+                    body = None
+
+            if body is None:
+                body = points
+                delta.reparsed.append(snake_id)
+                bits.bodies[snake_id] = bits.mask(body)
+                if previous is not None:
+                    cleared += previous.body
+            else:
+                delta.heads[snake_id] = head
+                removed = [old_body[-1]] if old_body[-1] != old_body[-2] else []
+                delta.tails[snake_id] = removed
+                bits.bodies[snake_id] = (
+                    bits.bodies[snake_id] & ~bits.mask(removed)
+                ) | bits.bit(head)
+                cleared += removed
+
+            snakes[snake_id] = Snake(
+                id=snake_id,
+                name=snake_data["name"],
+                health=snake_data["health"],
+                body=body,
+            )
+
+        for snake_id, snake in self._snakes.items():
+            if snake_id not in snakes:
+                delta.eliminated.append(snake_id)
+                del bits.bodies[snake_id]
+                cleared += snake.body
+
+        bits.heads = bits.mask(snake.head for snake in snakes.values())
+        bits.occupied = 0
+        for body_mask in bits.bodies.values():
+            bits.occupied |= body_mask
+
+        food = _request_points(grid, data["board"]["food"])
+        food_set = set(food)
+        delta.eaten = [point for point in self._food if point not in food_set]
+        previous_food = set(self._food)
+        delta.spawned = [point for point in food if point not in previous_food]
+        bits.food = (bits.food & ~bits.mask(delta.eaten)) | bits.mask(delta.spawned)
+
+        board = Board.__new__(Board)
+        board._game_id = self._game_id
+        board._my_id = self._my_id
+        board._size = self._size
+        board._snakes = snakes
+        board._food = food
+        board._heat = HeatMap()
+        board._grid = grid
+        board._bits = bits
+        board._occupancy = None
+
+        if free_times is not None:
+            width = bits.width
+            # Every cell left behind first, as another snake may have moved into it.
+            for point in cleared:
+                free_times[point.y * width + point.x] = 0
+            for snake in snakes.values():
+                if snake.id in delta.heads and snake.size == len(self._snakes[snake.id]):
+                    # Every segment is one move closer to the tail, but the cells of the
+                    # body didn't change: only the new head has a free time to set.
+                    for point in snake.body[1:]:
+                        free_times[point.y * width + point.x] -= 1
+                    updated = [snake.head]
+                else:
+                    updated = snake.body
+
+                # The longest time wins, for a stacked tail or heads in the same cell.
+                size = snake.size
+                for segment, point in enumerate(updated):
+                    index = point.y * width + point.x
+                    if free_times[index] < size - segment:
+                        free_times[index] = size - segment
+            board._occupancy = Occupancy.of_free_times(bits, free_times)
+
+        return board, delta
+
+    def differences(self, other: "Board") -> List[str]:
+        """
+        :return: What differs between the boards (e.g. an `advance`d board and the parsed one).
+        """
+        differences = []
+        if self._snakes.keys() != other._snakes.keys():
+            differences.append(f"snakes {list(self._snakes)} != {list(other._snakes)}")
+        for snake_id in self._snakes.keys() & other._snakes.keys():
+            snake = self._snakes[snake_id]
+            other_snake = other._snakes[snake_id]
+            if snake.body != other_snake.body or snake.health != other_snake.health:
+                differences.append(f"{snake} != {other_snake}")
+
+        if set(self._food) != set(other._food):
+            differences.append(f"food {self._food} != {other._food}")
+
+        for attribute in ["food", "heads", "occupied", "bodies"]:
+            if getattr(self._bits, attribute) != getattr(other._bits, attribute):
+                differences.append(f"bit board {attribute}")
+
+        if self.occupancy.free_times != other.occupancy.free_times:
+            differences.append(
+                f"free times {self.occupancy.free_times} != {other.occupancy.free_times}"
+            )
+
+        return differences
+
+    def valid_snake_moves(self, snake: Snake, blocked: int = 0, occupied: int = None):
         """
         Returns moves that are in-bounds and not to itself, to other snakes.
         Otherwise return nothing.
 
         :param snake: The snake making the move.
+        :param blocked: A `BitBoard` mask of extra cells to treat as obstacles.
+        :param occupied: A `BitBoard` mask of the board snake cells, by default all of their
+            bodies (e.g. `Occupancy.occupied` for the bodies left after a few moves).
         :return: A non-guaranteed death/disqualifying move.
         """
-        for move in snake.possible_moves():
-            if move.in_bounds(self.size):
-                in_snake = False
-                for other_snake in self.snakes:
-                    # We do this check here, in order to test a
-                    # artificial future snake into a board and still
-                    # evaluate it's moves.
-                    if other_snake != snake and move in other_snake.body:
-                        in_snake = True
-                        break
+        legal = self.valid_moves_mask(snake, blocked, occupied)
+        if not legal:
+            return
+
+        bits = self._bits
+        for move in Move.all_move_points(snake.head):
+            if legal & bits.bit(move):
+                yield move
+
+    def valid_moves_mask(
+        self, snake: Snake, blocked: int = 0, occupied: int = None
+    ) -> int:
+        """
+        Same as `valid_snake_moves` but as a `BitBoard` mask of the destination cells.
+
+        :param snake: The snake making the move.
+        :param blocked: A `BitBoard` mask of extra cells to treat as obstacles.
+        :param occupied: A `BitBoard` mask of the board snake cells, by default all of their bodies.
+        """
+        bits = self._bits
+        if occupied is None:
+            occupied = bits.occupied
+
+        own_board_body = self.board_body_mask(snake)
+        board_snake = self._snakes.get(snake.id)
+        if board_snake is not None and board_snake.segments is snake.segments:
+            # A board snake (not a simulated one of the same ID), its mask is kept.
+            own_body = bits.bodies[snake.id]
+        else:
+            own_body = bits.mask(snake.segments)
+
+        # Same rules as `Snake.possible_moves` for moving into our own tail.
+        if snake.size > 3 and snake.health < 100:
+            own_body &= ~bits.bit(snake.tail)
+
+        blocked |= (occupied & ~own_board_body) | own_body
+
+        return bits.neighbors(bits.bit(snake.head)) & ~blocked
+
+    def board_body_mask(self, snake: Snake) -> int:
+        """
+        :return: The `BitBoard` mask of the board snake(s) that are equal to the `snake`.
+        """
+        # We compare with the board snakes here, in order to test a
+        # artificial future snake into a board and still
+        # evaluate it's moves.
+        mask = 0
+        for snake_id, other_snake in self._snakes.items():
+            if other_snake == snake:
+                mask |= self._bits.bodies[snake_id]
+        return mask
+
+    def is_food(self, point: Point) -> bool:
+        return bool(self._bits.food & self._bits.bit(point))
+
+    @property
+    def game_id(self) -> str:
+        return self._game_id
 
-                if not in_snake:
-                    yield move
+    @property
+    def my_id(self) -> str:
+        return self._my_id
+
+    @property
+    def bitboard(self) -> BitBoard:
+        return self._bits
+
+    @property
+    def grid(self) -> Grid:
+        return self._grid
+
+    @property
+    def occupancy(self) -> Occupancy:
+        """
+        :return: The `Occupancy` of the board where every snake moves.
+        """
+        if self._occupancy is None:
+            self._occupancy = Occupancy(self._bits, self.snakes)
+        return self._occupancy
 
     @property
     def me(self):
@@ -524,13 +1370,18 @@ class Board:
         max_boarder = int((self.size.x + self.size.y) / 2)
         if size > max_boarder:
             size = max_boarder
-        for i in range(0, size):
-            return (
-                point.x == i
-                or point.y == i
-                or point.x == self.size.x - 1 - i
-                or point.y == self.size.y - 1 - i
-            )
+
+        point_bit = self._bits.bit(point)
+        if point_bit:
+            return bool(self._grid.edge(size) & point_bit)
+
+        # Out of bounds points are not in the board mask.
+        return size > 0 and (
+            point.x == 0
+            or point.y == 0
+            or point.x == self.size.x - 1
+            or point.y == self.size.y - 1
+        )
 
     @property
     def size(self):
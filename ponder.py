@@ -0,0 +1,339 @@
+"""
+Pondering, the analysis of the likely next boards while the game engine waits for the
+other snakes' moves.
+
+After a move response, the boards that the most likely replies of the other snakes lead to
+are analyzed on a background thread, and their analysis (e.g. the move) is kept by the
+board's Zobrist key.
+When the next move request is one of them, its move is known right away. Otherwise (or
+when the request comes before the end of pondering), the pondering is cancelled.
+"""
+
+import itertools
+import threading
+import time
+
+from typing import Any, Callable, Dict, List, Optional
+
+import log
+
+from anytime import Deadline
+from models import Board, Point
+from zobrist import board_key
+
+# The CPU time of the pondering of one game, between two move requests (milliseconds).
+DEFAULT_PONDER_CPU_MS = 200
+
+# Pondering pauses in every game when more games than that are played at once.
+DEFAULT_PONDER_MAX_GAMES = 2
+
+# The number of replies of each other snake (the most likely first) that are combined.
+REPLIES_PER_SNAKE = 2
+
+# The number of next boards analyzed (the most likely first).
+PONDER_BOARDS = 4
+
+# The IDs of the games pondering (or able to), counted as the games played by default.
+_games = set()
+_games_lock = threading.Lock()
+
+
+def active_games() -> int:
+    with _games_lock:
+        return len(_games)
+
+
+class PonderDeadline(Deadline):
+    """
+    The deadline of the analysis of one pondered board, which also expires when the
+    pondering is cancelled, its CPU time is spent or too many games are played.
+    """
+
+    __slots__ = "cpu_end", "cancelled", "max_games", "games"
+
+    def __init__(
+        self,
+        budget: float,
+        cpu_budget: float,
+        cancelled: threading.Event,
+        max_games: int,
+        games: Callable[[], int] = active_games,
+    ):
+        """
+        :param budget: The number of seconds available from now.
+        :param cpu_budget: The CPU time (of this thread) available from now, in seconds.
+        :param cancelled: Set when the pondering has to stop.
+        :param max_games: The most games played at once to keep pondering.
+        :param games: Counts the games played at once.
+        """
+        super().__init__(budget)
+        self.cpu_end = time.thread_time() + cpu_budget
+        self.cancelled = cancelled
+        self.max_games = max_games
+        self.games = games
+
+    def remaining(self) -> float:
+        return min(self.end - time.perf_counter(), self.cpu_end - time.thread_time())
+
+    def expired(self) -> bool:
+        return (
+            self.cancelled.is_set()
+            or time.perf_counter() >= self.end
+            or time.thread_time() >= self.cpu_end
+            or self.games() > self.max_games
+        )
+
+
+def likely_replies(board: Board, moves: Dict[str, Point]) -> List[Dict[str, Point]]:
+    """
+    The replies of the other snakes, where a snake more likely moves to a cell with more
+    free cells around it.
+
+    :param moves: Our snake's ID => our move.
+    :return: The moves of every snake (ours included), the most likely first.
+    """
+    bits = board.bitboard
+    occupied = board.occupancy.occupied(2)
+
+    def free_options(move: Point) -> int:
+        return bin(bits.neighbors(bits.bit(move)) & ~occupied).count("1")
+
+    snake_moves = []
+    for snake in board.others:
+        ranked = sorted(board.valid_snake_moves(snake), key=free_options, reverse=True)
+        # A snake without a valid move dies anyway, that move is as good as any.
+        snake_moves.append(ranked[:REPLIES_PER_SNAKE] or snake.head.neighbors[:1])
+
+    replies = list(itertools.product(*[enumerate(ranked) for ranked in snake_moves]))
+    replies.sort(key=lambda reply: sum(rank for rank, _ in reply))
+
+    return [
+        dict(
+            moves,
+            **{snake.id: move for snake, (_, move) in zip(board.others, reply)},
+        )
+        for reply in replies
+    ]
+
+
+def predict_request(data: dict, board: Board, moves: Dict[str, Point]) -> Optional[dict]:
+    """
+    :param data: The move request of this turn.
+    :param moves: Snake ID => the move of the snake.
+    :return: The move request of the next turn (with Points, as decoded by `decode`),
+        when every snake moved (eating what they move on, dying when out of the board, out
+        of health, in a body or in a longer snake's head) and no food spawned, None when we
+        die.
+    """
+    heads = {}
+    for snake in board.snakes:
+        heads.setdefault(moves[snake.id], []).append(snake)
+
+    food = set(board.food)
+    eaten = set()
+    snakes = []
+    occupied = board.occupancy.occupied(1)
+    snakes_by_id = {snake.id: snake for snake in board.snakes}
+    for snake_data in data["board"]["snakes"]:
+        snake = snakes_by_id[snake_data["id"]]
+        head = moves[snake.id]
+        ate = head in food
+        health = 100 if ate else snake.health - 1
+
+        bit = board.bitboard.bit(head)
+        rivals = heads[head]
+        if (
+            not bit
+            or occupied & bit
+            or health <= 0
+            or any(rival.size >= snake.size for rival in rivals if rival is not snake)
+        ):
+            if snake is board.me:
+                return None
+            continue
+
+        body = [head] + snake.body[:-1]
+        if ate:
+            eaten.add(head)
+            body.append(body[-1])
+        snakes.append(
+            dict(snake_data, health=health, body=body, head=body[0], length=len(body))
+        )
+
+    you = next(snake for snake in snakes if snake["id"] == board.me.id)
+    return dict(
+        data,
+        turn=int(data["turn"]) + 1,
+        you=you,
+        board=dict(
+            data["board"],
+            snakes=snakes,
+            food=[point for point in board.food if point not in eaten],
+        ),
+    )
+
+
+class Ponderer:
+    """
+    The pondering of one game, on a background thread between its move requests.
+    """
+
+    __slots__ = (
+        "game_id",
+        "analyze",
+        "cpu_ms",
+        "max_games",
+        "games",
+        "hits",
+        "misses",
+        "cancelled",
+        "pondered",
+        "_analyses",
+        "_cancel",
+        "_thread",
+    )
+
+    def __init__(
+        self,
+        game_id: str,
+        analyze: Callable[[Board, Deadline], Any],
+        cpu_ms: int = DEFAULT_PONDER_CPU_MS,
+        max_games: int = DEFAULT_PONDER_MAX_GAMES,
+        games: Callable[[], int] = None,
+    ):
+        """
+        :param analyze: Decides the move of a board by a deadline, what it returns is
+            kept for the board (unless None, e.g. when it didn't finish in time).
+        :param cpu_ms: The CPU time of the pondering between two move requests.
+        :param max_games: The most games played at once to keep pondering.
+        :param games: Counts the games played at once (e.g. by the server), by default the
+            games pondering.
+        """
+        self.game_id = game_id
+        self.analyze = analyze
+        self.cpu_ms = cpu_ms
+        self.max_games = max_games
+        self.games = games or active_games
+        self.hits = 0
+        self.misses = 0
+        self.cancelled = 0
+        self.pondered = 0
+        # Board key => the analysis of the board
+        self._analyses = {}
+        self._cancel = threading.Event()
+        self._thread = None
+
+        with _games_lock:
+            _games.add(game_id)
+
+    def start(self, data: dict, board: Board, move: Point):
+        """
+        Starts pondering the boards following our `move` on the `board` (of the move
+        request `data`).
+        """
+        self.stop()
+        self._analyses = {}
+        if self.games() > self.max_games or self.cpu_ms <= 0:
+            return
+
+        self._cancel = threading.Event()
+        self._thread = threading.Thread(
+            target=self._ponder,
+            args=(data, board, move, self._cancel),
+            name=f"ponder-{self.game_id}",
+            daemon=True,
+        )
+        self._thread.start()
+
+    def stop(self):
+        """
+        Cancels the pondering, and waits for the thread to stop (before the game's state
+        is used again).
+        """
+        thread = self._thread
+        if thread is None:
+            return
+
+        if thread.is_alive():
+            self.cancelled += 1
+            self._cancel.set()
+        thread.join()
+        self._thread = None
+
+    def wait(self, timeout: float = None) -> bool:
+        """
+        :return: Whether the pondering ended (by itself) within the `timeout`.
+        """
+        if self._thread is not None:
+            self._thread.join(timeout)
+            return not self._thread.is_alive()
+        return True
+
+    def lookup(self, board: Board) -> Optional[Any]:
+        """
+        Stops pondering.
+
+        :return: The analysis pondered for the board, or None.
+        """
+        self.stop()
+        analysis = self._analyses.get(board_key(board))
+        if analysis is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return analysis
+
+    def close(self):
+        self.stop()
+        with _games_lock:
+            _games.discard(self.game_id)
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "cancelled": self.cancelled,
+            "pondered": self.pondered,
+        }
+
+    def _ponder(
+        self, data: dict, board: Board, move: Point, cancelled: threading.Event
+    ):
+        cpu_budget = self.cpu_ms / 1000
+        cpu_end = time.thread_time() + cpu_budget
+        try:
+            boards = self._next_boards(data, board, move)
+            for index, next_board in enumerate(boards):
+                cpu_left = cpu_end - time.thread_time()
+                if cpu_left <= 0:
+                    break
+                cpu_share = cpu_left / (len(boards) - index)
+                deadline = PonderDeadline(
+                    cpu_budget, cpu_share, cancelled, self.max_games, self.games
+                )
+                if deadline.expired():
+                    break
+
+                analysis = self.analyze(next_board, deadline)
+                if cancelled.is_set():
+                    break
+                if analysis is None:
+                    continue
+                self._analyses[board_key(next_board)] = analysis
+                self.pondered += 1
+        except Exception as e:
+            log.error("Pondering failed: {!r}", e)
+
+    def _next_boards(self, data: dict, board: Board, move: Point) -> List[Board]:
+        """
+        :return: The most likely boards of the next turn.
+        """
+        boards = []
+        for moves in likely_replies(board, {board.me.id: move}):
+            next_data = predict_request(data, board, moves)
+            if next_data is not None:
+                next_board, _ = board.advance(next_data)
+                boards.append(next_board)
+            if len(boards) >= PONDER_BOARDS:
+                break
+        return boards
@@ -0,0 +1,103 @@
+"""
+Reachable space after a move, found with a bounded flood fill of the board bitmasks.
+
+Every step of the fill grows the region by one move, and the board snake bodies are only
+obstacles until they move away by the time we get there (see `Occupancy`), so the whole
+fill is a single pass over the board instead of a path search per move.
+"""
+
+import weakref
+
+from models import BLOCKED, Board, Point, Snake
+
+# Board => {(blocked mask, start cell, tail cell, limit) => Region}
+_regions = weakref.WeakKeyDictionary()
+
+
+class Region:
+    """
+    The space a snake can get to after a move.
+    """
+
+    __slots__ = "mask", "size", "has_tail", "escape_time"
+
+    def __init__(self, mask: int, size: int, has_tail: bool, escape_time: int):
+        """
+        :param mask: The `BitBoard` mask of the region cells.
+        :param size: The number of cells in the region, once past the fill limit the fill stops.
+        :param has_tail: Whether the snake's tail is in (or next to) the region.
+        :param escape_time: The number of moves until a cell around the region frees up,
+            `BLOCKED` if the region is closed for good.
+        """
+        self.mask = mask
+        self.size = size
+        self.has_tail = has_tail
+        self.escape_time = escape_time
+
+    def __repr__(self):
+        return (
+            f"Region(size={self.size}, has_tail={self.has_tail}, "
+            + f"escape_time={self.escape_time})"
+        )
+
+
+def reachable_region(
+    board: Board, snake: Snake, move: Point, limit: int = None, blocked: int = 0
+) -> Region:
+    """
+    :param board: The board (with obstacles) to fill.
+    :param snake: The board snake making the move.
+    :param move: The first move of the snake, the region starts there.
+    :param limit: The region size after which the fill stops, by default the whole board.
+    :param blocked: A `BitBoard` mask of extra cells to treat as obstacles.
+    :return: The Region reachable from the move, kept with the board.
+    """
+    bits = board.bitboard
+
+    if limit is None or limit < 1:
+        limit = bits.width * bits.height
+
+    board_regions = _regions.get(board)
+    if board_regions is None:
+        board_regions = _regions[board] = {}
+
+    key = (blocked, bits.index(move), bits.index(snake.tail), limit)
+    region = board_regions.get(key)
+    if region is None:
+        region = board_regions[key] = _fill(board, snake, move, limit, blocked)
+
+    return region
+
+
+def _fill(
+    board: Board, snake: Snake, move: Point, limit: int, blocked: int
+) -> Region:
+    occupancy = board.occupancy
+    bits = board.bitboard
+
+    region = bits.bit(move)
+    size = 1 if region else 0
+    moves = 1
+
+    # Every cell is reached at its shortest distance from the move, waiting for the
+    # space to open up is left to the `escape_time`.
+    frontier = region
+    while frontier and size < limit:
+        moves += 1
+        frontier = bits.neighbors(frontier) & ~(
+            region | blocked | occupancy.occupied(moves)
+        )
+        region |= frontier
+        size += bin(frontier).count("1")
+
+    border = bits.neighbors(region) & ~region
+
+    tail = bits.bit(snake.tail)
+    has_tail = bool(tail & (region | border))
+
+    escape_time = BLOCKED
+    if size < limit:
+        for point in bits.points(border & ~blocked):
+            escape_time = min(escape_time, occupancy.free_time(point))
+
+    return Region(region, size, has_tail, escape_time)
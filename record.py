@@ -0,0 +1,319 @@
+"""
+Records every request of the games (with our move and how long it took) to a gzip JSON
+lines file per game, and replays them through `Game.move`.
+
+The requests are queued for a background thread to write, the request thread never waits:
+when the queue is full, the record is dropped (and counted).
+
+    python record.py games/*.jsonl.gz --move-mode anytime
+"""
+
+import argparse
+import gzip
+import json
+import os
+import queue
+import re
+import threading
+import time
+
+from typing import Iterator, Optional
+
+import log
+
+from anytime import Deadline
+from decode import request_text
+from game import MOVE_MODE_HEURISTIC, MOVE_MODES, Game
+
+# The most records waiting to be written, the next ones are dropped.
+DEFAULT_QUEUE_SIZE = 1024
+
+# The kinds of records, one per request.
+RECORD_START = "start"
+RECORD_MOVE = "move"
+RECORD_END = "end"
+
+# The extension of the recorded games.
+EXTENSION = ".jsonl.gz"
+
+# The seconds without a record after which a game's file is closed (e.g. its end request
+# was lost), a later record of the game appends to it again.
+DEFAULT_IDLE_SECONDS = 60
+
+# Queued instead of a record, to close the file of a game (or of every game when None).
+_CLOSE = "close"
+
+
+class Recorder:
+    """
+    Writes the requests of every game to `<directory>/<game ID>.jsonl.gz`, one JSON object per
+    line: `{"type": .., "time": .., "seconds": .., "response": .., "data": <the request>}`.
+    """
+
+    __slots__ = (
+        "directory",
+        "idle_seconds",
+        "recorded",
+        "dropped",
+        "_queue",
+        "_files",
+        "_written",
+        "_writer",
+        "_lock",
+    )
+
+    def __init__(
+        self,
+        directory: str,
+        queue_size: int = DEFAULT_QUEUE_SIZE,
+        idle_seconds: float = DEFAULT_IDLE_SECONDS,
+    ):
+        """
+        :param directory: Where to write the games, created if needed.
+        :param queue_size: The most records waiting to be written.
+        :param idle_seconds: The seconds without a record after which a game's file is
+            closed.
+        """
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.idle_seconds = idle_seconds
+        self.recorded = 0
+        self.dropped = 0
+        self._queue = queue.Queue(queue_size)
+        # Game ID => its open file (until the end of the game), only used by the writer
+        self._files = {}
+        # Game ID => when its last record was written (`time.monotonic()`)
+        self._written = {}
+        self._writer = None
+        self._lock = threading.Lock()
+
+    def record(
+        self,
+        kind: str,
+        data: dict,
+        response: Optional[dict] = None,
+        seconds: Optional[float] = None,
+    ) -> bool:
+        """
+        Queues a request to be written, without waiting.
+
+        :param kind: One of `RECORD_START`, `RECORD_MOVE` or `RECORD_END`.
+        :param data: The request (not changed afterwards).
+        :param response: Our response, e.g. the move.
+        :param seconds: How long the response took.
+        :return: Whether it was queued, otherwise dropped as the queue is full.
+        """
+        if self._writer is None:
+            self._start_writer()
+
+        try:
+            self._queue.put_nowait((kind, time.time(), seconds, response, data))
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            return False
+        return True
+
+    def close_game(self, game_id: str):
+        """
+        Closes the file of a game without waiting, e.g. once the game is dropped before its
+        end request.
+        """
+        if self._writer is None:
+            return
+        try:
+            self._queue.put_nowait((_CLOSE, game_id))
+        except queue.Full:
+            # Closed once idle, instead.
+            pass
+
+    def path(self, game_id: str) -> str:
+        return os.path.join(self.directory, re.sub(r"[^\w.-]", "_", game_id) + EXTENSION)
+
+    def flush(self):
+        """
+        Waits for the records queued so far to be written (and readable).
+        """
+        if self._writer is not None:
+            self._queue.join()
+
+    def close(self):
+        """
+        Writes the records queued so far and closes the file of every game, e.g. at exit.
+        """
+        if self._writer is not None:
+            self._queue.put((_CLOSE, None))
+            self._queue.join()
+
+    def stats(self) -> dict:
+        return {
+            "recorded": self.recorded,
+            "dropped": self.dropped,
+            "queued": self._queue.qsize(),
+            "games": len(self._files),
+        }
+
+    def _start_writer(self):
+        with self._lock:
+            if self._writer is None:
+                thread = threading.Thread(
+                    target=self._write_records, name="recorder", daemon=True
+                )
+                thread.start()
+                self._writer = thread
+
+    def _write_records(self):
+        while True:
+            try:
+                record = self._queue.get(timeout=self.idle_seconds / 2)
+            except queue.Empty:
+                self._close_idle()
+                continue
+
+            try:
+                if record[0] == _CLOSE:
+                    self._close(record[1])
+                else:
+                    self._write(*record)
+                # The games written so far are readable, when nothing else is waiting.
+                if self._queue.empty():
+                    for file in self._files.values():
+                        file.flush()
+                    self._close_idle()
+            except Exception as e:
+                log.error("Recording failed: {!r}", e)
+            finally:
+                self._queue.task_done()
+
+    def _close(self, game_id: Optional[str]):
+        """
+        Closes the file of the game (which writes its gzip trailer), or of every game.
+        """
+        game_ids = list(self._files) if game_id is None else [game_id]
+        for game_id in game_ids:
+            file = self._files.pop(game_id, None)
+            self._written.pop(game_id, None)
+            if file is not None:
+                file.close()
+
+    def _close_idle(self):
+        idle_since = time.monotonic() - self.idle_seconds
+        for game_id, written in list(self._written.items()):
+            if written < idle_since:
+                self._close(game_id)
+
+    def _write(self, kind: str, timestamp: float, seconds, response, data: dict):
+        game_id = data["game"]["id"]
+        file = self._files.get(game_id)
+        if file is None:
+            file = self._files[game_id] = gzip.open(self.path(game_id), "at")
+        self._written[game_id] = time.monotonic()
+
+        # The request's text as received, when it was kept.
+        file.write(
+            '{"type": %s, "time": %s, "seconds": %s, "response": %s, "data": %s}\n'
+            % (
+                json.dumps(kind),
+                json.dumps(timestamp),
+                json.dumps(seconds),
+                json.dumps(response),
+                request_text(data),
+            )
+        )
+        self.recorded += 1
+
+        if kind == RECORD_END:
+            self._close(game_id)
+
+
+def read_records(path: str) -> Iterator[dict]:
+    """
+    :return: The records of a recorded game, in order, as they are read.
+    """
+    with gzip.open(path, "rt") as file:
+        try:
+            for line in file:
+                if line.strip():
+                    yield json.loads(line)
+        except EOFError:
+            # A game still recording (or interrupted) ends with a partial block.
+            pass
+
+
+def replay(path: str, **game_options) -> Iterator[dict]:
+    """
+    Feeds the requests of a recorded game to a new `Game`, one after the other.
+
+    :param game_options: The options of the `Game`, e.g. its move mode.
+    :return: For every move, the turn, the recorded and replayed moves and how long the
+        replayed move took.
+    """
+    game = None
+    for record in read_records(path):
+        data = record["data"]
+        if game is None:
+            game = Game(data, **game_options)
+
+        kind = record["type"]
+        if kind == RECORD_START:
+            game.start(data)
+        elif kind == RECORD_MOVE:
+            start = time.perf_counter()
+            game.turn = int(data["turn"])
+            response = game.move(
+                data, Deadline.from_request(data, game.network_margin_ms, start)
+            )
+            yield {
+                "turn": game.turn,
+                "recorded": (record["response"] or {}).get("move"),
+                "replayed": response["move"],
+                "seconds": time.perf_counter() - start,
+            }
+        elif kind == RECORD_END:
+            game.end(data)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Replays recorded games, and compares the moves with the recorded ones."
+    )
+    parser.add_argument("paths", nargs="+", help="The recorded games (.jsonl.gz).")
+    parser.add_argument(
+        "--move-mode",
+        help="How to decide every move.",
+        choices=MOVE_MODES,
+        default=MOVE_MODE_HEURISTIC,
+    )
+    parser.add_argument(
+        "--log-level",
+        help="How much to log while replaying.",
+        choices=list(log.LEVELS),
+        default="quiet",
+    )
+    args = parser.parse_args()
+    log.set_level(args.log_level)
+
+    moves = 0
+    changed = 0
+    seconds = []
+    for path in args.paths:
+        for turn in replay(path, move_mode=args.move_mode):
+            moves += 1
+            seconds.append(turn["seconds"])
+            if turn["replayed"] != turn["recorded"]:
+                changed += 1
+                print(
+                    f"{path} turn {turn['turn']}: {turn['replayed']} "
+                    + f"(recorded {turn['recorded']})"
+                )
+
+    log.flush()
+    if seconds:
+        print(
+            f"{moves} moves, {changed} changed, {sum(seconds) / moves:0.4f} seconds "
+            + f"on average (max {max(seconds):0.4f})"
+        )
+
+
+if __name__ == "__main__":
+    main()
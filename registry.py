@@ -0,0 +1,219 @@
+"""
+The games played at once by the server.
+
+Every game has its own lock, held while one of its requests uses it, so the requests of
+different games never wait for each other. The games whose end request never came are
+evicted once they didn't have a turn for a while, and the least recently played games are
+evicted above a number of games, on every request and by a background sweeper (so an idle
+server releases them too).
+"""
+
+import threading
+import time
+
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Callable, Iterator, Optional
+
+import log
+
+from game import Game
+
+# The seconds without a request after which a game is evicted (e.g. its end request was
+# lost).
+DEFAULT_IDLE_SECONDS = 60
+
+# The most games kept, the least recently played are evicted above.
+DEFAULT_MAX_GAMES = 64
+
+
+class _Entry:
+    __slots__ = "game", "lock", "seen", "users"
+
+    def __init__(self, game: Game, seen: float):
+        self.game = game
+        self.lock = threading.Lock()
+        # When the game was last used
+        self.seen = seen
+        # The requests using the game (it's not evicted meanwhile)
+        self.users = 0
+
+
+class GameRegistry:
+    """
+    The games by ID, created from their first request.
+
+        with registry.game(data) as game:
+            game.move(data)
+    """
+
+    __slots__ = (
+        "idle_seconds",
+        "max_games",
+        "evicted_idle",
+        "evicted_lru",
+        "_create",
+        "_evicted",
+        "_entries",
+        "_lock",
+        "_sweeper",
+        "_closed",
+    )
+
+    def __init__(
+        self,
+        create: Callable[[dict], Game],
+        idle_seconds: float = DEFAULT_IDLE_SECONDS,
+        max_games: int = DEFAULT_MAX_GAMES,
+        evicted: Callable[[Game], None] = None,
+    ):
+        """
+        :param create: Creates the game of a request, the first one received for the game.
+        :param idle_seconds: The seconds without a request after which a game is evicted.
+        :param max_games: The most games kept.
+        :param evicted: Called with every game evicted (once closed), e.g. to release what
+            else is kept for it.
+        """
+        self.idle_seconds = idle_seconds
+        self.max_games = max_games
+        self.evicted_idle = 0
+        self.evicted_lru = 0
+        self._create = create
+        self._evicted = evicted
+        # Game ID => its entry, the least recently used first
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._sweeper = None
+        self._closed = threading.Event()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, game_id: str):
+        return game_id in self._entries
+
+    @contextmanager
+    def game(self, data: dict, create: bool = True) -> Iterator[Optional[Game]]:
+        """
+        The game of the request (created if needed), locked for the request and updated to
+        its turn.
+
+        :param data: A request of the game.
+        :param create: Whether to create the game when it's unknown, otherwise it's None
+            (e.g. for an end request, once the game was evicted).
+        """
+        game_id = data["game"]["id"]
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(game_id)
+            if entry is not None:
+                self._entries.move_to_end(game_id)
+            elif create:
+                entry = self._entries[game_id] = _Entry(self._create(data), now)
+            if entry is not None:
+                entry.users += 1
+            evicted = self._evict(now)
+
+        self._close(evicted)
+        if entry is None:
+            yield None
+            return
+
+        try:
+            with entry.lock:
+                entry.game.turn = int(data["turn"])
+                yield entry.game
+        finally:
+            with self._lock:
+                entry.users -= 1
+                entry.seen = time.monotonic()
+
+    def remove(self, game_id: str):
+        """
+        Forgets the game, e.g. once it ended.
+        """
+        with self._lock:
+            self._entries.pop(game_id, None)
+
+    def evict(self, now: float = None) -> int:
+        """
+        Evicts the idle games, and the least recently used above the most games kept.
+
+        :param now: The current `time.monotonic()`.
+        :return: The number of games evicted.
+        """
+        with self._lock:
+            evicted = self._evict(time.monotonic() if now is None else now)
+        self._close(evicted)
+        return len(evicted)
+
+    def start_sweeper(self, interval: float = None):
+        """
+        Evicts the games every `interval` seconds on a background thread, by default twice
+        per `idle_seconds`, until closed.
+        """
+        if self._sweeper is not None:
+            return
+
+        interval = interval or self.idle_seconds / 2
+        self._closed.clear()
+        self._sweeper = threading.Thread(
+            target=self._sweep, args=(interval,), name="game-sweeper", daemon=True
+        )
+        self._sweeper.start()
+
+    def close(self):
+        """
+        Stops the sweeper.
+        """
+        self._closed.set()
+        if self._sweeper is not None:
+            self._sweeper.join()
+            self._sweeper = None
+
+    def gauges(self) -> dict:
+        with self._lock:
+            return {
+                "active": len(self._entries),
+                "playing": sum(1 for entry in self._entries.values() if entry.users),
+                "evicted_idle": self.evicted_idle,
+                "evicted_lru": self.evicted_lru,
+            }
+
+    def _evict(self, now: float) -> list:
+        """
+        :return: The games evicted (to close without the lock).
+        """
+        evicted = []
+        entries = self._entries
+        idle_since = now - self.idle_seconds
+        for game_id, entry in entries.items():
+            # The games in use don't count as idle, nor as the least recently used.
+            if entry.users:
+                continue
+
+            # Every game is checked: the order is of the requests' starts, and their
+            # ends may not come in the same order.
+            if entry.seen < idle_since:
+                self.evicted_idle += 1
+            elif len(entries) - len(evicted) > self.max_games:
+                self.evicted_lru += 1
+            else:
+                continue
+            evicted.append(game_id)
+
+        return [entries.pop(game_id).game for game_id in evicted]
+
+    def _sweep(self, interval: float):
+        while not self._closed.wait(interval):
+            try:
+                self.evict()
+            except Exception as e:
+                log.error("Evicting the games failed: {!r}", e)
+
+    def _close(self, games: list):
+        for game in games:
+            log.info("Evicting the game {} (turn {})", game.game_id, game.turn)
+            game.close()
+            if self._evicted:
+                self._evicted(game)
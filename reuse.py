@@ -0,0 +1,204 @@
+"""
+What one turn computed, kept for the next turn (where every snake moved by one cell).
+
+The searches keep their trees (or best moves by state key) themselves, `TurnMemory` holds
+them between turns. The shortest paths from the other snakes to us are kept here, and
+followed along as both ends move.
+"""
+
+from typing import Dict, List, Optional
+
+from duel import BEST_MOVES_SIZE
+from mcts import MctsNode
+from models import Board, Point, Snake
+from zobrist import TranspositionTable
+
+
+class PathMemory:
+    """
+    The paths from each snake to a goal, inherited from the previous turn when they are
+    still free and still a shortest path.
+    """
+
+    __slots__ = "inherited", "repaired", "missed", "_previous", "_current"
+
+    def __init__(self):
+        self.inherited = 0
+        self.repaired = 0
+        self.missed = 0
+        # (snake ID, time aware) => path
+        self._previous = {}
+        self._current = {}
+
+    def next_turn(self):
+        """
+        The paths remembered so far become the previous turn's.
+        """
+        self._previous = self._current
+        self._current = {}
+        self.inherited = self.repaired = self.missed = 0
+
+    def clear(self):
+        self._previous = {}
+        self._current = {}
+
+    def remember(self, snake: Snake, time_aware: bool, path: List[Point]):
+        self._current[(snake.id, time_aware)] = path
+
+    def inherit(
+        self,
+        board: Board,
+        snake: Snake,
+        goal: Point,
+        time_aware: bool = False,
+        max_moves: int = None,
+    ) -> Optional[List[Point]]:
+        """
+        :param board: The board of this turn.
+        :param snake: The snake at the start of the path, as it is this turn.
+        :param goal: The end of the path this turn, an obstacle next to the path is fine.
+        :param time_aware: Whether the snake's own body frees up as it moves.
+        :param max_moves: The longest path to return.
+        :return: The previous turn's path of the snake, moved to its head and the goal
+            (then around a cell on a corner that is no longer free), when it's still one of
+            the shortest paths. Otherwise None.
+        """
+        path = self._previous.get((snake.id, time_aware))
+        if path:
+            path = _follow(path, snake.head, goal)
+        if path:
+            path = self._repair(board, snake, path, time_aware)
+
+        # A path that is as long as the distance without any obstacle is a shortest path.
+        if (
+            not path
+            or len(path) - 1 != abs(goal.x - snake.head.x) + abs(goal.y - snake.head.y)
+            or (max_moves is not None and len(path) - 1 > max_moves)
+        ):
+            self.missed += 1
+            return None
+
+        self.inherited += 1
+        self.remember(snake, time_aware, path)
+        return path
+
+    def _repair(
+        self, board: Board, snake: Snake, path: List[Point], time_aware: bool
+    ) -> Optional[List[Point]]:
+        """
+        :return: The path, where the cells that are no longer free are replaced by the
+            other corner of their turn, None if not possible.
+        """
+        bits = board.bitboard
+        occupancy = board.occupancy
+        own_body = bits.bodies.get(snake.id, 0)
+        # The other bodies stay (the same as the `DistanceField`s), unlike our own.
+        others = bits.occupied & ~own_body
+
+        def blocked(point: Point, moves: int) -> bool:
+            bit = bits.bit(point)
+            if not bit or others & bit:
+                return True
+            if own_body & bit:
+                return not time_aware or not occupancy.is_free(point, moves)
+            return False
+
+        path = list(path)
+        # Not the goal, it may be an obstacle.
+        for moves in range(1, len(path) - 1):
+            point = path[moves]
+            if not blocked(point, moves):
+                continue
+
+            before = path[moves - 1]
+            after = path[moves + 1]
+            if before.x == after.x or before.y == after.y:
+                return None
+
+            corner = Point(before.x + after.x - point.x, before.y + after.y - point.y)
+            if blocked(corner, moves):
+                return None
+            path[moves] = board.grid.point(corner.x, corner.y)
+            self.repaired += 1
+
+        return path
+
+    def stats(self) -> dict:
+        return {
+            "inherited": self.inherited,
+            "repaired": self.repaired,
+            "missed": self.missed,
+        }
+
+
+def _follow(path: List[Point], start: Point, goal: Point) -> Optional[List[Point]]:
+    """
+    :return: The path from the `start` to the `goal`, when they moved along the path or
+        one cell away from its ends. Otherwise None.
+    """
+    if start in path:
+        path = path[path.index(start) :]
+    elif path[0] in start.neighbors:
+        path = [start] + path
+    else:
+        return None
+
+    if goal in path:
+        path = path[: path.index(goal) + 1]
+    elif path[-1] in goal.neighbors:
+        path = path + [goal]
+    else:
+        return None
+
+    return path
+
+
+class TurnMemory:
+    """
+    What a game keeps from one turn to the next, to start from.
+    """
+
+    __slots__ = "paths", "best_moves", "mcts_tree", "inherited"
+
+    def __init__(self):
+        self.paths = PathMemory()
+        # State key => our best move, of the alpha-beta searches
+        self.best_moves = TranspositionTable(BEST_MOVES_SIZE)
+        # The Monte Carlo tree below the move we played
+        self.mcts_tree: Optional[MctsNode] = None
+        # The number of nodes (or paths) inherited this turn, by kind
+        self.inherited: Dict[str, int] = {}
+
+    def next_turn(self):
+        self.paths.next_turn()
+        self.inherited = {}
+
+    def clear(self):
+        """
+        Forgets everything, when the previous turn wasn't the one just before.
+        """
+        self.paths.clear()
+        self.best_moves.clear()
+        self.mcts_tree = None
+        self.inherited = {}
+
+    def speculate(self) -> "TurnMemory":
+        """
+        :return: The memory to analyze a likely board of the next turn ahead of time: from
+            this turn's paths and tree, sharing the best moves (which are by state).
+        """
+        memory = TurnMemory.__new__(TurnMemory)
+        memory.paths = PathMemory()
+        memory.paths._previous = self.paths._current
+        memory.best_moves = self.best_moves
+        memory.mcts_tree = self.mcts_tree
+        memory.inherited = {}
+        return memory
+
+    def adopt(self, memory: "TurnMemory"):
+        """
+        Keeps what a `speculate`d memory computed, when its board is this turn's.
+        """
+        self.paths._current = memory.paths._current
+        self.mcts_tree = memory.mcts_tree
+        self.inherited = memory.inherited
@@ -4,12 +4,22 @@ For instructions see https://github.com/BattlesnakeOfficial/starter-snake-python
 """
 
 import argparse
+import atexit
 import os
 import time
 
 import cherrypy
 
-from game import Game
+import log
+
+from anytime import DEFAULT_NETWORK_MARGIN_MS, Deadline
+from decode import decode_request
+from game import Game, MOVE_MODE_HEURISTIC, MOVE_MODE_MCTS, MOVE_MODES
+from mcts import warm_up as warm_up_mcts
+from parallel import warm_up
+from ponder import DEFAULT_PONDER_CPU_MS, DEFAULT_PONDER_MAX_GAMES
+from record import RECORD_END, RECORD_MOVE, RECORD_START, Recorder
+from registry import DEFAULT_IDLE_SECONDS, DEFAULT_MAX_GAMES, GameRegistry
 
 
 class Battlesnake(object):
@@ -24,12 +34,32 @@ class Battlesnake(object):
         color: str = "",
         head_type: str = "",
         tail_type: str = "",
+        move_mode: str = MOVE_MODE_HEURISTIC,
+        network_margin_ms: int = DEFAULT_NETWORK_MARGIN_MS,
+        mcts_processes: int = None,
+        ponder: bool = False,
+        ponder_cpu_ms: int = DEFAULT_PONDER_CPU_MS,
+        ponder_max_games: int = DEFAULT_PONDER_MAX_GAMES,
+        move_processes: int = 1,
+        recorder: Recorder = None,
+        idle_seconds: float = DEFAULT_IDLE_SECONDS,
+        max_games: int = DEFAULT_MAX_GAMES,
     ):
-        self.games = {}
+        self.games = GameRegistry(
+            self.create_game, idle_seconds, max_games, self._evicted
+        )
         self._author = author
         self._color = color
         self._head_type = head_type
         self._tail_type = tail_type
+        self._move_mode = move_mode
+        self._network_margin_ms = network_margin_ms
+        self._mcts_processes = mcts_processes
+        self._ponder = ponder
+        self._ponder_cpu_ms = ponder_cpu_ms
+        self._ponder_max_games = ponder_max_games
+        self._move_processes = move_processes
+        self._recorder = recorder
 
     @cherrypy.expose
     @cherrypy.tools.json_out()
@@ -49,57 +79,88 @@ class Battlesnake(object):
     def start(self):
         # This function is called every time your snake is entered into a game.
         # cherrypy.request.json contains information about the game that's about to be played.
-        g, data = self.game_from_request()
+        data = cherrypy.request.json
+        if self._recorder:
+            self._recorder.record(RECORD_START, data)
 
-        g.start(data)
+        with self.games.game(data) as g:
+            g.start(data)
 
         return "OK"
 
     @cherrypy.expose
-    @cherrypy.tools.json_in()
     @cherrypy.tools.json_out()
     def move(self):
 
         # This function is called on every turn of a game. It's how your snake decides where to move.
         # Valid moves are "up", "down", "left", or "right".
-        g, data = self.game_from_request()
-
-        print(f"TURN {g.turn} beginning...")
         start = time.perf_counter()
-        try:
-            return g.move(data)
-        finally:
-            end = time.perf_counter()
-            print(f"TURN {g.turn} response in {end - start:0.3f} seconds")
+        # Decoded straight into the board's points (instead of `json_in`).
+        data = decode_request(cherrypy.request.body.read())
+
+        with self.games.game(data) as g:
+            log.info("TURN {} beginning...", g.turn)
+            response = None
+            try:
+                response = g.move(
+                    data, Deadline.from_request(data, self._network_margin_ms, start)
+                )
+                return response
+            finally:
+                end = time.perf_counter()
+                log.info("TURN {} response in {:0.3f} seconds", g.turn, end - start)
+                if self._recorder:
+                    self._recorder.record(RECORD_MOVE, data, response, end - start)
 
     @cherrypy.expose
     @cherrypy.tools.json_in()
     def end(self):
         # This function is called when a game your snake was in ends.
         # It's purely for informational purposes, you don't have to make any decisions here.
-        g, data = self.game_from_request()
+        data = cherrypy.request.json
+        if self._recorder:
+            self._recorder.record(RECORD_END, data)
 
-        result = g.end(data)
+        with self.games.game(data, create=False) as g:
+            if g is None:
+                # Already evicted (or never started here), nothing to end.
+                return "ok"
+            result = g.end(data)
 
-        self.games.pop(g.game_id, None)
+        self.games.remove(g.game_id)
 
         return result
 
-    def game_from_request(self):
+    @cherrypy.expose
+    @cherrypy.tools.json_out()
+    def stats(self):
+        # The gauges of the games played at once (and of their recording).
+        stats = {"games": self.games.gauges()}
+        if self._recorder:
+            stats["recorder"] = self._recorder.stats()
+        return stats
+
+    def _evicted(self, game: Game):
+        # Its end request was lost, so was the end of its recording.
+        if self._recorder:
+            self._recorder.close_game(game.game_id)
+
+    def create_game(self, data: dict) -> Game:
         """
-        :return: A Game object for the specified game, and the current request data.
+        :param data: The first request received for the game.
+        :return: A new Game, with the server's options.
         """
-        # TODO: This has thread safety issues that should probably be addressed
-        data = cherrypy.request.json
-        _id = data["game"]["id"]
-        if _id in self.games:
-            game = self.games[_id]
-            game.turn = int(data["turn"])
-            return game, data
-        else:
-            g = Game(data)
-            self.games[_id] = g
-            return g, data
+        return Game(
+            data,
+            move_mode=self._move_mode,
+            network_margin_ms=self._network_margin_ms,
+            mcts_processes=self._mcts_processes,
+            ponder=self._ponder,
+            ponder_cpu_ms=self._ponder_cpu_ms,
+            ponder_max_games=self._ponder_max_games,
+            move_processes=self._move_processes,
+            played_games=lambda: len(self.games),
+        )
 
 
 if __name__ == "__main__":
@@ -142,13 +203,125 @@ if __name__ == "__main__":
         required=False,
     )
 
+    parser.add_argument(
+        "--move-mode",
+        help="How to decide every move, all but 'heuristic' respect the game's timeout.",
+        choices=MOVE_MODES,
+        default=MOVE_MODE_HEURISTIC,
+        required=False,
+    )
+
+    parser.add_argument(
+        "--network-margin",
+        help="The milliseconds of the game's timeout kept for the response to get back (unless in 'heuristic' mode).",
+        type=int,
+        default=DEFAULT_NETWORK_MARGIN_MS,
+        required=False,
+    )
+
+    parser.add_argument(
+        "--mcts-processes",
+        help="The number of processes searching the moves in 'mcts' mode (one per CPU core by default).",
+        type=int,
+        default=None,
+        required=False,
+    )
+
+    parser.add_argument(
+        "--ponder",
+        help="Analyze the likely next boards while waiting for the next move request.",
+        action="store_true",
+        required=False,
+    )
+
+    parser.add_argument(
+        "--ponder-cpu",
+        help="The milliseconds of CPU time of the pondering of a game between two move requests.",
+        type=int,
+        default=DEFAULT_PONDER_CPU_MS,
+        required=False,
+    )
+
+    parser.add_argument(
+        "--ponder-max-games",
+        help="The most games played at once to keep pondering (it pauses above).",
+        type=int,
+        default=DEFAULT_PONDER_MAX_GAMES,
+        required=False,
+    )
+
+    parser.add_argument(
+        "--move-processes",
+        help="The number of processes evaluating our candidate moves at once (1 to evaluate them in the server's process). Sending a turn to them costs about 2ms, only worth it with CPU cores to spare.",
+        type=int,
+        default=1,
+        required=False,
+    )
+
+    parser.add_argument(
+        "--idle-seconds",
+        help="The seconds without a request after which a game is dropped (e.g. its end request was lost).",
+        type=float,
+        default=DEFAULT_IDLE_SECONDS,
+        required=False,
+    )
+
+    parser.add_argument(
+        "--max-games",
+        help="The most games kept at once, the least recently played are dropped above.",
+        type=int,
+        default=DEFAULT_MAX_GAMES,
+        required=False,
+    )
+
+    parser.add_argument(
+        "--log-level",
+        help="How much to log, from only the errors to everything (e.g. every request).",
+        choices=list(log.LEVELS),
+        default="info",
+        required=False,
+    )
+
+    parser.add_argument(
+        "--record",
+        help="The directory where to record every game (replayed by record.py).",
+        default=None,
+        required=False,
+    )
+
     args = parser.parse_args()
+    log.set_level(args.log_level)
 
     print(
         f"Snake: Author = {args.author} / Color = {args.color} / Head = {args.head} / Tail = {args.tail}"
     )
 
-    server = Battlesnake(args.author, args.color, args.head, args.tail)
+    recorder = None
+    if args.record:
+        recorder = Recorder(args.record)
+        # The games still playing are cut short, but their files are complete.
+        atexit.register(recorder.close)
+
+    server = Battlesnake(
+        args.author,
+        args.color,
+        args.head,
+        args.tail,
+        move_mode=args.move_mode,
+        network_margin_ms=args.network_margin,
+        mcts_processes=args.mcts_processes,
+        ponder=args.ponder,
+        ponder_cpu_ms=args.ponder_cpu,
+        ponder_max_games=args.ponder_max_games,
+        move_processes=args.move_processes,
+        recorder=recorder,
+        idle_seconds=args.idle_seconds,
+        max_games=args.max_games,
+    )
+    # Releases the games whose end request was lost, even without other requests.
+    server.games.start_sweeper()
+    atexit.register(server.games.close)
+
     cherrypy.config.update(
         {
             "server.socket_host": "0.0.0.0",
@@ -156,5 +329,13 @@ if __name__ == "__main__":
             "server.socket_port": int(os.environ.get("PORT", args.port)),
         }
     )
+    if args.move_mode == MOVE_MODE_MCTS:
+        # Before the first move, which can't wait for the search processes to start.
+        warm_up_mcts(args.mcts_processes)
+
+    if args.move_processes > 1:
+        # Before the first move, which can't wait for the processes to start.
+        warm_up(args.move_processes)
+
     print("Starting Battlesnake Server...")
     cherrypy.quickstart(server)
@@ -0,0 +1,158 @@
+"""
+Voronoi territory of the snakes on a board, i.e. which snake can get to each cell first.
+
+Every snake head is searched at once (a simultaneous multi-source breadth-first search)
+on NumPy arrays, where each step grows the frontier of every snake by one move.
+"""
+
+import weakref
+
+from typing import List
+
+import numpy
+
+from models import Board, Point, Snake
+
+# Owner of the cells that no snake can reach (including the snake bodies).
+NO_OWNER = -1
+
+# Owner of the cells reached first by more than one snake of the same length.
+CONTESTED = -2
+
+# Board => Territory
+_territories = weakref.WeakKeyDictionary()
+
+# (width, height) => (board cell indexes, neighbor indexes) in the bordered frontier
+_board_neighbors = {}
+
+
+class Territory:
+    """
+    The owner (index of the snake in `snakes`) and distance (in moves from that
+    snake's head) of every cell of a board, indexed `[y, x]`.
+
+    When many snakes get to a cell in the same number of moves, the longest snake
+    owns it (it would win a head-to-head collision), if they are the same length
+    the cell is `CONTESTED`.
+    """
+
+    __slots__ = "board", "snakes", "owner", "distance"
+
+    def __init__(self, board: Board, snakes: List[Snake] = None):
+        """
+        :param board: The board (with obstacles) to search.
+        :param snakes: The snakes to compete for the board, all the board snakes by default.
+        """
+        self.board = board
+        self.snakes = list(board.snakes) if snakes is None else snakes
+
+        width = board.size.x
+        height = board.size.y
+        inner, neighbors = _neighbors(width, height)
+
+        # Every claimed cell gets a code of the snake length followed by the snake index bits,
+        # so the strongest claim is the largest code, and the largest index is for contested cells.
+        index_bits = max(1, len(self.snakes).bit_length())
+        contested = (1 << index_bits) - 1
+
+        open_cells = numpy.ones(width * height, dtype=bool)
+        for snake in board.snakes:
+            for point in snake.body:
+                open_cells[point.y * width + point.x] = False
+
+        codes = numpy.zeros(width * height, dtype=numpy.int32)
+        distance = numpy.full(width * height, -1, dtype=numpy.int16)
+        for index, snake in enumerate(self.snakes):
+            head = snake.head.y * width + snake.head.x
+            codes[head] = (snake.size << index_bits) | index
+            distance[head] = 0
+            # Heads are never part of another snake's territory.
+            open_cells[head] = False
+
+        # The frontier codes have an empty border, so the neighbors of the board cells
+        # never wrap around the board.
+        frontier = numpy.zeros((height + 2) * (width + 2), dtype=numpy.int32)
+        frontier[inner] = codes
+
+        step = 0
+        while True:
+            step += 1
+
+            reached = frontier[neighbors]
+            strongest = reached.max(axis=0)
+            strongest *= open_cells
+
+            claimed = strongest > 0
+            if not claimed.any():
+                break
+
+            # Other snakes of the same length got there at the same time.
+            reached ^= strongest
+            strongest[((reached > 0) & (reached <= contested)).any(axis=0)] |= contested
+
+            frontier[inner] = strongest
+            codes[claimed] = strongest[claimed]
+            distance[claimed] = step
+            open_cells &= ~claimed
+
+        owner = (codes & contested).astype(numpy.int8)
+        owner[owner == contested] = CONTESTED
+        owner[codes == 0] = NO_OWNER
+
+        self.owner = owner.reshape(height, width)
+        self.distance = distance.reshape(height, width)
+
+    def owner_of(self, point: Point) -> Snake:
+        """
+        :return: The snake that gets to the point first, None if nobody (or more than one snake) does.
+        """
+        if not point.in_bounds(self.board.size):
+            return None
+
+        owner = self.owner[point.y, point.x]
+        return self.snakes[owner] if owner >= 0 else None
+
+    def distance_to(self, point: Point) -> int:
+        """
+        :return: The number of moves for the first snake to get to the point, None if unreachable.
+        """
+        if not point.in_bounds(self.board.size):
+            return None
+
+        distance = self.distance[point.y, point.x]
+        return int(distance) if distance >= 0 else None
+
+    def area(self, snake: Snake) -> int:
+        """
+        :return: The number of cells owned by the snake (including its head).
+        """
+        return int((self.owner == self.snakes.index(snake)).sum())
+
+
+def territory(board: Board) -> Territory:
+    """
+    :return: The Territory of all the board snakes, computed on the first request
+        for that board (i.e. once per turn).
+    """
+    board_territory = _territories.get(board)
+    if board_territory is None:
+        board_territory = _territories[board] = Territory(board)
+
+    return board_territory
+
+
+def _neighbors(width: int, height: int) -> tuple:
+    """
+    :return: The indexes of the board cells in an array with a border of one cell,
+        and the indexes of their 4 neighbors (in the `Move` order).
+    """
+    key = (width, height)
+    if key not in _board_neighbors:
+        stride = width + 2
+        bordered = numpy.arange(stride * (height + 2)).reshape(height + 2, stride)
+        inner = bordered[1:-1, 1:-1].ravel()
+        _board_neighbors[key] = (
+            inner,
+            numpy.stack([inner + stride, inner - stride, inner - 1, inner + 1]),
+        )
+    return _board_neighbors[key]
@@ -0,0 +1,54 @@
+import pytest
+
+from anytime import Deadline, deepen, fallback_move
+from game import Game, MOVE_MODE_ANYTIME
+from models import Board, Point
+from tests.test_server import _load_game_data
+
+
+@pytest.fixture()
+def game_data():
+    return _load_game_data("future_dead_end_001.json")
+
+
+def test_deadline_from_request(game_data):
+    deadline = Deadline.from_request(game_data, margin_ms=100, start=10)
+
+    # The game timeout is 500ms
+    assert deadline.end == pytest.approx(10.4)
+    assert deadline.expired()
+    assert Deadline(1).remaining() > 0.9
+
+
+def test_fallback_move(game_data):
+    board = Board.parse(game_data)
+
+    assert fallback_move(board) in list(board.valid_snake_moves(board.me))
+
+
+def test_deepen(game_data):
+    board = Board.parse(game_data)
+    moves = [Point(2, 9), Point(4, 9)]
+
+    depths = list(deepen(board, moves, Deadline(10)))
+
+    assert [depth for depth, _ in depths] == list(range(1, board.me.size + 1))
+    assert all(depths[-1][1].values())
+
+    # Nothing is completed once the deadline has passed.
+    assert list(deepen(board, moves, Deadline(0), max_depth=100)) == []
+
+
+def test_anytime_move(game_data):
+    expected = Game(game_data).move(game_data)["move"]
+
+    anytime_game = Game(game_data, move_mode=MOVE_MODE_ANYTIME)
+    assert anytime_game.move(game_data)["move"] == expected
+
+    # Out of time, but still a valid move
+    assert anytime_game.move(game_data, Deadline(0))["move"] in ["left", "right"]
+
+
+def test_unknown_move_mode(game_data):
+    with pytest.raises(ValueError):
+        Game(game_data, move_mode="unknown")
@@ -1,7 +1,14 @@
 import pytest
 
-from models import Board, Point
-from astar import AStarSnakePathSolver
+from models import Board, HeatMap, Point, Snake
+from astar import (
+    AStarSnakePathSolver,
+    HeapAStarSnakePathSolver,
+    find_path,
+    measure_search,
+    SOLVER_HEAP,
+    SOLVER_LEGACY,
+)
 from tests.test_server import _load_game_data
 
 
@@ -127,3 +134,121 @@ def test_find_other_snake_head_without_movement_and_alternate(test_board: Board)
         Point(2, 4),
         Point(3, 4),
     ]
+
+
+def test_heap_find_other_snake_head_without_movement(test_board: Board):
+    goal = Point(3, 4)
+
+    a = HeapAStarSnakePathSolver(test_board.me, goal, test_board, move_snake=False)
+    a.solve()
+
+    # Unlike the legacy solver, the shortest path is found without alternates.
+    assert a.path == [
+        Point(1, 0),
+        Point(0, 0),
+        Point(0, 1),
+        Point(0, 2),
+        Point(0, 3),
+        Point(0, 4),
+        Point(1, 4),
+        Point(2, 4),
+        Point(3, 4),
+    ]
+    assert a.expanded <= len(test_board.grid.cells)
+
+
+def test_heap_find_tail(test_board: Board):
+    path = find_path(
+        test_board.me,
+        test_board.me.tail,
+        test_board,
+        move_snake=True,
+        solver=SOLVER_HEAP,
+    )
+
+    assert path == [
+        Point(1, 0),
+        Point(2, 0),
+        Point(2, 1),
+        Point(2, 2),
+        Point(3, 2),
+        Point(4, 2),
+    ]
+
+
+def test_heap_expansion_limit(test_board: Board):
+    goal = Point(3, 4)
+
+    a = HeapAStarSnakePathSolver(
+        test_board.me, goal, test_board, move_snake=False, max_expansions=3
+    )
+
+    assert not a.solve()
+    assert a.expanded == 3
+
+    a = HeapAStarSnakePathSolver(
+        test_board.me,
+        goal,
+        test_board,
+        move_snake=False,
+        max_expansions=3,
+        return_closest=True,
+    )
+
+    closest = a.solve()
+    assert closest[0] == test_board.me.head
+    assert len(closest) > 1
+
+
+def test_heap_node_stats():
+    board = Board.parse(_load_game_data("large_board_quick_response_001.json"))
+    goal = board.others[0].head
+
+    legacy = AStarSnakePathSolver(board.me, goal, board, move_snake=False)
+    legacy_stats = measure_search(legacy)
+    heap = HeapAStarSnakePathSolver(board.me, goal, board, move_snake=False)
+    heap_stats = measure_search(heap)
+
+    assert legacy.path == heap.path == []
+    assert heap_stats["peak_nodes"] < legacy_stats["peak_nodes"]
+    assert heap_stats["bytes_per_node"] * 10 < legacy_stats["bytes_per_node"]
+
+
+def test_find_path_does_not_change_snake(test_board: Board):
+    snake_id = test_board.me.id
+
+    AStarSnakePathSolver(test_board.me, Point(3, 4), test_board, move_snake=False)
+
+    assert test_board.me.id == snake_id
+
+
+def test_find_path_through_moving_snake():
+    me = Snake(
+        id="1", name="me", health=90, body=[Point(0, 4), Point(0, 3), Point(0, 2)]
+    )
+    wall = Snake(
+        id="2",
+        name="wall",
+        health=90,
+        body=[Point(2, 0), Point(2, 1), Point(2, 2), Point(2, 3), Point(2, 4)],
+    )
+    board = Board(
+        game_id="test",
+        my_id=me.id,
+        size=Point(5, 5),
+        snakes={me.id: me, wall.id: wall},
+        food=[],
+        heat=HeatMap(),
+    )
+
+    for solver in (SOLVER_LEGACY, SOLVER_HEAP):
+        assert find_path(me, Point(4, 4), board, solver=solver) == []
+
+        # The tail of the wall is gone by the time we get there.
+        assert find_path(me, Point(4, 4), board, solver=solver, time_aware=True) == [
+            Point(0, 4),
+            Point(1, 4),
+            Point(2, 4),
+            Point(3, 4),
+            Point(4, 4),
+        ]
@@ -0,0 +1,60 @@
+import pytest
+
+from anytime import Deadline
+from brs import WIN, BestReplySearch, BrsState
+from game import Game, MOVE_MODE_BRS
+from models import Board, HeatMap, Point, Snake
+from tests.test_server import _load_game_data
+
+
+def _brs_board(me: Snake, others, food=()) -> Board:
+    return Board(
+        game_id="brs",
+        my_id=me.id,
+        size=Point(7, 7),
+        snakes={snake.id: snake for snake in [me] + others},
+        food=list(food),
+        heat=HeatMap(),
+    )
+
+
+def test_best_reply_avoids_head_to_head():
+    me = Snake("me", "me", 90, [Point(3, 3), Point(3, 2), Point(3, 1)])
+    longer = Snake(
+        "longer", "longer", 90, [Point(5, 3), Point(6, 3), Point(6, 2), Point(6, 1)]
+    )
+    far = Snake("far", "far", 90, [Point(0, 6), Point(1, 6), Point(2, 6)])
+    board = _brs_board(me, [longer, far])
+
+    search = BestReplySearch(board, Deadline(10), max_depth=1, radius=3)
+
+    # The far snake is left out of the search.
+    assert search.opponents == [1]
+    assert search.search() != Point(4, 3)
+    assert search.stats()["timings"][0][0] == 1
+
+    search = BestReplySearch(board, Deadline(10), max_depth=1, radius=3)
+    assert search.search([Point(4, 3)]) == Point(4, 3)
+    assert search.scores[Point(4, 3)] == -WIN
+
+
+def test_best_reply_move_kills_one_snake():
+    me = Snake("me", "me", 90, [Point(3, 3), Point(3, 2), Point(3, 1), Point(3, 0)])
+    other = Snake("other", "other", 90, [Point(4, 4), Point(5, 4), Point(6, 4)])
+    board = _brs_board(me, [other])
+
+    search = BestReplySearch(board, Deadline(10))
+    grid = board.grid
+    state = search._move(BrsState.of(board), 1, grid.index(Point(3, 4)))
+    state = search._move(state, 0, grid.index(Point(3, 4)))
+
+    # Moving into a shorter snake's head is a head-to-head win.
+    assert state.bodies[1] == ()
+    assert state.bodies[0][0] == grid.index(Point(3, 4))
+
+
+def test_brs_move_mode():
+    game_data = _load_game_data("avoid_danger_001.json")
+
+    move = Game(game_data, move_mode=MOVE_MODE_BRS).move(game_data)["move"]
+    assert move in ["up", "down", "left", "right"]
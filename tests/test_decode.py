@@ -0,0 +1,113 @@
+import json
+
+import pytest
+
+from decode import decode_request, request_text
+from game import Game
+from models import Board, Point
+from tests.test_models import _next_turn
+from tests.test_server import _load_game_data
+
+
+def _large_request(width: int, height: int, num_snakes: int = 8) -> dict:
+    """
+    :return: A move request where the snakes fill the board, row after row.
+    """
+    data = _load_game_data("avoid_danger_001.json")
+    data["board"]["width"] = width
+    data["board"]["height"] = height
+
+    template = data["board"]["snakes"][0]
+    rows = height // num_snakes
+    snakes = []
+    for index in range(num_snakes):
+        body = []
+        for row in range(rows):
+            xs = range(width) if row % 2 == 0 else reversed(range(width))
+            body += [{"x": x, "y": index * rows + row} for x in xs]
+        # Not the last cell, to have somewhere to move.
+        body = body[:-1]
+        snakes.append(
+            dict(template, id=f"snake-{index}", body=body, head=body[0], length=len(body))
+        )
+
+    data["board"]["snakes"] = snakes
+    data["board"]["food"] = [{"x": x, "y": height - 1} for x in range(width)]
+    data["you"] = snakes[0]
+    return data
+
+
+def test_decode_request():
+    data = _load_game_data("avoid_danger_001.json")
+    body = json.dumps(data)
+
+    request = decode_request(body.encode())
+    assert request.raw == body
+    assert request_text(request) == body
+    assert json.loads(request_text(dict(request))) == data
+
+    snake = request["board"]["snakes"][0]
+    assert snake["head"] is Point(snake["head"].x, snake["head"].y)
+    assert all(isinstance(point, Point) for point in snake["body"])
+    assert request["game"] == data["game"]
+
+    board = Board.parse(request)
+    assert board.differences(Board.parse(data)) == []
+
+
+def test_decode_mixed_points():
+    data = _load_game_data("avoid_danger_001.json")
+    expected = Board.parse(data)
+
+    def y_first(pairs: dict) -> dict:
+        if pairs.keys() == {"x", "y"}:
+            return {"y": pairs["y"], "x": pairs["x"]}
+        return pairs
+
+    # Whatever the key order of the points, and when only some of them are Points.
+    body = json.dumps(json.loads(json.dumps(data), object_hook=y_first))
+    decoded = decode_request(body)
+    assert decoded["you"]["head"] is expected.me.head
+    assert Board.parse(decoded).differences(expected) == []
+
+    request = json.loads(body)
+    for snake in request["board"]["snakes"]:
+        snake["body"] = [
+            (Point(point["x"], point["y"]) if index % 2 else point)
+            for index, point in enumerate(snake["body"])
+        ]
+        assert list(snake["head"]) == ["y", "x"]
+    assert Board.parse(request).differences(expected) == []
+
+
+def test_game_moves_on_decoded_requests():
+    data = _load_game_data("avoid_danger_001.json")
+    expected = Game(data).move(data)
+
+    game = Game(data, validate_updates=True)
+    assert game.move(decode_request(json.dumps(data))) == expected
+
+    board = Board.parse(data)
+    moves = {}
+    for snake in board.snakes:
+        moves[snake.id] = next(
+            move
+            for move in board.valid_snake_moves(snake)
+            if (snake is not board.me or snake.get_move_name(move) == expected["move"])
+            and move not in moves.values()
+        )
+
+    # The board of the next turn is updated from the decoded request.
+    game.move(decode_request(json.dumps(_next_turn(data, moves))))
+    assert game._board.differences(Board.parse(_next_turn(data, moves))) == []
+
+
+@pytest.mark.parametrize("width,height", [(11, 11), (25, 25)])
+def test_decode_large_requests(width, height):
+    body = json.dumps(_large_request(width, height))
+
+    data = json.loads(body)
+    request = decode_request(body.encode())
+    assert Board.parse(request).differences(Board.parse(data)) == []
+    assert request_text(request) == body
+    assert json.loads(request_text(dict(request))) == data
@@ -0,0 +1,71 @@
+import pytest
+
+from distance import DistanceField, distance_field
+from models import Board, Point
+from tests.test_server import _load_game_data
+
+
+@pytest.fixture()
+def test_board():
+    game_data = _load_game_data("future_dead_end_007.json")
+    board = Board.parse(game_data)
+    return board
+
+
+def test_distance_to_own_tail(test_board: Board):
+    field = DistanceField(test_board, test_board.me)
+
+    # Our body is an obstacle, but we can reach the tail as the last move.
+    assert field.distance(test_board.me.tail) == 5
+    assert field.path(test_board.me.tail, max_moves=4) == []
+    assert field.path(test_board.me.tail) == [
+        Point(1, 0),
+        Point(2, 0),
+        Point(2, 1),
+        Point(3, 1),
+        Point(4, 1),
+        Point(4, 2),
+    ]
+
+
+def test_time_aware_distance_to_own_tail(test_board: Board):
+    field = DistanceField(test_board, test_board.me, time_aware=True)
+
+    assert field.path(test_board.me.tail) == [
+        Point(1, 0),
+        Point(2, 0),
+        Point(2, 1),
+        Point(2, 2),
+        Point(3, 2),
+        Point(4, 2),
+    ]
+
+
+def test_distance_to_other_snake_head(test_board: Board):
+    field = DistanceField(test_board, test_board.me)
+
+    path = field.path(Point(3, 4))
+
+    assert len(path) == 9
+    assert path[0] == test_board.me.head
+    assert path[-1] == Point(3, 4)
+    assert all(
+        abs(a.x - b.x) + abs(a.y - b.y) == 1 for a, b in zip(path, path[1:])
+    ), "Every step of the path is a single move."
+
+
+def test_unreachable(test_board: Board):
+    field = DistanceField(test_board, test_board.me)
+
+    assert field.distance(Point(-1, 0)) is None
+    assert field.path(Point(-1, 0)) == []
+
+
+def test_distance_field_cached_per_board(test_board: Board):
+    field = distance_field(test_board, test_board.me)
+
+    assert distance_field(test_board, test_board.me) is field
+    assert distance_field(test_board, test_board.me, time_aware=True) is not field
+
+    other_board = Board.parse(_load_game_data("future_dead_end_007.json"))
+    assert distance_field(other_board, other_board.me) is not field
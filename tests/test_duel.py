@@ -0,0 +1,74 @@
+import pytest
+
+from anytime import Deadline
+from duel import WIN, DuelSearch, DuelState
+from models import Board, HeatMap, Point, Snake
+from tests.test_server import _load_game_data
+
+
+def _duel_board(me: Snake, other: Snake, food=()) -> Board:
+    return Board(
+        game_id="duel",
+        my_id=me.id,
+        size=Point(5, 5),
+        snakes={me.id: me, other.id: other},
+        food=list(food),
+        heat=HeatMap(),
+    )
+
+
+def test_duel_avoids_losing_head_to_head():
+    me = Snake("me", "me", 90, [Point(1, 2), Point(0, 2), Point(0, 1)])
+    other = Snake(
+        "other", "other", 90, [Point(3, 2), Point(4, 2), Point(4, 1), Point(4, 0)]
+    )
+    board = _duel_board(me, other)
+
+    search = DuelSearch(board, Deadline(10), max_depth=1)
+
+    # Moving right could be a head-to-head with a longer snake.
+    assert search.search() != Point(2, 2)
+    assert search.scores[Point(2, 2)] == -WIN
+    assert search.stats()["depth"] == 1
+    assert search.stats()["nodes"] > 0
+
+
+def test_duel_takes_winning_head_to_head():
+    me = Snake(
+        "me", "me", 90, [Point(1, 3), Point(1, 2), Point(1, 1), Point(1, 0)]
+    )
+    # The other snake is stuck in the corner, it has to come out next to us.
+    other = Snake("other", "other", 90, [Point(0, 4), Point(1, 4), Point(2, 4)])
+    board = _duel_board(me, other)
+
+    search = DuelSearch(board, Deadline(10))
+
+    assert search.search() == Point(0, 3)
+    assert search.scores[Point(0, 3)] == WIN
+    # No need to look any deeper.
+    assert search.stats()["depth"] == 1
+
+
+def test_duel_state_step_eats_food():
+    me = Snake("me", "me", 50, [Point(1, 2), Point(0, 2), Point(0, 1)])
+    other = Snake("other", "other", 50, [Point(4, 4), Point(4, 3), Point(4, 2)])
+    board = _duel_board(me, other, food=[Point(2, 2)])
+
+    search = DuelSearch(board, Deadline(10))
+    grid = board.grid
+    state, outcome = search._step(
+        DuelState.of(board), grid.index(Point(2, 2)), grid.index(Point(3, 4))
+    )
+
+    assert outcome is None
+    assert state.healths == (100, 49)
+    assert len(state.bodies[0]) == 4
+    assert state.bodies[0][-1] == state.bodies[0][-2]
+    assert not state.food
+
+
+def test_duel_search_needs_one_opponent():
+    board = Board.parse(_load_game_data("future_dead_end_001.json"))
+
+    with pytest.raises(ValueError):
+        DuelSearch(board, Deadline(10))
@@ -0,0 +1,72 @@
+import pytest
+
+import log
+
+from game import Game
+from tests.test_server import _load_game_data
+
+
+class _Formatted:
+    """
+    Counts how many times it's formatted.
+    """
+
+    def __init__(self):
+        self.count = 0
+
+    def __format__(self, format_spec):
+        self.count += 1
+        return "formatted"
+
+
+@pytest.fixture
+def level():
+    previous = log.get_level()
+    yield
+    log.flush()
+    log.set_level(previous)
+
+
+def test_levels(level, capsys):
+    log.set_level("info")
+    formatted = _Formatted()
+
+    log.info("info {}", formatted)
+    log.verbose("verbose {}", formatted)
+    log.trace("trace {}", formatted)
+    log.error("error {}", formatted)
+    assert log.flush(5)
+
+    assert capsys.readouterr().out == "info formatted\nerror formatted\n"
+    assert formatted.count == 2
+
+    log.set_level(log.TRACE)
+    assert log.enabled(log.VERBOSE)
+    log.trace("{} {}", 1, {"a": 2})
+    log.verbose({"x": 1})
+    assert log.flush(5)
+    assert capsys.readouterr().out == "1 {'a': 2}\n{'x': 1}\n"
+
+    with pytest.raises(ValueError):
+        log.set_level("loud")
+
+
+def test_quiet_game(level, capsys):
+    data = _load_game_data("avoid_danger_001.json")
+    log.set_level(log.QUIET)
+
+    assert Game(data).move(data)["move"] == "down"
+    assert log.flush(5)
+    assert capsys.readouterr().out == ""
+
+
+def test_info_game(level, capsys):
+    data = _load_game_data("avoid_danger_001.json")
+    log.set_level(log.DEFAULT_LEVEL)
+
+    # A line per turn by default.
+    Game(data).move(data)
+    assert log.flush(5)
+    lines = capsys.readouterr().out.splitlines()
+    assert len(lines) == 1 and lines[0].startswith("MOVE")
+    assert log.DEFAULT_LEVEL == log.INFO
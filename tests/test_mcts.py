@@ -0,0 +1,122 @@
+import time
+
+from anytime import Deadline
+from game import Game, MOVE_MODE_MCTS
+from mcts import (
+    ROLLOUT_RANDOM,
+    MctsNode,
+    MonteCarloSearch,
+    Simulator,
+    _search_tree,
+    close_pool,
+    get_pool,
+    warm_up,
+)
+from models import Board, HeatMap, Point, Snake
+from tests.test_server import _load_game_data
+
+
+def _mcts_board(me: Snake, others, food=()) -> Board:
+    return Board(
+        game_id="mcts",
+        my_id=me.id,
+        size=Point(7, 7),
+        snakes={snake.id: snake for snake in [me] + others},
+        food=list(food),
+        heat=HeatMap(),
+    )
+
+
+def test_mcts_avoids_dead_end():
+    board = Board.parse(_load_game_data("future_dead_end_001.json"))
+
+    search = MonteCarloSearch(board, Deadline(0.3), processes=1)
+
+    # Right leads into a dead end.
+    assert search.search() == Point(2, 9)
+    assert search.stats()["playouts"] > 0
+
+    visits, reward = search.results[Point(2, 9)]
+    dead_end_visits, dead_end_reward = search.results[Point(4, 9)]
+    assert visits > dead_end_visits
+    assert reward / visits > dead_end_reward / dead_end_visits
+
+
+def test_simulator_head_to_head():
+    board = _mcts_board(
+        Snake("me", "me", 90, [Point(3, 3), Point(3, 2), Point(3, 1), Point(3, 0)]),
+        [Snake("other", "other", 90, [Point(5, 3), Point(6, 3), Point(6, 2)])],
+    )
+    grid = board.grid
+    simulator = Simulator(7, 7, ROLLOUT_RANDOM)
+    bodies = [
+        [grid.index(point) for point in snake.body] for snake in [board.me] + board.others
+    ]
+    healths = [90, 90]
+
+    move = grid.index(Point(4, 3))
+    simulator.step(bodies, healths, set(), [move, move])
+
+    # The longest snake survives.
+    assert bodies[0][0] == move
+    assert bodies[1] == []
+    assert healths == [89, 89]
+
+    # Our reward for being the last snake
+    root = MctsNode()
+    assert simulator.playout(root, bodies, healths, set(), 5) == 1.0
+    assert root.visits == 1
+
+
+def test_mcts_merges_parallel_trees():
+    game_data = _load_game_data("avoid_danger_001.json")
+    board = Board.parse(game_data)
+
+    try:
+        search = MonteCarloSearch(board, Deadline(0.2), processes=2)
+        move = search.search()
+    finally:
+        close_pool()
+
+    assert move in list(board.valid_snake_moves(board.me))
+    assert sum(visits for visits, _ in search.results.values()) == search.playouts
+    assert search.stats()["processes"] == 2
+
+
+def test_mcts_jobs_end_on_time():
+    board = Board.parse(_load_game_data("avoid_danger_001.json"))
+    grid = board.grid
+    snakes = [board.me] + board.others
+    job = (
+        board.size.x,
+        board.size.y,
+        [tuple(grid.index(point) for point in snake.body) for snake in snakes],
+        [snake.health for snake in snakes],
+        {grid.index(point) for point in board.food},
+        [grid.index(move) for move in board.valid_snake_moves(board.me)],
+        # A job that started after the end of its search (e.g. queued) stops at once.
+        time.time() - 1,
+        ROLLOUT_RANDOM,
+        5,
+        0.5,
+        None,
+    )
+    assert _search_tree(job)["playouts"] == 1
+
+    # The pool started ahead of the first search is the one it uses.
+    try:
+        warm_up(2)
+        pool = get_pool(2)
+        search = MonteCarloSearch(board, Deadline(0.1), processes=2)
+        assert search.search() in list(board.valid_snake_moves(board.me))
+        assert search.stats()["processes"] == 2
+        assert get_pool(2) is pool
+    finally:
+        close_pool()
+
+
+def test_mcts_move_mode():
+    game_data = _load_game_data("avoid_danger_001.json")
+
+    move = Game(game_data, move_mode=MOVE_MODE_MCTS, mcts_processes=1).move(game_data)
+    assert move["move"] in ["up", "down", "left", "right"]
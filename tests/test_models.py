@@ -1,7 +1,25 @@
+import json
+import pickle
+import random
 from typing import List
 
-from models import HeatMap, HeatType, Heat, Point, Snake, Board
-from game import is_closest_strongest_snake
+import pytest
+
+from models import (
+    BLOCKED,
+    HeatMap,
+    HeatType,
+    Heat,
+    Point,
+    Snake,
+    Board,
+    BitBoard,
+    Grid,
+    Move,
+    Occupancy,
+)
+from game import Game, is_closest_strongest_snake
+from tests.test_server import _load_game_data
 
 
 def test_point_in_set():
@@ -37,6 +55,64 @@ def test_point_in_dict():
     assert p4 not in dict1
 
 
+def test_point_interned():
+    p1 = Point(3, 4)
+
+    assert p1 is Point(3, 4)
+    assert p1 is Point(x="3", y="4")
+    assert p1 is pickle.loads(pickle.dumps(p1))
+    assert p1 + Move.up.value is Point(3, 5)
+    assert Move.all_move_points(p1) == (
+        Point(3, 5),
+        Point(3, 3),
+        Point(2, 4),
+        Point(4, 4),
+    )
+
+    with pytest.raises(AttributeError):
+        p1.x = 1
+
+
+def test_grid():
+    grid = Grid.of(11, 11)
+
+    assert grid is Grid.of(11, 11)
+    assert grid.point(2, 3) is Point(2, 3)
+    assert grid.index(Point(2, 3)) == 35
+    assert grid.cells[35] is Point(2, 3)
+    assert grid.point(-1, 3) is Point(-1, 3)
+
+
+def test_grid_geometry():
+    grid = Grid.of(7, 5)
+    board = BitBoard(7, 5)
+
+    # Shared by every board of the size.
+    assert board.edge(2) is grid.edge(2)
+    assert set(board.points(grid.corners)) == {
+        Point(0, 0),
+        Point(0, 4),
+        Point(6, 0),
+        Point(6, 4),
+    }
+    assert set(board.points(grid.edge(1))) == {
+        point
+        for point in grid.cells
+        if point.x in (0, 6) or point.y in (0, 4)
+    }
+
+    cells = len(grid.cells)
+    for a in grid.cells:
+        for b in grid.cells:
+            index = grid.index(a) * cells + grid.index(b)
+            assert grid.euclidean[index] == a.distance(b)
+            assert grid.manhattan[index] == abs(a.x - b.x) + abs(a.y - b.y)
+            assert grid.distance(a, b) == a.distance(b)
+
+    # Off the board, computed.
+    assert grid.distance(Point(-1, 0), Point(6, 4)) == Point(-1, 0).distance(Point(6, 4))
+
+
 def test_heatmap_goodness():
     hm = HeatMap()
 
@@ -182,6 +258,38 @@ def test_heatmap_heat_escalation():
     assert hm.goodness(p1) == HeatMap.DEATH_HEAT, "De-escalation is not possible"
 
 
+def _reference_goodness(heats) -> int:
+    if any(heat.type == HeatType.DEATH for heat in heats):
+        return HeatMap.DEATH_HEAT
+    return max(
+        HeatMap.DEATH_HEAT,
+        HeatMap.total_goodness(heats) * 1000
+        - 100 * sum(1 for heat in heats if heat.type == HeatType.POSSIBLE_DEATH)
+        - 10 * sum(1 for heat in heats if heat.type == HeatType.DANGER)
+        + sum(1 for heat in heats if heat.type == HeatType.GOOD),
+    )
+
+
+def test_heatmap_scores_as_added():
+    rng = random.Random(5)
+    heats = [heat for heat in vars(HeatMap).values() if isinstance(heat, Heat)]
+    heats.append(Heat("deep-danger", HeatType.DANGER, value=200))
+
+    hm = HeatMap()
+    for _ in range(300):
+        point = Point(rng.randrange(4), rng.randrange(4))
+        hm.add(point, rng.choice(heats))
+        assert hm.goodness(point) == _reference_goodness(hm.get(point))
+
+    # The best moves first, in order when as good.
+    game = Game(_load_game_data("avoid_danger_001.json"))
+    board = _make_test_board(Snake("me", "me", 90, [Point(1, 1), Point(1, 0)]), [])
+    moves = [Point(0, 1), Point(2, 1), Point(1, 2)]
+    board.heat.add(Point(2, 1), HeatMap.HEAT_FORWARD)
+    assert game.preferred_moves(board, moves) == [Point(2, 1), Point(0, 1), Point(1, 2)]
+    assert game.preferred_moves(board, moves, 1) == [Point(2, 1)]
+
+
 def test_is_closest_strongest_snake():
     me = Snake(id="1", name="me", health=1, body=[Point(10, 1), Point(9, 1)])
     other = Snake(id="2", name="other", health=1, body=[Point(8, 3), Point(7, 3)])
@@ -260,3 +368,245 @@ def _make_test_board(me: Snake, others: List[Snake]):
     )
 
     return board
+
+
+def test_snake_body_moves():
+    rng = random.Random(7)
+    start = Snake("a", "a", 90, [Point(2, 2), Point(2, 1), Point(2, 0), Point(2, 0)])
+
+    # Every simulated snake matches the same moves on a plain list.
+    for _ in range(20):
+        snake = start
+        body = start.body[:]
+        for _ in range(15):
+            move = rng.choice(Move.all_move_points(snake.head))
+            grow = rng.random() < 0.2
+            snake = snake.move_toward(move, grow)
+            body = [move] + (body if grow else body[:-1])
+
+            assert snake.body == body
+            assert (snake.head, snake.tail, snake.size) == (body[0], body[-1], len(body))
+            for point in Grid.of(5, 5).cells:
+                assert (point in snake) == (point in body)
+
+    # The stacked tail stays for one more move.
+    moved = start.move_direction(Move.up.value)
+    assert moved.body == [Point(2, 3), Point(2, 2), Point(2, 1), Point(2, 0)]
+    assert Point(2, 0) in moved
+    assert Point(2, 0) not in moved.move_direction(Move.up.value)
+
+    # Moved snakes share the segments of the starting one.
+    assert moved.segments._back is start.segments._back
+    assert start.body == [Point(2, 2), Point(2, 1), Point(2, 0), Point(2, 0)]
+
+    copied = pickle.loads(pickle.dumps(moved))
+    assert copied.body == moved.body
+    assert Point(2, 0) in copied and Point(3, 3) not in copied
+
+
+def test_far_points_are_not_interned():
+    interned = len(Point._interned)
+    far = Point(1000, -5)
+
+    # Built every time (no bit of their own), so a request can't grow the points kept.
+    assert far == Point(1000, -5) and far is not Point(1000, -5)
+    assert len(Point._interned) == interned
+
+    body = Snake("a", "a", 90, [Point(0, 0), Point(0, 1)]).segments
+    far_body = body.move(far).move(Point(1000, -4))
+    assert far in far_body and Point(1000, -4) in far_body
+    assert Point(0, 0) not in far_body and Point(1000, -6) not in far_body
+    assert Point(0, 0) in body.move(far)
+    assert Point(0, 0) in Snake("b", "b", 90, [far, Point(0, 0)])
+
+
+def test_bitboard_neighbors_do_not_wrap():
+    bits = BitBoard(3, 3)
+
+    left_middle = bits.bit(Point(0, 1))
+
+    assert bits.points(bits.neighbors(left_middle)) == [
+        Point(0, 0),
+        Point(1, 1),
+        Point(0, 2),
+    ]
+    assert bits.shift(left_middle, Move.left) == 0
+    assert bits.shift(bits.bit(Point(2, 2)), Move.up) == 0
+    assert bits.shift(bits.bit(Point(2, 0)), Move.right) == 0
+    assert bits.shift(bits.bit(Point(1, 0)), Move.down) == 0
+
+
+def test_bitboard_edge():
+    board = _make_test_board(
+        Snake(id="1", name="me", health=1, body=[Point(5, 5), Point(5, 4)]), []
+    )
+
+    assert board.on_edge(Point(0, 5))
+    assert board.on_edge(Point(10, 10))
+    assert not board.on_edge(Point(1, 5))
+    assert board.on_edge(Point(1, 5), size=2)
+    assert board.on_edge(Point(-1, 0))
+
+
+def test_valid_snake_moves_bitboard():
+    me = Snake(
+        id="1",
+        name="me",
+        health=90,
+        body=[Point(1, 1), Point(1, 2), Point(2, 2), Point(2, 1)],
+    )
+    other = Snake(id="2", name="other", health=1, body=[Point(0, 0), Point(0, 1)])
+    board = _make_test_board(me, [other])
+
+    # Left is the other snake's body, up is our body, but our tail will move.
+    assert list(board.valid_snake_moves(me)) == [Point(1, 0), Point(2, 1)]
+    assert list(board.valid_snake_moves(other)) == [Point(1, 0)]
+
+    # A future snake that isn't on the board must avoid every board snake.
+    future = me.move_toward(Point(1, 0))
+    assert list(board.valid_snake_moves(future)) == [Point(2, 0)]
+
+
+def test_valid_moves_mask_of_board_snakes():
+    data = _load_game_data("avoid_danger_001.json")
+    board = Board.parse(data)
+    board.occupancy
+
+    moves = {
+        snake.id: next(board.valid_snake_moves(snake)) for snake in board.snakes
+    }
+    # One snake eats, its tail is stacked on the next board.
+    eater = board.others[0]
+    data["board"]["food"].append({"x": moves[eater.id].x, "y": moves[eater.id].y})
+    next_board, _ = Board.parse(data).advance(_next_turn(data, moves))
+
+    for each_board in (board, next_board):
+        bits = each_board.bitboard
+        for snake in each_board.snakes:
+            # The board keeps the mask of its snakes' bodies, a copy builds its own.
+            copy = Snake(snake.id, snake.name, snake.health, list(snake.body))
+            assert bits.bodies[snake.id] == bits.mask(snake.body)
+            assert each_board.valid_moves_mask(snake) == each_board.valid_moves_mask(
+                copy
+            )
+
+
+def test_occupancy_free_times():
+    me = Snake(
+        id="1",
+        name="me",
+        health=100,
+        body=[Point(1, 1), Point(1, 2), Point(2, 2), Point(2, 2)],
+    )
+    other = Snake(id="2", name="other", health=1, body=[Point(0, 0), Point(0, 1)])
+    board = _make_test_board(me, [other])
+    occupancy = board.occupancy
+
+    # We just ate, so our tail stays one more move.
+    assert occupancy.free_time(Point(2, 2)) == 2
+    assert occupancy.free_time(Point(1, 1)) == 4
+    assert occupancy.free_time(Point(0, 1)) == 1
+    assert occupancy.free_time(Point(5, 5)) == 0
+    assert occupancy.is_free(Point(0, 1), 1)
+    assert not occupancy.is_free(Point(0, 0), 1)
+
+    assert board.bitboard.points(occupancy.occupied(2)) == [Point(1, 1), Point(1, 2)]
+    assert list(board.valid_snake_moves(me, occupied=occupancy.occupied(1))) == [
+        Point(1, 0),
+        Point(0, 1),
+        Point(2, 1),
+    ]
+
+    # Other bodies don't move unless they are told to.
+    occupancy = Occupancy(board.bitboard, board.snakes, moving=["1"])
+    assert occupancy.free_time(Point(0, 1)) == BLOCKED
+
+
+def _next_turn(data: dict, moves: dict, spawned=(), eliminated=()) -> dict:
+    """
+    :param moves: Snake ID => the new head of the snake (eating when it's food).
+    :return: The move request of the next turn, with the snakes moved.
+    """
+    data = json.loads(json.dumps(data))
+    data["turn"] += 1
+
+    food = [(point["x"], point["y"]) for point in data["board"]["food"]]
+    snakes = []
+    for snake in data["board"]["snakes"]:
+        if snake["id"] in eliminated:
+            continue
+
+        head = moves[snake["id"]]
+        body = [{"x": head.x, "y": head.y}] + snake["body"][:-1]
+        if (head.x, head.y) in food:
+            food.remove((head.x, head.y))
+            body.append(body[-1])
+            snake["health"] = 100
+        else:
+            snake["health"] -= 1
+        snake["body"] = body
+        snake["head"] = body[0]
+        snake["length"] = len(body)
+        snakes.append(snake)
+        if snake["id"] == data["you"]["id"]:
+            data["you"] = snake
+
+    data["board"]["snakes"] = snakes
+    data["board"]["food"] = [{"x": x, "y": y} for x, y in food] + [
+        {"x": point.x, "y": point.y} for point in spawned
+    ]
+    return data
+
+
+def test_board_advance():
+    data = _load_game_data("avoid_danger_001.json")
+    board = Board.parse(data)
+    board.occupancy
+
+    moves = {
+        snake.id: next(board.valid_snake_moves(snake)) for snake in board.snakes
+    }
+    # One snake eats
+    eater = board.others[0]
+    data["board"]["food"].append({"x": moves[eater.id].x, "y": moves[eater.id].y})
+    board = Board.parse(data)
+    board.occupancy
+
+    eliminated = board.others[-1].id
+    next_data = _next_turn(data, moves, spawned=[Point(0, 0)], eliminated=[eliminated])
+    next_board, delta = board.advance(next_data)
+
+    assert next_board.differences(Board.parse(next_data)) == []
+    assert delta.heads[board.me.id] == moves[board.me.id]
+    assert delta.eaten == [moves[eater.id]]
+    assert delta.spawned == [Point(0, 0)]
+    assert delta.eliminated == [eliminated]
+    assert delta.reparsed == []
+    assert next_board.others[0].size == eater.size + 1
+
+    # A snake that didn't move from its previous head is parsed again.
+    next_data["board"]["snakes"][0]["body"] = data["board"]["snakes"][0]["body"]
+    other_board, delta = board.advance(next_data)
+    assert delta.reparsed == [next_data["board"]["snakes"][0]["id"]]
+    assert other_board.differences(Board.parse(next_data)) == []
+
+
+def test_game_updates_board():
+    data = _load_game_data("avoid_danger_001.json")
+    game = Game(data, validate_updates=True)
+
+    for _ in range(5):
+        game.move(data)
+        board = Board.parse(data)
+
+        # No head-to-head, the game engine would remove the snakes.
+        moves = {}
+        for snake in board.snakes:
+            moves[snake.id] = next(
+                move
+                for move in board.valid_snake_moves(snake)
+                if move not in moves.values()
+            )
+        data = _next_turn(data, moves)
+
+    assert game._board_turn == data["turn"] - 1
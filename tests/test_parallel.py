@@ -0,0 +1,41 @@
+import os
+
+import pytest
+
+from game import Game
+from models import Board
+from parallel import close_executor, decode_board, encode_board, warm_up
+from tests.test_server import _load_game_data
+
+GAME_DATA_DIR = os.path.join(os.path.dirname(__file__), "game_data")
+
+
+@pytest.fixture(scope="module")
+def executor():
+    warm_up(2)
+    yield
+    close_executor()
+
+
+def test_encode_board():
+    data = _load_game_data("future_dead_end_007.json")
+    board = Board.parse(data)
+
+    encoded = encode_board(board)
+    decoded = decode_board(encoded)
+    assert decoded.differences(board) == []
+    assert decoded.me.id == board.me.id
+    assert decode_board(encode_board(board)) is decoded
+
+
+def test_parallel_moves_are_serial_moves(executor):
+    for name in sorted(os.listdir(GAME_DATA_DIR)):
+        if not name.endswith(".json"):
+            continue
+
+        data = _load_game_data(name)
+
+        serial = Game(data)
+        parallel = Game(data, move_processes=2)
+        assert parallel.move(data) == serial.move(data), name
+        assert parallel._board.heat.map == serial._board.heat.map, name
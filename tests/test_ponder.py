@@ -0,0 +1,157 @@
+import threading
+
+from game import Game, MOVE_MODE_DUEL, add_default_board_heat
+from models import Board
+from ponder import (
+    PonderDeadline,
+    Ponderer,
+    active_games,
+    likely_replies,
+    predict_request,
+)
+from tests.test_server import _load_game_data
+from zobrist import board_key
+
+
+def _likely_next_turn(data: dict, response: dict) -> dict:
+    board = Board.parse(data)
+    board.occupancy
+    move = next(
+        move
+        for move in board.valid_snake_moves(board.me)
+        if board.me.get_move_name(move) == response["move"]
+    )
+    return predict_request(data, board, likely_replies(board, {board.me.id: move})[0])
+
+
+def test_predict_request():
+    data = _load_game_data("avoid_danger_001.json")
+    board = Board.parse(data)
+    board.occupancy
+
+    move = next(board.valid_snake_moves(board.me))
+    replies = likely_replies(board, {board.me.id: move})
+    assert replies
+    assert all(reply[board.me.id] == move for reply in replies)
+    assert len({tuple(sorted(reply.items())) for reply in replies}) == len(replies)
+
+    next_data = predict_request(data, board, replies[0])
+    assert next_data["turn"] == data["turn"] + 1
+    assert next_data["you"]["body"][0] == move
+
+    next_board, _ = board.advance(next_data)
+    assert next_board.differences(Board.parse(next_data)) == []
+    # The request itself is unchanged.
+    assert Board.parse(data).me.head == board.me.head
+
+
+def test_game_ponders_next_move():
+    data = _load_game_data("future_dead_end_010.json")
+    game = Game(data, ponder=True, ponder_cpu_ms=5000)
+    try:
+        response = game.move(data)
+        assert game._ponderer.wait(10)
+        assert game._ponderer.pondered > 0
+
+        next_data = _likely_next_turn(data, response)
+        pondered = game.move(next_data)
+        assert game._ponderer.stats()["hits"] == 1
+
+        # The same move as deciding on the request.
+        assert pondered["move"] == Game(next_data).move(next_data)["move"]
+    finally:
+        game.end(data)
+
+    assert active_games() == 0
+
+
+def test_pondering_cancels_and_pauses():
+    data = _load_game_data("future_dead_end_010.json")
+    board = Board.parse(data)
+    board.occupancy
+    move = next(board.valid_snake_moves(board.me))
+
+    analyzed = []
+    started = threading.Event()
+
+    def analyze(next_board, deadline):
+        analyzed.append(board_key(next_board))
+        started.set()
+        while not deadline.expired():
+            pass
+        return move
+
+    ponderer = Ponderer("cancelled", analyze, cpu_ms=10000)
+    try:
+        ponderer.start(data, board, move)
+        assert started.wait(10)
+        # The next request comes before the end of pondering.
+        assert ponderer.lookup(board) is None
+        assert ponderer.stats()["cancelled"] == 1
+        assert len(analyzed) == 1
+
+        # Too many games to ponder
+        ponderer.max_games = 0
+        ponderer.start(data, board, move)
+        assert ponderer.wait(1)
+        assert len(analyzed) == 1
+    finally:
+        ponderer.close()
+
+
+def test_heuristics_stop_when_cancelled():
+    data = _load_game_data("future_dead_end_010.json")
+    game = Game(data)
+    board = Board.parse(data)
+    board.occupancy
+
+    cancelled = threading.Event()
+    cancelled.set()
+    assert game.ponder_move(board, PonderDeadline(10, 10, cancelled, 2)) is None
+
+    # Stopped before the first heuristic after the default board heat.
+    default_board = Board.parse(data)
+    add_default_board_heat(default_board)
+    assert board.heat.map == default_board.heat.map
+
+    board = Board.parse(data)
+    board.occupancy
+    analysis = game.ponder_move(board, PonderDeadline(10, 10, threading.Event(), 2))
+    assert analysis[0] in board.valid_snake_moves(board.me)
+    assert board.heat.map != default_board.heat.map
+
+
+def test_pondering_pauses_with_played_games():
+    data = _load_game_data("future_dead_end_010.json")
+    board = Board.parse(data)
+    board.occupancy
+    move = next(board.valid_snake_moves(board.me))
+
+    # More games played than pondering.
+    played = 3
+    ponderer = Ponderer("paused", lambda *_: move, max_games=2, games=lambda: played)
+    try:
+        ponderer.start(data, board, move)
+        assert ponderer.wait(1)
+        assert ponderer.pondered == 0
+
+        played = 1
+        ponderer.start(data, board, move)
+        assert ponderer.wait(10)
+        assert ponderer.pondered > 0
+    finally:
+        ponderer.close()
+
+
+def test_duel_game_ponders():
+    data = _load_game_data("future_dead_end_010.json")
+    game = Game(data, move_mode=MOVE_MODE_DUEL, ponder=True, ponder_cpu_ms=100)
+    try:
+        response = game.move(data)
+        assert game._ponderer.wait(10)
+
+        response = game.move(_likely_next_turn(data, response))
+        assert response["move"] in ["up", "down", "left", "right"]
+        assert game._ponderer.stats()["hits"] == 1
+    finally:
+        game.end(data)
@@ -0,0 +1,69 @@
+import gc
+import weakref
+
+import pytest
+
+from models import BLOCKED, Board, Point
+from reachable import _regions, reachable_region
+from tests.test_server import _load_game_data
+
+
+@pytest.fixture()
+def test_board():
+    game_data = _load_game_data("future_dead_end_001.json")
+    board = Board.parse(game_data)
+    return board
+
+
+def test_closed_region(test_board: Board):
+    me = test_board.me
+
+    region = reachable_region(test_board, me, Point(4, 9))
+
+    # Too small for us, but the other snake's tail gets out of the way eventually.
+    assert region.size == 11
+    assert not region.has_tail
+    assert region.escape_time == 7
+    assert region is reachable_region(test_board, me, Point(4, 9))
+
+
+def test_open_region(test_board: Board):
+    me = test_board.me
+
+    region = reachable_region(test_board, me, Point(2, 9), limit=me.size + 2)
+    assert region.size >= me.size + 2
+    assert region.escape_time == BLOCKED
+
+    # The whole board opens up once the snakes have moved.
+    region = reachable_region(test_board, me, Point(2, 9))
+    assert region.size == test_board.size.x * test_board.size.y
+    assert region.has_tail
+
+
+def test_blocked_region(test_board: Board):
+    me = test_board.me
+
+    region = reachable_region(
+        test_board,
+        me,
+        Point(2, 9),
+        blocked=test_board.bitboard.bit(Point(1, 9)),
+    )
+    assert region.size == 1
+
+
+def test_regions_kept_per_board():
+    data = _load_game_data("future_dead_end_001.json")
+    board = Board.parse(data)
+    region = reachable_region(board, board.me, Point(4, 9))
+
+    other = Board.parse(data)
+    assert reachable_region(other, other.me, Point(4, 9)) is not region
+    assert board in _regions and other in _regions
+
+    # Released with their board.
+    released = weakref.ref(board)
+    del board
+    gc.collect()
+    assert released() is None
+    assert other in _regions
@@ -0,0 +1,113 @@
+import gzip
+import json
+import time
+
+from decode import decode_request
+from game import Game
+from models import Board
+from record import (
+    RECORD_END,
+    RECORD_MOVE,
+    RECORD_START,
+    Recorder,
+    read_records,
+    replay,
+)
+from tests.test_models import _next_turn
+from tests.test_server import _load_game_data
+
+
+def _record_game(recorder: Recorder, data: dict) -> list:
+    """
+    :return: The moves of the two turns recorded from the request.
+    """
+    game = Game(data)
+    recorder.record(RECORD_START, data)
+
+    moves = []
+    for turn in range(2):
+        response = game.move(data)
+        moves.append(response["move"])
+        recorder.record(RECORD_MOVE, decode_request(json.dumps(data)), response, 0.01)
+
+        board = Board.parse(data)
+        next_moves = {}
+        for snake in board.snakes:
+            next_moves[snake.id] = next(
+                move
+                for move in board.valid_snake_moves(snake)
+                if (snake is not board.me or snake.get_move_name(move) == moves[-1])
+                and move not in next_moves.values()
+            )
+        data = _next_turn(data, next_moves)
+
+    recorder.record(RECORD_END, data)
+    return moves
+
+
+def test_record_and_replay(tmpdir):
+    data = _load_game_data("avoid_danger_001.json")
+    recorder = Recorder(str(tmpdir))
+
+    moves = _record_game(recorder, data)
+    recorder.close()
+    assert recorder.stats()["recorded"] == 4
+    assert recorder.stats()["dropped"] == 0
+
+    path = recorder.path(data["game"]["id"])
+    records = list(read_records(path))
+    assert [record["type"] for record in records] == ["start", "move", "move", "end"]
+    assert records[0]["data"] == data
+    assert records[1]["data"] == data
+    assert records[1]["response"]["move"] == moves[0]
+    assert records[1]["seconds"] == 0.01
+
+    replayed = list(replay(path))
+    assert [turn["replayed"] for turn in replayed] == moves
+    assert [turn["recorded"] for turn in replayed] == moves
+    assert [turn["turn"] for turn in replayed] == [data["turn"], data["turn"] + 1]
+
+
+def test_recorder_drops_when_full(tmpdir):
+    data = _load_game_data("avoid_danger_001.json")
+    recorder = Recorder(str(tmpdir), queue_size=1)
+
+    # Never waits for the writer.
+    queued = [recorder.record(RECORD_MOVE, data) for _ in range(200)]
+    recorder.close()
+
+    assert queued.count(False) == recorder.dropped
+    assert recorder.stats()["recorded"] == queued.count(True)
+    assert len(list(read_records(recorder.path(data["game"]["id"])))) == queued.count(
+        True
+    )
+
+
+def _wait_closed(recorder: Recorder) -> bool:
+    for _ in range(100):
+        recorder.flush()
+        if recorder.stats()["games"] == 0:
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def test_recorder_closes_games_without_end(tmpdir):
+    data = _load_game_data("avoid_danger_001.json")
+    recorder = Recorder(str(tmpdir), idle_seconds=0.2)
+
+    recorder.record(RECORD_START, data)
+    recorder.record(RECORD_MOVE, data)
+    # Closed once idle: the file is complete (with its gzip trailer).
+    assert _wait_closed(recorder)
+    with gzip.open(recorder.path(data["game"]["id"]), "rt") as file:
+        assert len(file.read().splitlines()) == 2
+
+    # Appended to again, until dropped.
+    recorder.idle_seconds = 60
+    recorder.record(RECORD_MOVE, data)
+    recorder.flush()
+    assert recorder.stats()["games"] == 1
+    recorder.close_game(data["game"]["id"])
+    assert _wait_closed(recorder)
+    assert len(list(read_records(recorder.path(data["game"]["id"])))) == 3
@@ -0,0 +1,127 @@
+import threading
+import time
+
+from game import Game
+from registry import GameRegistry
+from tests.test_server import _load_game_data
+
+
+def _game_data(game_id: str) -> dict:
+    data = _load_game_data("avoid_danger_001.json")
+    data["game"] = dict(data["game"], id=game_id)
+    return data
+
+
+def test_registry_locks_each_game():
+    registry = GameRegistry(Game)
+    first = _game_data("first")
+    entered = threading.Event()
+    release = threading.Event()
+    order = []
+
+    def hold():
+        with registry.game(first):
+            entered.set()
+            release.wait(5)
+            order.append("held")
+
+    def wait():
+        with registry.game(first):
+            order.append("waited")
+
+    holder = threading.Thread(target=hold)
+    holder.start()
+    assert entered.wait(5)
+    waiter = threading.Thread(target=wait)
+    waiter.start()
+
+    # Another game doesn't wait for the first one.
+    with registry.game(_game_data("second")) as game:
+        assert game.game_id == "second"
+        assert registry.gauges()["playing"] == 2
+
+    release.set()
+    holder.join(5)
+    waiter.join(5)
+    assert order == ["held", "waited"]
+    assert registry.gauges() == {
+        "active": 2,
+        "playing": 0,
+        "evicted_idle": 0,
+        "evicted_lru": 0,
+    }
+
+
+def test_registry_evicts_games():
+    registry = GameRegistry(Game, idle_seconds=10, max_games=2)
+
+    data = _game_data("first")
+    with registry.game(data) as first:
+        assert first.turn == data["turn"]
+    with registry.game(_game_data("second")):
+        pass
+    with registry.game(data) as game:
+        assert game is first
+
+    # Above the most games, the least recently used is evicted.
+    with registry.game(_game_data("third")):
+        pass
+    assert "second" not in registry
+    assert len(registry) == 2
+
+    # Unless in use.
+    with registry.game(data):
+        assert registry.evict(time.monotonic() + 60) == 1
+        assert "first" in registry
+
+    assert registry.evict(time.monotonic() + 60) == 1
+    assert len(registry) == 0
+    assert registry.gauges() == {
+        "active": 0,
+        "playing": 0,
+        "evicted_idle": 2,
+        "evicted_lru": 1,
+    }
+
+    registry.remove("first")
+    with registry.game(data) as game:
+        assert game is not first
+
+
+def test_registry_checks_every_idle_game():
+    registry = GameRegistry(Game, idle_seconds=10)
+    first = _game_data("first")
+    second = _game_data("second")
+
+    # The second game's request starts after the first one's, but ends before.
+    with registry.game(first):
+        with registry.game(second):
+            pass
+        time.sleep(0.01)
+
+    idle_since = registry._entries["second"].seen + 10
+    assert registry.evict(idle_since + 0.005) == 1
+    assert "first" in registry and "second" not in registry
+
+    # An end request of an evicted game doesn't create it again.
+    with registry.game(second, create=False) as game:
+        assert game is None
+    assert "second" not in registry
+
+
+def test_registry_sweeps_idle_games():
+    evicted = []
+    registry = GameRegistry(Game, idle_seconds=0.05, evicted=evicted.append)
+    registry.start_sweeper(0.01)
+    try:
+        with registry.game(_game_data("first")):
+            pass
+
+        # Without any other request.
+        deadline = time.monotonic() + 5
+        while len(registry) and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert len(registry) == 0
+        assert [game.game_id for game in evicted] == ["first"]
+    finally:
+        registry.close()
@@ -0,0 +1,116 @@
+from anytime import Deadline
+from game import Game, MOVE_MODE_DUEL
+from mcts import MonteCarloSearch
+from models import Board, HeatMap, Point, Snake
+from reuse import PathMemory
+from tests.test_models import _next_turn
+from tests.test_server import _load_game_data
+
+
+def _reuse_board(me: Snake, others) -> Board:
+    return Board(
+        game_id="reuse",
+        my_id=me.id,
+        size=Point(7, 7),
+        snakes={snake.id: snake for snake in [me] + others},
+        food=[],
+        heat=HeatMap(),
+    )
+
+
+def test_path_memory():
+    other = Snake("other", "other", 90, [Point(0, 0), Point(0, 1), Point(0, 2)])
+    paths = PathMemory()
+    paths.remember(
+        other,
+        False,
+        [Point(0, 0), Point(1, 0), Point(2, 0), Point(3, 0)]
+        + [Point(3, 1), Point(3, 2), Point(3, 3)],
+    )
+    paths.next_turn()
+
+    # Both snakes moved, the other one along the path and we moved onto it.
+    me = Snake("me", "me", 89, [Point(3, 2), Point(3, 3), Point(3, 4)])
+    other = Snake("other", "other", 89, [Point(1, 0), Point(0, 0), Point(0, 1)])
+    board = _reuse_board(me, [other])
+
+    assert paths.inherit(board, other, me.head) == [
+        Point(1, 0),
+        Point(2, 0),
+        Point(3, 0),
+        Point(3, 1),
+        Point(3, 2),
+    ]
+    assert paths.stats() == {"inherited": 1, "repaired": 0, "missed": 0}
+
+    # Too long for the moves allowed
+    paths.next_turn()
+    assert paths.inherit(board, other, me.head, max_moves=3) is None
+
+    # Not a shortest path anymore
+    paths.remember(other, False, [Point(1, 0), Point(1, 1), Point(2, 1), Point(2, 0)])
+    paths.next_turn()
+    assert paths.inherit(board, other, Point(2, 0)) is None
+    assert paths.stats()["missed"] == 1
+
+
+def test_path_memory_repairs_corner():
+    me = Snake("me", "me", 90, [Point(3, 3), Point(3, 4), Point(3, 5)])
+    other = Snake("other", "other", 90, [Point(0, 0), Point(0, 1), Point(0, 2)])
+    paths = PathMemory()
+    paths.remember(
+        other,
+        False,
+        [Point(0, 0), Point(1, 0), Point(2, 0), Point(3, 0)]
+        + [Point(3, 1), Point(3, 2), me.head],
+    )
+    paths.next_turn()
+
+    blocker = Snake("blocker", "blocker", 90, [Point(3, 0), Point(4, 0)])
+    board = _reuse_board(me, [other, blocker])
+
+    inherited = paths.inherit(board, other, me.head)
+    assert inherited == [
+        Point(0, 0),
+        Point(1, 0),
+        Point(2, 0),
+        Point(2, 1),
+        Point(3, 1),
+        Point(3, 2),
+        Point(3, 3),
+    ]
+    assert paths.stats() == {"inherited": 1, "repaired": 1, "missed": 0}
+
+
+def test_mcts_prior():
+    board = Board.parse(_load_game_data("future_dead_end_001.json"))
+
+    search = MonteCarloSearch(board, Deadline(0.05), processes=1)
+    move = search.search()
+    prior = search.subtree(move)
+    assert prior.visits > 0
+
+    search = MonteCarloSearch(board, Deadline(0.05), processes=1, prior=prior)
+    search.search()
+    assert search.stats()["inherited"] == prior.visits
+    assert search.tree.visits == prior.visits + search.playouts
+
+
+def test_game_inherits_search():
+    data = _load_game_data("future_dead_end_010.json")
+    game = Game(data, move_mode=MOVE_MODE_DUEL)
+
+    response = game.move(data, Deadline(0.2))
+    board = Board.parse(data)
+
+    moves = {}
+    for snake in board.snakes:
+        moves[snake.id] = next(
+            move
+            for move in board.valid_snake_moves(snake)
+            if (snake is not board.me or snake.get_move_name(move) == response["move"])
+            and move not in moves.values()
+        )
+
+    game.move(_next_turn(data, moves), Deadline(0.2))
+    assert game._memory.inherited["search"] > 0
@@ -5,6 +5,7 @@ import time
 import pytest
 
 from game import Game
+from models import HeatMap, Point
 
 # We must respond within 500ms so we pick something lower to make
 # sure we don't take too long to respond with any algorithm.
@@ -304,6 +305,17 @@ def test_just_get_food(game_data_path, expected_move):
     assert_move_decision(expected_move, game_data_path)
 
 
+def test_chosen_food_is_not_a_food_fight():
+    game_data = _load_game_data("just_get_food_001.json")
+    test_game = Game(game_data)
+    test_game.move(game_data)
+
+    # The move towards the food we chose also leads to contested food further away.
+    heat = test_game._board.heat
+    assert heat.has_heat(Point(8, 1), HeatMap.HEAT_FUTURE_FOOD)
+    assert not heat.has_heat(Point(8, 1), HeatMap.HEAT_FUTURE_FOOD_FIGHT)
+
+
 @pytest.mark.parametrize(
     "game_data_path,expected_move",
     [
@@ -0,0 +1,49 @@
+from models import Board, HeatMap, Point, Snake
+from territory import CONTESTED, NO_OWNER, Territory, territory
+
+
+def _board(*snakes: Snake) -> Board:
+    return Board(
+        game_id="territory",
+        my_id=snakes[0].id,
+        size=Point(5, 5),
+        snakes={snake.id: snake for snake in snakes},
+        food=[],
+        heat=HeatMap(),
+    )
+
+
+def test_territory_split():
+    me = Snake("me", "me", 100, [Point(0, 2), Point(0, 1), Point(0, 0)])
+    other = Snake("other", "other", 100, [Point(4, 2), Point(4, 1), Point(4, 0)])
+    board = _board(me, other)
+
+    board_territory = Territory(board)
+
+    assert board_territory.owner_of(Point(1, 2)) == me
+    assert board_territory.owner_of(Point(3, 2)) == other
+    assert board_territory.distance_to(Point(3, 2)) == 1
+
+    # Same length snakes get to the middle column at the same time.
+    assert board_territory.owner[2, 2] == CONTESTED
+    assert board_territory.owner_of(Point(2, 4)) is None
+
+    # Bodies are nobody's territory, and out of bounds isn't either.
+    assert board_territory.owner[0, 0] == NO_OWNER
+    assert board_territory.distance_to(Point(0, 0)) is None
+    assert board_territory.owner_of(Point(-1, 2)) is None
+
+    assert board_territory.area(me) == board_territory.area(other) == 8
+
+
+def test_territory_longest_snake_wins_ties():
+    me = Snake("me", "me", 100, [Point(0, 2), Point(0, 1), Point(0, 0)])
+    other = Snake("other", "other", 100, [Point(4, 2), Point(4, 1)])
+    board = _board(me, other)
+
+    board_territory = territory(board)
+
+    assert board_territory is territory(board)
+    assert board_territory.owner_of(Point(2, 2)) == me
+    assert board_territory.distance_to(Point(2, 2)) == 2
+    assert board_territory.area(me) > board_territory.area(other)
@@ -0,0 +1,73 @@
+import random
+
+import pytest
+
+from models import Board
+from tests.test_server import _load_game_data
+from zobrist import TranspositionTable, ZobristKeys, board_key
+
+
+def test_board_key():
+    game_data = _load_game_data("avoid_danger_001.json")
+    board = Board.parse(game_data)
+
+    assert board_key(board) == board_key(Board.parse(game_data))
+
+    game_data["board"]["food"] = game_data["board"]["food"][1:]
+    assert board_key(board) != board_key(Board.parse(game_data))
+
+
+def test_move_key_matches_full_key():
+    keys = ZobristKeys.of(11, 11)
+    rng = random.Random(1)
+
+    for size in [1, 2, 3, 7]:
+        body = [60 + index for index in range(size)]
+        food = [0, 5]
+        key = keys.state_key([body], [90], food)
+
+        for ate, health in [(False, 89), (True, 100)]:
+            move = 60 - 11
+            new_body = [move] + body[:-1]
+            if ate:
+                new_body.append(new_body[-1])
+                food_left = [0, 5]
+                key_food = keys.state_key([body], [90], food + [move])
+                new_key = keys.move(key_food, 0, body, move, 90, health, ate)
+            else:
+                food_left = food
+                new_key = keys.move(key, 0, body, move, 90, health, ate)
+
+            assert new_key == keys.state_key([new_body], [health], food_left)
+
+        assert keys.remove(key, 0, body, 90) == keys.state_key([], [], food)
+
+    # The keys are the same every time (i.e. in every process).
+    assert keys.food == ZobristKeys(11, 11).food
+    assert len({rng.choice(keys.snake(1).head) for _ in range(10)}) > 1
+
+
+def test_transposition_table():
+    table = TranspositionTable(capacity=2)
+
+    table.put(1, "one", depth=3)
+    table.put(2, "two")
+
+    # A shallower result doesn't replace a deeper one.
+    table.put(1, "shallow", depth=1)
+    assert table.get(1) == "one"
+    assert table.get(1, depth=4) is None
+
+    # The least recently used is evicted.
+    table.put(3, "three")
+    assert 2 not in table
+    assert 1 in table and 3 in table
+
+    stats = table.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["evictions"] == 1
+    assert stats["size"] == 2
+
+    with pytest.raises(ValueError):
+        TranspositionTable(capacity=0)
@@ -0,0 +1,266 @@
+"""
+Zobrist keys of board states, and a bounded transposition table to remember what was
+computed for them.
+
+The key of a state is the XOR of one random 64 bit number per (snake, cell, content) and
+per food cell, with the snakes' health and length buckets. Moving a snake only changes a
+few of them, so the key of the next state is updated in a few XORs (`ZobristKeys.move`).
+"""
+
+import random
+import weakref
+
+from collections import OrderedDict
+from typing import Iterable, List
+
+from models import Board
+
+# The health of the snakes is hashed in buckets of that many points.
+HEALTH_BUCKET = 10
+
+# The default number of entries of a transposition table.
+DEFAULT_CAPACITY = 1 << 16
+
+# Board => its Zobrist key
+_board_keys = weakref.WeakKeyDictionary()
+
+
+class SnakeKeys:
+    """
+    The random keys of one snake (by its order in the state, ours first).
+    """
+
+    __slots__ = "head", "body", "tail", "health", "length"
+
+    def __init__(self, rng: random.Random, cells: int):
+        self.head = _random_keys(rng, cells)
+        self.body = _random_keys(rng, cells)
+        self.tail = _random_keys(rng, cells)
+        self.health = _random_keys(rng, 100 // HEALTH_BUCKET + 1)
+        # A snake can't be longer than the board, plus a stacked tail.
+        self.length = _random_keys(rng, cells + 2)
+
+
+class ZobristKeys:
+    """
+    The random keys of one board size, shared by every board (and game) of that size.
+
+    The keys are the same in every process (they come from a seeded generator), so keys
+    computed by different processes can be compared.
+    """
+
+    __slots__ = "cells", "food", "_rng", "_snakes"
+
+    _keys = {}
+
+    def __init__(self, width: int, height: int):
+        self.cells = width * height
+        self._rng = random.Random(f"zobrist-{width}x{height}")
+        self.food = _random_keys(self._rng, self.cells)
+        self._snakes = []
+
+    @staticmethod
+    def of(width: int, height: int) -> "ZobristKeys":
+        """
+        :return: The shared keys for the board size, created on first use.
+        """
+        key = (width, height)
+        keys = ZobristKeys._keys.get(key)
+        if keys is None:
+            keys = ZobristKeys._keys[key] = ZobristKeys(width, height)
+        return keys
+
+    def snake(self, slot: int) -> SnakeKeys:
+        """
+        :return: The keys of the snake at that index of the state, created on first use.
+        """
+        while len(self._snakes) <= slot:
+            self._snakes.append(SnakeKeys(self._rng, self.cells))
+        return self._snakes[slot]
+
+    def snake_key(self, slot: int, body: List[int], health: int) -> int:
+        """
+        :param slot: The index of the snake in the state.
+        :param body: The board cell indexes of the snake's body (head first), empty if dead.
+        :return: The part of the state's key for that snake.
+        """
+        if not body:
+            return 0
+
+        keys = self.snake(slot)
+        key = (
+            keys.head[body[0]]
+            ^ keys.tail[body[-1]]
+            ^ keys.health[_bucket(health)]
+            ^ keys.length[len(body)]
+        )
+        for cell in body[1:-1]:
+            key ^= keys.body[cell]
+        return key
+
+    def state_key(
+        self, bodies: List[List[int]], healths: List[int], food: Iterable[int]
+    ) -> int:
+        """
+        :return: The key of a state with those snakes (in slot order) and food cells.
+        """
+        key = 0
+        for slot, (body, health) in enumerate(zip(bodies, healths)):
+            key ^= self.snake_key(slot, body, health)
+        for cell in food:
+            key ^= self.food[cell]
+        return key
+
+    def move(
+        self,
+        key: int,
+        slot: int,
+        body: List[int],
+        move: int,
+        health: int,
+        new_health: int,
+        ate: bool,
+    ) -> int:
+        """
+        Updates a state's key for one snake moving (where `[move] + body[:-1]` is its new body,
+        with the new tail stacked if it ate).
+
+        :param body: The snake's body before the move.
+        :param ate: Whether the snake ate the food at the `move`, which is removed.
+        :return: The key of the state after the move.
+        """
+        keys = self.snake(slot)
+        if len(body) < 2:
+            new_body = [move] + list(body[:-1])
+            if ate:
+                new_body.append(new_body[-1])
+            key ^= self.snake_key(slot, body, health)
+            key ^= self.snake_key(slot, new_body, new_health)
+            return key ^ (self.food[move] if ate else 0)
+
+        head = body[0]
+        size = len(body)
+        # The segment before the tail becomes the tail, the old head becomes body.
+        key ^= keys.head[head] ^ keys.head[move] ^ keys.body[head]
+        key ^= keys.tail[body[-1]] ^ keys.tail[body[-2]]
+        key ^= keys.health[_bucket(health)]
+        key ^= keys.health[_bucket(new_health)]
+        if ate:
+            key ^= keys.length[size] ^ keys.length[size + 1] ^ self.food[move]
+        else:
+            key ^= keys.body[body[-2]]
+
+        return key
+
+    def remove(self, key: int, slot: int, body: List[int], health: int) -> int:
+        """
+        :return: The key of the state without the snake (e.g. when it dies).
+        """
+        return key ^ self.snake_key(slot, body, health)
+
+
+def board_key(board: Board) -> int:
+    """
+    :return: The Zobrist key of the board (ours first, then the other snakes by id),
+        computed on the first request for that board.
+    """
+    key = _board_keys.get(board)
+    if key is None:
+        grid = board.grid
+        keys = ZobristKeys.of(board.size.x, board.size.y)
+        snakes = [board.me] + sorted(board.others, key=lambda snake: snake.id)
+        key = _board_keys[board] = keys.state_key(
+            [[grid.index(point) for point in snake.body] for snake in snakes],
+            [snake.health for snake in snakes],
+            [grid.index(point) for point in board.food],
+        )
+
+    return key
+
+
+class TranspositionTable:
+    """
+    What was computed for the states (by Zobrist key), up to a fixed number of entries.
+
+    An entry is replaced only by a result of a search at least as deep, and when full the
+    least recently used entry is evicted.
+    """
+
+    __slots__ = "capacity", "hits", "misses", "stores", "evictions", "_entries"
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY):
+        """
+        :param capacity: The most entries kept.
+        """
+        if capacity < 1:
+            raise ValueError(
+                f"A transposition table needs some capacity, not {capacity}."
+            )
+
+        self.capacity = capacity
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        # Key => (depth, value), in the order of use.
+        self._entries = OrderedDict()
+
+    def get(self, key: int, depth: int = 0, default=None):
+        """
+        :return: The value stored for the key by a search at least `depth` deep, otherwise
+            the `default`.
+        """
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < depth:
+            self.misses += 1
+            return default
+
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    def put(self, key: int, value, depth: int = 0):
+        """
+        Stores the value for the key, unless a deeper search already stored one.
+        """
+        entries = self._entries
+        entry = entries.get(key)
+        if entry is not None:
+            if entry[0] > depth:
+                return
+            entries.move_to_end(key)
+        elif len(entries) >= self.capacity:
+            entries.popitem(last=False)
+            self.evictions += 1
+
+        entries[key] = (depth, value)
+        self.stores += 1
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "capacity": self.capacity,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0,
+            "stores": self.stores,
+            "evictions": self.evictions,
+        }
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key: int):
+        return key in self._entries
+
+
+def _random_keys(rng: random.Random, count: int) -> List[int]:
+    return [rng.getrandbits(64) for _ in range(count)]
+
+
+def _bucket(health: int) -> int:
+    return min(max(health, 0), 100) // HEALTH_BUCKET